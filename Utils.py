@@ -2,23 +2,24 @@ import struct
 from enum import Enum, IntEnum
 from typing import BinaryIO, Type
 
-def _parseFromFormatString(dataToParse: bytes, formatString: str):
-	return struct.unpack(formatString, dataToParse)[0]
+def _parseFromFormatString(dataToParse: bytes, formatString: str, startIndex: int = 0):
+	# Unpacking from an offset works for any buffer, like a bytearray or a memoryview, without slicing a copy out of it first
+	return struct.unpack_from(formatString, dataToParse, startIndex)[0]
 
 def parseInt(dataToParse: bytes, startIndex: int = 0) -> int:
-	return _parseFromFormatString(dataToParse[startIndex: startIndex + 4], '<i')
+	return _parseFromFormatString(dataToParse, '<i', startIndex)
 
 def readInt(f: BinaryIO) -> int:
 	return parseInt(f.read(4))
 
 def parseFloat(dataToParse: bytes, startIndex: int = 0) -> float:
-	return _parseFromFormatString(dataToParse[startIndex: startIndex + 4], '<f')
+	return _parseFromFormatString(dataToParse, '<f', startIndex)
 
 def readFloat(f: BinaryIO) -> float:
 	return parseFloat(f.read(4))
 
 def parseShort(dataToParse: bytes, startIndex: int = 0) -> int:
-	return _parseFromFormatString(dataToParse[startIndex: startIndex + 2], '<h')
+	return _parseFromFormatString(dataToParse, '<h', startIndex)
 
 def readShort(f: BinaryIO) -> int:
 	return parseShort(f.read(2))
@@ -40,9 +41,10 @@ def readString(f: BinaryIO) -> str:
 
 def getStringFromBytes(data: bytes, startIndex: int) -> str:
 	terminatedIndex = data.find(b'\x00', startIndex)
-	stringAsBytes = data[startIndex: terminatedIndex]
+	# Decoding through a memoryview doesn't copy the string bytes out of the data first
+	stringAsBytes = memoryview(data)[startIndex: terminatedIndex]
 	try:
-		return stringAsBytes.decode('utf-8')
+		return str(stringAsBytes, 'utf-8')
 	except UnicodeDecodeError as e:
 		print(f"Unable to convert {getPrintableBytes(stringAsBytes)} ({stringAsBytes}) to a string, {startIndex=}")
 		raise e
@@ -1,59 +1,102 @@
 # Parses the .assets.bank files, which contain RIFF data, and the Fmod FSB section encoded in an SND chunk
 # Based on https://github.com/bgbennyboy/Dinky-Explorer/blob/master/ThimbleweedLibrary/FMODBankExtractor.cs and https://github.com/SamboyCoding/Fmod5Sharp
 
-import ctypes, multiprocessing, platform, time
+import copy, ctypes, platform, struct
 from io import BytesIO
-from typing import Dict, Tuple
+from typing import Callable, Dict, Iterator, Tuple
 
 import fsb5, fsb5.vorbis_headers
 import pyogg, pyogg.ogg, pyogg.vorbis
 
 import Keys
 from enums.Game import Game
+from fileparsers.ggpackhelpers import GameDataCodec
 
 
-_byteReverseLookup = []
-# Pre-fill the conversion array since there's only 256 possibilities, speeds up reversing
-for i in range(256):
-    rev = (i >> 4) | ((i & 0xF) << 4)
-    rev = ((rev & 0xCC) >> 2) | ((rev & 0x33) << 2)
-    rev = ((rev & 0xAA) >> 1) | ((rev & 0x55) << 1)
-    _byteReverseLookup.append(rev)
-del i, rev
-
-
-def _decodeRtmi(bytesToDecode: bytes) -> bytearray:
-    numberOfSections = 8
-    startTime = time.perf_counter()
-    numberOfBytesToDecode = len(bytesToDecode)
-    sectionSize = len(bytesToDecode) // numberOfSections
-    currentSectionIndex = 0
-    asyncResults = []
-    with multiprocessing.Pool(numberOfSections) as pool:
-        while currentSectionIndex < numberOfBytesToDecode:
-            asyncResult = pool.apply_async(__decodeSection, (bytesToDecode[currentSectionIndex:min(currentSectionIndex + sectionSize, numberOfBytesToDecode)], currentSectionIndex))
-            asyncResults.append(asyncResult)
-            currentSectionIndex += sectionSize
-        pool.close()
-        pool.join()
-    decodedBytes = bytearray(numberOfBytesToDecode)
-    for asyncResult in asyncResults:
-        startIndex, decodedSection = asyncResult.get()
-        decodedBytes[startIndex:startIndex + len(decodedSection)] = decodedSection
-    print(f"Decoding to bytes after {time.perf_counter() - startTime} seconds")
+_FSB_HEADER_MAGIC = b'FSB5'
+# How many bytes to decode at once when searching for the start of the FSB data
+_FSB_SEARCH_CHUNK_SIZE = 64 * 1024
+
+
+def _decodeRtmi(bytesToDecode: bytes, startOffset: int = 0) -> bytearray:
+    # Each byte has its bits reversed and is then XOR'ed with the soundbank key, indexed from the start of the bank
+    decodedBytes = bytearray(bytesToDecode)
+    GameDataCodec.xorWithRepeatingKey(decodedBytes, Keys.RTMI_KEY_SOUNDBANK, startOffset, True)
     return decodedBytes
 
-def __decodeSection(sectionToDecode: bytes, startIndex: int) -> Tuple[int, bytearray]:
-    decodedBytes = bytearray(len(sectionToDecode))
-    maxKeyIndex = len(Keys.RTMI_KEY_SOUNDBANK) - 1
-    keyIndex = startIndex % len(Keys.RTMI_KEY_SOUNDBANK)
-    for i in range(len(sectionToDecode)):
-        decodedBytes[i] = _byteReverseLookup[sectionToDecode[i]] ^ Keys.RTMI_KEY_SOUNDBANK[keyIndex]
-        if keyIndex == maxKeyIndex:
-            keyIndex = 0
+
+class LazySoundbank(fsb5.FSB5):
+    """
+    An FSB5 soundbank of which only the header is read and decoded, which is enough to list the samples
+    The data of a sample is only read and decoded when it's needed, through 'loadSampleData'. This keeps memory usage to about the size of one sample, instead of a few copies of the whole bank
+    """
+
+    def __init__(self, readBankRange: Callable[[int, int], bytes], bankSize: int, game: Game, shouldDecodeData: bool = True):
+        """
+        :param readBankRange: A method that gets a start offset and a length, and returns those (still encoded) bytes from the bank
+        :param bankSize: The size of the whole bank, in bytes
+        :param game: The game the bank is from, since that determines how to decode it
+        :param shouldDecodeData: Whether the bank data needs decoding or not
+        """
+        if shouldDecodeData and game != Game.RETURN_TO_MONKEY_ISLAND:
+            raise NotImplementedError(f"Decoding soundbanks for game '{game}' has not been implemented")
+        self._readBankRange = readBankRange
+        self._bankSize = bankSize
+        self._shouldDecodeData = shouldDecodeData
+        self._fsbStartOffset = self._findFsbStartOffset()
+        # The header fields after the magic number are the version, the sample count, and the sizes of the sample headers, the name table, and the sample data. Version 0 headers are 4 bytes longer
+        headerStart = self._readDecodedRange(self._fsbStartOffset, min(64, bankSize - self._fsbStartOffset))
+        version, sampleCount, sampleHeadersSize, nameTableSize, dataSize = struct.unpack_from('<5I', headerStart, 4)
+        headerSize = 64 if version == 0 else 60
+        # Without the sample data, the FSB5 parser leaves each sample's data empty
+        super().__init__(self._readDecodedRange(self._fsbStartOffset, min(headerSize + sampleHeadersSize + nameTableSize, bankSize - self._fsbStartOffset)))
+        self._sampleDataStartOffset = self._fsbStartOffset + self.header.size + self.header.sampleHeadersSize + self.header.nameTableSize
+
+    def _readDecodedRange(self, startOffset: int, length: int) -> bytearray:
+        rangeData = self._readBankRange(startOffset, length)
+        if self._shouldDecodeData:
+            return _decodeRtmi(rangeData, startOffset)
+        return bytearray(rangeData)
+
+    def _findFsbStartOffset(self) -> int:
+        searchOffset = 0
+        previousChunkEnd = b''
+        while searchOffset < self._bankSize:
+            decodedChunk = self._readDecodedRange(searchOffset, min(_FSB_SEARCH_CHUNK_SIZE, self._bankSize - searchOffset))
+            # Keep the end of the previous chunk, in case the header is split over two chunks
+            searchData = previousChunkEnd + decodedChunk
+            headerIndex = searchData.find(_FSB_HEADER_MAGIC)
+            if headerIndex >= 0:
+                return searchOffset - len(previousChunkEnd) + headerIndex
+            previousChunkEnd = bytes(searchData[-(len(_FSB_HEADER_MAGIC) - 1):])
+            searchOffset += len(decodedChunk)
+        raise ValueError("Provided data can't be parsed as a soundbank")
+
+    def _getSampleIndex(self, sample: fsb5.Sample) -> int:
+        for sampleIndex, storedSample in enumerate(self.samples):
+            if storedSample.dataOffset == sample.dataOffset and storedSample.name == sample.name:
+                return sampleIndex
+        raise ValueError(f"Sample '{sample.name}' is not part of this soundbank")
+
+    def loadSampleData(self, sample: fsb5.Sample) -> fsb5.Sample:
+        """Returns a copy of the provided sample with its data read and decoded from the bank"""
+        if sample.data:
+            return sample
+        sampleIndex = self._getSampleIndex(sample)
+        sampleStartOffset = self._sampleDataStartOffset + sample.dataOffset
+        if sampleIndex < len(self.samples) - 1:
+            sampleEndOffset = self._sampleDataStartOffset + self.samples[sampleIndex + 1].dataOffset
         else:
-            keyIndex += 1
-    return (startIndex, decodedBytes)
+            # Just like the FSB5 parser, let the last sample run until the end of the sample data or of the bank, whichever comes first
+            sampleEndOffset = min(sampleStartOffset + self.header.dataSize, self._bankSize)
+        return sample._replace(data=bytes(self._readDecodedRange(sampleStartOffset, sampleEndOffset - sampleStartOffset)))
+
+    def rebuild_sample(self, sample: fsb5.Sample):
+        # The FSB5 base class only rebuilds samples that are in its own sample list, so give it a copy of this soundbank that only contains the loaded sample
+        loadedSample = self.loadSampleData(sample)
+        loadedSoundbank = copy.copy(self)
+        loadedSoundbank.samples = [loadedSample]
+        return super(LazySoundbank, loadedSoundbank).rebuild_sample(loadedSample)
 
 def fromBytesToBank(sourceData: bytes, game: Game, shouldDecodeData: bool = True) -> fsb5.FSB5:
     """Converts the BANK music and sound data into something useful"""
@@ -66,18 +109,23 @@ def fromBytesToBank(sourceData: bytes, game: Game, shouldDecodeData: bool = True
     fsbStartIndex = decodedSourceData.find(b'FSB5')
     if fsbStartIndex < 0:
         raise ValueError("Provided data can't be parsed as a soundbank")
-    soundbank = fsb5.FSB5(decodedSourceData[fsbStartIndex:])
+    # The FSB5 parser copies the data it gets, so give it a view instead of a slice to avoid another copy
+    soundbank = fsb5.FSB5(memoryview(decodedSourceData)[fsbStartIndex:])
     return soundbank
 
 def fromBankToBytesDict(soundbank: fsb5.FSB5) -> Dict[str, bytes]:
     """Converts the BANK sound data into a dict with filenames as the keys and the sounddata as values"""
-    sounds = {}
+    return dict(iterateBankSamples(soundbank))
+
+def iterateBankSamples(soundbank: fsb5.FSB5) -> Iterator[Tuple[str, bytes]]:
+    """Converts the BANK sound data one sample at a time, yielding a tuple with the filename and the sounddata for each sample"""
     for sample in soundbank.samples:
-        sounds[sample.name + '.ogg'] = rebuildSample(soundbank, sample)
-    return sounds
+        yield sample.name + '.ogg', rebuildSample(soundbank, sample)
 
 def rebuildSample(soundbank: fsb5.FSB5, sample: fsb5.Sample) -> bytes:
     """Create an OGG file from the provided FSB5 sample"""
+    if isinstance(soundbank, LazySoundbank):
+        sample = soundbank.loadSampleData(sample)
     if platform.system() == 'Windows':
         return bytes(soundbank.rebuild_sample(sample))
     # Copied from the FSB5 library and adjusted to use PyOgg
@@ -3,13 +3,19 @@ Thimbleweed Park, Delores, and Return To Monkey Island store some data in a spec
 This class can read, parse, and write them
 """
 
+import array, struct, sys
 from enum import Enum
-from io import BytesIO
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
 
 import Utils
 from CustomExceptions import DecodeError, GGDictError
 from enums.Game import Game
+from models.FileIndexColumns import FileIndexColumns
 
 
 class _ValueType(Enum):
@@ -29,6 +35,11 @@ _VERSION_HEADER = b'\x01\x00\x00\x00'
 _FILE_INDEX_END = b'\xFF\xFF\xFF\xFF'
 _STRING_OFFSETS_START = b'\x07'
 _STRINGS_START = b'\x08'
+_INT_STRUCT = struct.Struct('<i')
+_SHORT_STRUCT = struct.Struct('<h')
+# A file index entry is a dict marker, the key count, three key-value pairs of a key string index, a value type, and a value string index, and a closing dict marker
+_INT_INDEX_FILE_INDEX_ENTRY_STRUCT = struct.Struct('<BiiBiiBiiBiB')
+_SHORT_INDEX_FILE_INDEX_ENTRY_STRUCT = struct.Struct('<BihBhhBhhBhB')
 
 
 def fromGgDict(sourceData: bytes, sourceGame: Game):
@@ -38,6 +49,109 @@ def fromGgDict(sourceData: bytes, sourceGame: Game):
 	:param sourceGame: The game that the source data came from. This is needed beacuse some parts of ggdict parsing differ between games
 	:return: The parsed structure, usually a dictionary
 	"""
+	stringList = _readStringList(sourceData)
+	# The values start right after the header and the string offsets list start, and refer to the strings by their index in the string list
+	return _GGDictReader(sourceData, stringList, sourceGame == Game.RETURN_TO_MONKEY_ISLAND).readValue(12)[0]
+
+def fromGgDictFileIndex(sourceData: bytes, sourceGame: Game) -> Union[None, FileIndexColumns]:
+	"""
+	Parse a ggpack file index straight into columns. A file index always has the same layout: a dict with a 'files' array of dicts that each have a 'filename', 'offset', and 'size', and a 'guid' string
+	Because of that, every entry takes up the same number of bytes, so all entries can be unpacked at once, instead of value by value like 'fromGgDict' does
+	:param sourceData: The decoded file index
+	:param sourceGame: The game that the file index came from. This is needed because the size of string indexes differs between games
+	:return: The entries of the file index, or None if the file index doesn't have the usual layout. In that case it should be parsed with 'fromGgDict'
+	"""
+	try:
+		stringList = _readStringList(sourceData)
+		useShortStringIndex = sourceGame == Game.RETURN_TO_MONKEY_ISLAND
+		stringIndexStruct = _SHORT_STRUCT if useShortStringIndex else _INT_STRUCT
+		sourceData = memoryview(sourceData)
+		# The file index is a dict with two keys, 'files' and 'guid'
+		offset = 12
+		if sourceData[offset] != _ValueType.DICT.value[0] or _INT_STRUCT.unpack_from(sourceData, offset + 1)[0] != 2:
+			return None
+		offset += 1 + _INT_STRUCT.size
+		fileIndexColumns: Union[None, FileIndexColumns] = None
+		guid: Union[None, str] = None
+		for keyIndex in range(2):
+			keyName = _getListedString(stringList, stringIndexStruct.unpack_from(sourceData, offset)[0])
+			offset += stringIndexStruct.size
+			if keyName == 'files' and fileIndexColumns is None:
+				fileIndexColumns, offset = _readFileIndexEntries(sourceData, offset, stringList, useShortStringIndex)
+				if fileIndexColumns is None:
+					return None
+			elif keyName == 'guid' and guid is None and sourceData[offset] == _ValueType.STRING.value[0]:
+				guid = _getListedString(stringList, stringIndexStruct.unpack_from(sourceData, offset + 1)[0])
+				offset += 1 + stringIndexStruct.size
+			else:
+				return None
+		if sourceData[offset] != _ValueType.DICT.value[0]:
+			return None
+	except (DecodeError, GGDictError, IndexError, OverflowError, ValueError, struct.error):
+		# Anything that doesn't fit the usual layout is left to the generic parser, which also properly reports what's wrong if the file index is broken
+		return None
+	fileIndexColumns.guid = guid
+	return fileIndexColumns
+
+def _readFileIndexEntries(sourceData: memoryview, offset: int, stringList: List[str], useShortStringIndex: bool) -> Tuple[Union[None, FileIndexColumns], int]:
+	"""Read all the entries of the 'files' array of a file index at once. Returns the entries, or None if they don't have the usual layout, and the offset after the array"""
+	if sourceData[offset] != _ValueType.ARRAY.value[0]:
+		return None, offset
+	entryCount = _INT_STRUCT.unpack_from(sourceData, offset + 1)[0]
+	offset += 1 + _INT_STRUCT.size
+	entryStruct = _SHORT_INDEX_FILE_INDEX_ENTRY_STRUCT if useShortStringIndex else _INT_INDEX_FILE_INDEX_ENTRY_STRUCT
+	entriesEnd = offset + entryCount * entryStruct.size
+	if entryCount < 0 or entriesEnd >= len(sourceData) or sourceData[entriesEnd] != _ValueType.ARRAY.value[0]:
+		return None, offset
+	if numpy is not None:
+		# A struct format without alignment also works as a NumPy structured type, with a field for each value
+		entries = numpy.frombuffer(sourceData, dtype=numpy.dtype(','.join(entryStruct.format[0] + fieldFormat for fieldFormat in entryStruct.format[1:])), count=entryCount, offset=offset)
+		columns = [entries[fieldName] for fieldName in entries.dtype.names]
+	else:
+		columns = list(zip(*entryStruct.iter_unpack(sourceData[offset:entriesEnd]))) or [()] * (len(entryStruct.format) - 1)
+	dictStarts, keyCounts, filenameKeys, filenameTypes, filenameIndexes, offsetKeys, offsetTypes, offsetIndexes, sizeKeys, sizeTypes, sizeIndexes, dictEnds = columns
+	# Each entry should be a dict with a string filename, an integer offset, and an integer size, in that order
+	expectedColumnValues = ((dictStarts, _ValueType.DICT.value[0]), (keyCounts, 3), (filenameTypes, _ValueType.STRING.value[0]), (offsetTypes, _ValueType.INTEGER.value[0]), (sizeTypes, _ValueType.INTEGER.value[0]), (dictEnds, _ValueType.DICT.value[0]))
+	for column, expectedValue in expectedColumnValues:
+		if any(value != expectedValue for value in _getUniqueValues(column)):
+			return None, offset
+	for keyColumn, expectedKeyName in ((filenameKeys, 'filename'), (offsetKeys, 'offset'), (sizeKeys, 'size')):
+		if any(_getListedString(stringList, stringIndex) != expectedKeyName for stringIndex in _getUniqueValues(keyColumn)):
+			return None, offset
+	filenames = _getListedStrings(stringList, filenameIndexes)
+	offsets = _getListedIntegers(stringList, offsetIndexes)
+	sizes = _getListedIntegers(stringList, sizeIndexes)
+	return FileIndexColumns(filenames, offsets, sizes, None), entriesEnd + 1
+
+def _getUniqueValues(column) -> List[int]:
+	return numpy.unique(column).tolist() if numpy is not None else list(set(column))
+
+def _getListedString(stringList: List[str], stringIndex: int) -> str:
+	# Check the index explicitly, since a negative index would otherwise count from the end of the list
+	if stringIndex < 0 or stringIndex >= len(stringList):
+		raise GGDictError(f"Invalid string index {stringIndex}, string list contains {len(stringList):,} strings")
+	return stringList[stringIndex]
+
+def _getListedStrings(stringList: List[str], stringIndexes) -> List[str]:
+	for stringIndex in _getUniqueValues(stringIndexes):
+		_getListedString(stringList, stringIndex)
+	if numpy is not None:
+		stringIndexes = stringIndexes.tolist()
+	return [stringList[stringIndex] for stringIndex in stringIndexes]
+
+def _getListedIntegers(stringList: List[str], stringIndexes) -> array.array:
+	# Many entries share the same offset or size string, so convert each used string only once
+	if numpy is not None:
+		uniqueStringIndexes, inverseIndexes = numpy.unique(stringIndexes, return_inverse=True)
+		uniqueIntegers = numpy.array([int(_getListedString(stringList, stringIndex), 10) for stringIndex in uniqueStringIndexes.tolist()], dtype=numpy.uint64)
+		integers = array.array('Q')
+		integers.frombytes(uniqueIntegers[inverseIndexes].tobytes())
+		return integers
+	stringIndexToInteger = {stringIndex: int(_getListedString(stringList, stringIndex), 10) for stringIndex in set(stringIndexes)}
+	return array.array('Q', [stringIndexToInteger[stringIndex] for stringIndex in stringIndexes])
+
+def _readStringList(sourceData: bytes) -> List[str]:
+	"""Verify the header of the provided GGDict, and read the list of strings that the values refer to"""
 	# Verify the header to see if the source data is parsable
 	if sourceData[0:4] != HEADER or sourceData[4:8] != _VERSION_HEADER:
 		raise DecodeError(f"Invalid header. Should be '{Utils.getPrintableBytes(HEADER)} {Utils.getPrintableBytes(_VERSION_HEADER)}, but is {Utils.getPrintableBytes(sourceData[0:8])}")
@@ -48,81 +162,114 @@ def fromGgDict(sourceData: bytes, sourceGame: Game):
 		raise DecodeError(f"String offsets supposedly start at offset {offsetsListStart:,} but there are only {sourceDataLength:,} bytes available")
 	elif offsetsListStart < 12:
 		raise DecodeError(f"Invalid index start offset of {offsetsListStart:,}, too small")
-	# Iterate over the offsets and retrieve the string at each location
-	stringList: List[str] = []
-	totalStringLength: int = 0
-	for currentOffsetsListOffset in range(offsetsListStart, sourceDataLength, 4):
-		stringOffset = Utils.parseInt(sourceData, currentOffsetsListOffset)
+	# Collect all the string offsets first. '-1' signals the end of the offsets list
+	stringOffsets: List[int] = []
+	for stringOffset, in _INT_STRUCT.iter_unpack(memoryview(sourceData)[offsetsListStart:offsetsListStart + (sourceDataLength - offsetsListStart) // 4 * 4]):
 		if stringOffset <= -1:
-			# '-1' signals the end of the offsets list, so we can stop
 			break
-		stringList.append(Utils.getStringFromBytes(sourceData, stringOffset))
-		totalStringLength += len(stringList[-1])
-	if len(stringList) == 0:
+		stringOffsets.append(stringOffset)
+	if len(stringOffsets) == 0:
 		raise GGDictError("Provided GGDict does not contain any strings, unable to parse")
-	# The section after the offsetsListStart explains how the strings are organised
-	sourceDataAsIo = BytesIO(sourceData)
-	sourceDataAsIo.seek(12)
-	return _readValue(sourceDataAsIo, stringList, sourceGame == Game.RETURN_TO_MONKEY_ISLAND)
-
-def _readValue(sourceData: BytesIO, stringList: List[str], useShortStringIndex: bool):
-	valueType = sourceData.read(1)
-	if valueType == _ValueType.NULL.value:
-		return None
-	if valueType == _ValueType.DICT.value:
-		return _readDictionary(sourceData, stringList, useShortStringIndex)
-	elif valueType == _ValueType.ARRAY.value:
-		return _readArray(sourceData, stringList, useShortStringIndex)
-	elif valueType == _ValueType.STRING.value:
-		return _readString(sourceData, stringList, useShortStringIndex)
-	elif valueType == _ValueType.INTEGER.value:
-		return _readInteger(sourceData, stringList, useShortStringIndex)
-	elif valueType == _ValueType.FLOAT.value:
-		return _readFloat(sourceData, stringList, useShortStringIndex)
-	elif valueType in (_ValueType.VECTOR2D.value, _ValueType.VECTOR2DPAIR.value, _ValueType.VECTOR2DTRIPLET.value):
-		# TODO: Parse these into something more useful than strings
-		return _readString(sourceData, stringList, useShortStringIndex)
+	# The strings are usually plain ASCII, and then they can all be decoded at once, since each byte offset is then also a character offset in the decoded strings
+	stringsStart = min(stringOffsets)
+	stringsBytes = bytes(memoryview(sourceData)[stringsStart:])
+	if stringsBytes.isascii():
+		strings = stringsBytes.decode('ascii')
+		stringList = []
+		for stringOffset in stringOffsets:
+			stringStart = stringOffset - stringsStart
+			stringList.append(sys.intern(strings[stringStart:strings.find('\x00', stringStart)]))
 	else:
-		raise GGDictError(f"Encountered unknown value type {valueType} ({hex(valueType[0])}) at offset {sourceData.tell():,} ({hex(sourceData.tell())})")
-
-def _readDictionary(sourceData: BytesIO, stringList: List[str], useShortStringIndex: bool) -> Dict[str, Any]:
-	# Dictionary of values
-	result = {}
-	itemCount = Utils.readInt(sourceData)
-	for itemIndex in range(itemCount):
-		keyName = _readString(sourceData, stringList, useShortStringIndex)
-		value = _readValue(sourceData, stringList, useShortStringIndex)
-		if keyName in result:
-			print(f"Duplicate key '{keyName}', old value is {result[keyName]}, overwriting with {value}")
-		result[keyName] = value
-	_verifyBlockIsClosed(sourceData, _ValueType.DICT)
-	return result
-
-def _readArray(sourceData: BytesIO, stringList: List[str], useShortStringIndex: bool) -> List[Any]:
-	itemCount = Utils.readInt(sourceData)
-	result = []
-	for itemIndex in range(itemCount):
-		result.append(_readValue(sourceData, stringList, useShortStringIndex))
-	# An array also ends with the array marker
-	_verifyBlockIsClosed(sourceData, _ValueType.ARRAY)
-	return result
-
-def _readString(sourceData: BytesIO, stringList: List[str], useShortStringIndex: bool) -> str:
-	stringIndex = Utils.readShort(sourceData) if useShortStringIndex else Utils.readInt(sourceData)
-	if stringIndex < 0 or stringIndex >= len(stringList):
-		raise GGDictError(f"Invalid string index {stringIndex} at offset {sourceData.tell()} ({hex(sourceData.tell())}), string list contains {len(stringList):,} strings. StringList is {stringList}")
-	return stringList[stringIndex]
+		stringList = [sys.intern(Utils.getStringFromBytes(sourceData, stringOffset)) for stringOffset in stringOffsets]
+	return stringList
+
+class _GGDictReader:
+	"""
+	Reads the values of a GGDict by moving an offset through the data, instead of reading it like a file
+	Each value type byte maps to the method that reads that type of value, and each read method returns the value and the offset after it
+	"""
+
+	def __init__(self, sourceData: bytes, stringList: List[str], useShortStringIndex: bool):
+		self._sourceData: memoryview = memoryview(sourceData)
+		self._stringList: List[str] = stringList
+		self._stringCount: int = len(stringList)
+		stringIndexStruct = _SHORT_STRUCT if useShortStringIndex else _INT_STRUCT
+		# These get called for nearly every value, so store them directly instead of looking them up each time
+		self._unpackStringIndex: Callable = stringIndexStruct.unpack_from
+		self._stringIndexSize: int = stringIndexStruct.size
 
-def _readInteger(sourceData: BytesIO, stringList: List[str], useShortStringIndex: bool) -> int:
-	return int(_readString(sourceData, stringList, useShortStringIndex), 10)
+	def readValue(self, offset: int) -> Tuple[Any, int]:
+		try:
+			valueReader = self._VALUE_TYPE_TO_READER[self._sourceData[offset]]
+		except (IndexError, KeyError):
+			if offset >= len(self._sourceData):
+				raise GGDictError(f"Expected a value type at offset {offset:,} ({hex(offset)}), but the GGDict is only {len(self._sourceData):,} bytes long") from None
+			valueType = self._sourceData[offset]
+			raise GGDictError(f"Encountered unknown value type {bytes((valueType,))} ({hex(valueType)}) at offset {offset + 1:,} ({hex(offset + 1)})") from None
+		return valueReader(self, offset + 1)
 
-def _readFloat(sourceData: BytesIO, stringList: List[str], useShortStringIndex: bool) -> float:
-	return float(_readString(sourceData, stringList, useShortStringIndex))
+	def _readNull(self, offset: int) -> Tuple[None, int]:
+		return None, offset
+
+	def _readDictionary(self, offset: int) -> Tuple[Dict[str, Any], int]:
+		result = {}
+		itemCount = _INT_STRUCT.unpack_from(self._sourceData, offset)[0]
+		offset += _INT_STRUCT.size
+		readValue = self.readValue
+		for itemIndex in range(itemCount):
+			keyName, offset = self._readString(offset)
+			value, offset = readValue(offset)
+			if keyName in result:
+				print(f"Duplicate key '{keyName}', old value is {result[keyName]}, overwriting with {value}")
+			result[keyName] = value
+		return result, self._verifyBlockIsClosed(offset, _ValueType.DICT)
+
+	def _readArray(self, offset: int) -> Tuple[List[Any], int]:
+		itemCount = _INT_STRUCT.unpack_from(self._sourceData, offset)[0]
+		offset += _INT_STRUCT.size
+		readValue = self.readValue
+		result = []
+		for itemIndex in range(itemCount):
+			value, offset = readValue(offset)
+			result.append(value)
+		# An array also ends with the array marker
+		return result, self._verifyBlockIsClosed(offset, _ValueType.ARRAY)
+
+	def _readString(self, offset: int) -> Tuple[str, int]:
+		stringIndex = self._unpackStringIndex(self._sourceData, offset)[0]
+		offset += self._stringIndexSize
+		if 0 <= stringIndex < self._stringCount:
+			return self._stringList[stringIndex], offset
+		raise GGDictError(f"Invalid string index {stringIndex} at offset {offset} ({hex(offset)}), string list contains {len(self._stringList):,} strings. StringList is {self._stringList}")
+
+	def _readInteger(self, offset: int) -> Tuple[int, int]:
+		integerString, offset = self._readString(offset)
+		return int(integerString, 10), offset
+
+	def _readFloat(self, offset: int) -> Tuple[float, int]:
+		floatString, offset = self._readString(offset)
+		return float(floatString), offset
+
+	def _verifyBlockIsClosed(self, offset: int, valueTypeToClose: _ValueType) -> int:
+		closeByte = bytes(self._sourceData[offset:offset + 1])
+		if closeByte != valueTypeToClose.value:
+			raise GGDictError(f"ValueType wasn't closed properly. Expected {valueTypeToClose.value} but was {closeByte} (At position {offset + len(closeByte):,})")
+		return offset + 1
+
+	# Stored on the class instead of per reader, so a reader doesn't refer to itself, and the view of the source data is released as soon as reading is done
+	_VALUE_TYPE_TO_READER: Dict[int, Callable[['_GGDictReader', int], Tuple[Any, int]]] = {
+		_ValueType.NULL.value[0]: _readNull,
+		_ValueType.DICT.value[0]: _readDictionary,
+		_ValueType.ARRAY.value[0]: _readArray,
+		_ValueType.STRING.value[0]: _readString,
+		_ValueType.INTEGER.value[0]: _readInteger,
+		_ValueType.FLOAT.value[0]: _readFloat,
+		# TODO: Parse these into something more useful than strings
+		_ValueType.VECTOR2D.value[0]: _readString,
+		_ValueType.VECTOR2DPAIR.value[0]: _readString,
+		_ValueType.VECTOR2DTRIPLET.value[0]: _readString
+	}
 
-def _verifyBlockIsClosed(sourceData, valueTypeToClose: _ValueType):
-	closeByte = sourceData.read(1)
-	if closeByte != valueTypeToClose.value:
-		raise GGDictError(f"ValueType wasn't closed properly. Expected {valueTypeToClose.value} but was {closeByte} (At position {sourceData.tell():,})")
 
 def toGgDict(valueToConvert, targetGame: Game) -> bytes:
 	"""
@@ -131,72 +278,96 @@ def toGgDict(valueToConvert, targetGame: Game) -> bytes:
 	:param targetGame: The game that the ggdict is for. This is needed beacuse some parts of ggdict parsing differ between games
 	:return: The GGDict structure
 	"""
-	# Create the dict structure itself first. Later we'll add the offsets and the stringlist, but we need this size to be able to calculate offsets
-	stringList: List[str] = []
-	ggdictOutput = bytearray()
-	_writeValue(ggdictOutput, stringList, targetGame == Game.RETURN_TO_MONKEY_ISLAND, valueToConvert)
-	# Now we can create the string offsets and strings (The +4 is for the int indicating the offset where the string offsets list starts)
-	stringIndexOffset = len(HEADER) + len(_VERSION_HEADER) + 4 + len(ggdictOutput)
-	output = bytearray()
-	output.extend(HEADER)
-	output.extend(_VERSION_HEADER)
-	output.extend(Utils.toWritableInt(stringIndexOffset))
-	output.extend(ggdictOutput)
-	# Now we can start writing the string list
-	stringListOutput = bytearray()
-	stringListOffsets: List[int] = []
-	for s in stringList:
-		stringListOffsets.append(len(stringListOutput))
-		stringListOutput.extend(bytes(s, encoding='utf-8'))
-		stringListOutput.extend(b'\x00')  # Strings are 0-terminated
-	# The string offsets should be from the start of the ggdict, so add the ints (4 bytes) we're going to write for each string offset, plus the block closing and opening indicators
-	baseStringOffset = stringIndexOffset + len(stringList) * 4 + len(_FILE_INDEX_END) + len(_STRING_OFFSETS_START) + len(_STRINGS_START)
-	output.extend(_STRING_OFFSETS_START)
-	for stringListOffset in stringListOffsets:
-		output.extend(Utils.toWritableInt(baseStringOffset + stringListOffset))
-	output.extend(_FILE_INDEX_END)
-	output.extend(_STRINGS_START)
-	output.extend(stringListOutput)
-	return bytes(output)
-
-def _writeValue(output: bytearray, stringList: List[str], useShortStringIndex: bool, value: Any):
-	if isinstance(value, dict):
-		_writeDictionary(output, stringList, useShortStringIndex, value)
-	elif isinstance(value, list):
-		_writeArray(output, stringList, useShortStringIndex, value)
-	elif isinstance(value, str):
-		_writeString(output, stringList, useShortStringIndex, value)
-	elif isinstance(value, int):
-		_writeInteger(output, stringList, useShortStringIndex, value)
-	else:
-		raise GGDictError(f"Writing value type '{type(value)}' hasn't been implemented yet ({value=})")
-
-def _writeDictionary(output: bytearray, stringList: List[str], useShortStringIndex: bool, d: Dict[str, Any]):
-	output.extend(_ValueType.DICT.value)
-	output.extend(Utils.toWritableInt(len(d)))
-	for key in d:
-		_writeString(output, stringList, useShortStringIndex, key, False)
-		_writeValue(output, stringList, useShortStringIndex, d[key])
-	# Close off the dict
-	output.extend(_ValueType.DICT.value)
-
-def _writeArray(output: bytearray, stringList: List[str], useShortStringIndex: bool, l: List[Any]):
-	output.extend(_ValueType.ARRAY.value)
-	output.extend(Utils.toWritableInt(len(l)))
-	for value in l:
-		_writeValue(output, stringList, useShortStringIndex, value)
-	output.extend(_ValueType.ARRAY.value)
-
-def _writeString(output: bytearray, stringList: List[str], useShortStringIndex: bool, s: str, addValueType: bool = True):
-	if addValueType:
-		output.extend(_ValueType.STRING.value)
-	if s not in stringList:
-		stringList.append(s)
-		keyIndex = len(stringList) - 1
-	else:
-		keyIndex = stringList.index(s)
-	output.extend(Utils.toWritableShort(keyIndex) if useShortStringIndex else Utils.toWritableInt(keyIndex))
+	return bytes(_GGDictWriter(targetGame == Game.RETURN_TO_MONKEY_ISLAND).write(valueToConvert))
+
+
+class _GGDictWriter:
+	"""
+	Writes a value as a GGDict into a single growing buffer
+	Each distinct string gets stored once in the string list, and a dict from each string to its index in that list keeps looking up strings quick, however many strings there are
+	"""
+
+	def __init__(self, useShortStringIndex: bool):
+		self._stringList: List[str] = []
+		self._stringToIndex: Dict[str, int] = {}
+		self._packStringIndex: Callable[[int], bytes] = (_SHORT_STRUCT if useShortStringIndex else _INT_STRUCT).pack
+		self._output = bytearray()
+
+	def write(self, valueToConvert) -> bytearray:
+		# The header ends with the offset of the string offsets list, which is only known once the values are written, so leave room for it and fill it in afterwards
+		self._output.extend(HEADER)
+		self._output.extend(_VERSION_HEADER)
+		self._output.extend(bytes(_INT_STRUCT.size))
+		self._writeValue(valueToConvert)
+		stringIndexOffset = len(self._output)
+		_INT_STRUCT.pack_into(self._output, len(HEADER) + len(_VERSION_HEADER), stringIndexOffset)
+		# The string offsets should be from the start of the ggdict, so add the ints (4 bytes) we're going to write for each string offset, plus the block closing and opening indicators
+		encodedStrings = [bytes(s, encoding='utf-8') for s in self._stringList]
+		stringOffset = stringIndexOffset + len(encodedStrings) * _INT_STRUCT.size + len(_FILE_INDEX_END) + len(_STRING_OFFSETS_START) + len(_STRINGS_START)
+		stringOffsets = array.array('i')
+		for encodedString in encodedStrings:
+			stringOffsets.append(stringOffset)
+			stringOffset += len(encodedString) + 1  # Strings are 0-terminated
+		if sys.byteorder != 'little':
+			stringOffsets.byteswap()
+		self._output.extend(_STRING_OFFSETS_START)
+		self._output.extend(stringOffsets)
+		self._output.extend(_FILE_INDEX_END)
+		self._output.extend(_STRINGS_START)
+		for encodedString in encodedStrings:
+			self._output.extend(encodedString)
+			self._output.append(0)
+		return self._output
+
+	def _writeValue(self, value: Any):
+		valueWriter = self._TYPE_TO_WRITER.get(type(value), None)
+		if valueWriter is not None:
+			valueWriter(self, value)
+		elif isinstance(value, dict):
+			self._writeDictionary(value)
+		elif isinstance(value, list):
+			self._writeArray(value)
+		elif isinstance(value, str):
+			self._writeString(value)
+		elif isinstance(value, int):
+			self._writeInteger(value)
+		else:
+			raise GGDictError(f"Writing value type '{type(value)}' hasn't been implemented yet ({value=})")
+
+	def _writeDictionary(self, d: Dict[str, Any]):
+		self._output.extend(self._DICT_MARKER)
+		self._output.extend(_INT_STRUCT.pack(len(d)))
+		for key, value in d.items():
+			self._writeString(key, False)
+			self._writeValue(value)
+		# Close off the dict
+		self._output.extend(self._DICT_MARKER)
+
+	def _writeArray(self, l: List[Any]):
+		self._output.extend(self._ARRAY_MARKER)
+		self._output.extend(_INT_STRUCT.pack(len(l)))
+		for value in l:
+			self._writeValue(value)
+		self._output.extend(self._ARRAY_MARKER)
+
+	def _writeString(self, s: str, addValueType: bool = True):
+		if addValueType:
+			self._output.extend(self._STRING_MARKER)
+		stringIndex = self._stringToIndex.get(s, None)
+		if stringIndex is None:
+			stringIndex = len(self._stringList)
+			self._stringList.append(s)
+			self._stringToIndex[s] = stringIndex
+		self._output.extend(self._packStringIndex(stringIndex))
+
+	def _writeInteger(self, i: int):
+		self._output.extend(self._INTEGER_MARKER)
+		self._writeString(str(i), False)
 
-def _writeInteger(output: bytearray, stringList: List[str], useShortStringIndex: bool, i: int):
-	output.extend(_ValueType.INTEGER.value)
-	_writeString(output, stringList, useShortStringIndex, str(i), False)
+	# Looking up the enum values for every written value is slow, so store them once
+	_DICT_MARKER: bytes = _ValueType.DICT.value
+	_ARRAY_MARKER: bytes = _ValueType.ARRAY.value
+	_STRING_MARKER: bytes = _ValueType.STRING.value
+	_INTEGER_MARKER: bytes = _ValueType.INTEGER.value
+	# Writers for the exact types, so most values don't need to go through the 'isinstance' checks. Subclasses of these types still get written through those checks
+	_TYPE_TO_WRITER: Dict[type, Callable[['_GGDictWriter', Any], None]] = {dict: _writeDictionary, list: _writeArray, str: _writeString, int: _writeInteger}
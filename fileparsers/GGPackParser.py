@@ -1,6 +1,6 @@
 # Handles parsing the .ggpack files, that contain the other files
-import io, json, os
-from typing import Dict, List, Tuple, Union
+import collections, concurrent.futures, functools, io, json, os, types
+from typing import BinaryIO, Callable, Deque, Dict, Iterable, Iterator, List, Tuple, Union
 
 import fsb5
 from PIL import Image
@@ -10,13 +10,26 @@ from CustomExceptions import DecodeError, PackingError
 from enums.Game import Game
 from fileparsers import BankParser, DinkParser, GGDictParser, KtxParser, NutParser, YackParser
 from fileparsers.dinkhelpers.DinkScript import DinkScript
-from models.FileEntry import FileEntry
+from fileparsers.ggpackhelpers import FileIndexCache, GameDataCodec, MappedPackFile, PackLayout
+from fileparsers.ggpackhelpers.PackedFileReader import PackedFileReader
+from models.ContentHashes import ContentHashes
+from models.FileEntry import FileEntry, FileEntryTable
+from models.FileEntryIndex import FileEntryIndex
+from models.FileIndexColumns import FileIndexColumns
 
 
 # This GUID is added to all the pack file indexes, not sure what it's based on
 _FILE_INDEX_GUID = "b554baf88ff004c50cc0214575794b8c"
+# How many bytes to read and decode, or encode and write, at once when streaming a packed file
+DECODE_CHUNK_SIZE = 4 * 1024 * 1024
+# When packing, small files are sent to the worker processes in jobs of about this many bytes, and larger files get encoded in chunks by the packing process itself
+PACK_JOB_SIZE = DECODE_CHUNK_SIZE
+# At most this many bytes of files are being encoded or are waiting to be written while packing, since files get written in order, however quickly each of them gets encoded
+MAX_PACK_BYTES_IN_FLIGHT = 16 * PACK_JOB_SIZE
+# When hashing entries, they're sent to the worker processes in jobs of about this many bytes. Hashing is quick, so larger jobs keep the overhead of sending them low
+HASH_JOB_SIZE = 4 * DECODE_CHUNK_SIZE
 
-def decodeGameData(encodedGameData: bytes, game: Game, decodeLengthLimit: int = 0) -> bytes:
+def decodeGameData(encodedGameData: bytes, game: Game, decodeLengthLimit: int = 0) -> bytearray:
 	if game == Game.THIMBLEWEED_PARK:
 		return _decodeThimbleweedParkGamedata(encodedGameData, decodeLengthLimit)
 	elif game == Game.DELORES:
@@ -25,7 +38,18 @@ def decodeGameData(encodedGameData: bytes, game: Game, decodeLengthLimit: int =
 		return _decodeRtmiGameData(encodedGameData, decodeLengthLimit)
 	raise NotImplementedError(f"Decoding for the game '{game}' is not implemented")
 
-def _decodeThimbleweedParkGamedata(encodedGameData: bytes, decodeLengthLimit: int = 0) -> bytes:
+def encodeGameData(decodedGameData: bytes, game: Game) -> bytearray:
+	"""Encodes the provided data so that the provided game can read it. This is the reverse of 'decodeGameData'"""
+	return GameDataCodec.encodeGameDataRange(decodedGameData, game, len(decodedGameData), 0)
+
+def _verifyEncodedGameData(decodedGameData: bytes, encodedGameData: bytes, game: Game) -> bool:
+	"""Check whether decoding the provided encoded data results in the original decoded data again"""
+	return decodeGameData(encodedGameData, game) == decodedGameData
+
+def _decodeThimbleweedParkGamedata(encodedGameData: bytes, decodeLengthLimit: int = 0) -> bytearray:
+	if GameDataCodec.IS_AVAILABLE:
+		return GameDataCodec.decodeThimbleweedParkGameData(encodedGameData, decodeLengthLimit)
+	# NumPy isn't available, fall back to decoding byte by byte
 	# From https://github.com/bgbennyboy/Dinky-Explorer/blob/master/ThimbleweedLibrary/UnbreakableXOR.cs#L59
 	encodedGameDataLength = len(encodedGameData)
 	decodedByteArray = bytearray(encodedGameDataLength)
@@ -41,9 +65,12 @@ def _decodeThimbleweedParkGamedata(encodedGameData: bytes, decodeLengthLimit: in
 	for index in range(5, indexLimit - 1, 16):
 		decodedByteArray[index] = decodedByteArray[index] ^ Keys.THIMBLEWEED_PARK_EXTRA_DECODE_NUMBER
 		decodedByteArray[index + 1] = decodedByteArray[index + 1] ^ Keys.THIMBLEWEED_PARK_EXTRA_DECODE_NUMBER
-	return bytes(decodedByteArray)
+	return decodedByteArray
 
-def _decodeDeloresGameData(encodedGameData: bytes, decodeLengthLimit: int = 0) -> bytes:
+def _decodeDeloresGameData(encodedGameData: bytes, decodeLengthLimit: int = 0) -> bytearray:
+	if GameDataCodec.IS_AVAILABLE:
+		return GameDataCodec.decodeDeloresGameData(encodedGameData, decodeLengthLimit)
+	# NumPy isn't available, fall back to decoding byte by byte
 	# From https://github.com/fzipp/gg/blob/main/crypt/xor/twp/decode.go and https://github.com/bgbennyboy/Dinky-Explorer/blob/master/ThimbleweedLibrary/UnbreakableXOR.cs#L59
 	encodedGameDataLength = len(encodedGameData)
 	decodedByteArray = bytearray(encodedGameDataLength)
@@ -54,10 +81,13 @@ def _decodeDeloresGameData(encodedGameData: bytes, decodeLengthLimit: int = 0) -
 		decodedByte = (decodedByte ^ decodeSum) & 255
 		decodedByteArray[index] = encodedGameData[index] ^ decodedByte
 		decodeSum = decodeSum ^ decodedByteArray[index]
-	return bytes(decodedByteArray)
+	return decodedByteArray
 
-def _decodeRtmiGameData(encodedGameData: bytes, decodeLengthLimit: int = 0) -> bytes:
+def _decodeRtmiGameData(encodedGameData: bytes, decodeLengthLimit: int = 0) -> bytearray:
 	"""Decodes the provided encoded game data into something parseable"""
+	if GameDataCodec.IS_AVAILABLE:
+		return GameDataCodec.decodeRtmiGameData(encodedGameData, decodeLengthLimit)
+	# NumPy isn't available, fall back to decoding byte by byte
 	# From https://github.com/bgbennyboy/Thimbleweed-Park-Explorer/blob/master/ThimbleweedLibrary/BundleReader_ggpack.cs#L627
 	encodedGameDataLength = len(encodedGameData)
 	decodedByteArray = bytearray(encodedGameDataLength)
@@ -67,9 +97,36 @@ def _decodeRtmiGameData(encodedGameData: bytes, decodeLengthLimit: int = 0) -> b
 		key2decodeByte = Keys.RTMI_KEY_2[decodeSum]
 		decodedByteArray[index] = (encodedGameData[index] ^ key1decodeByte ^ key2decodeByte)
 		decodeSum = (decodeSum + Keys.RTMI_KEY_1[decodeSum & 0xFF]) & 0xFFFF
-	return bytes(decodedByteArray)
+	return decodedByteArray
+
+def getFileIndex(gameFilePath: str, shouldUseCache: bool = False) -> Dict:
+	"""
+	Read, decode, and parse the file index of the provided ggpack
+	:param gameFilePath: The path to the ggpack to get the file index of
+	:param shouldUseCache: If True, a cached file index is returned if the ggpack didn't change since it was cached. Otherwise, or if there was no valid cached file index, the read file index is stored in the cache
+	:return: The file index, a dict with the entries under the 'files' key
+	"""
+	fileIndex = _getFileIndex(gameFilePath, shouldUseCache)
+	return fileIndex.toFileIndex() if isinstance(fileIndex, FileIndexColumns) else fileIndex
 
-def getFileIndex(gameFilePath: str) -> Dict:
+def getFileIndexColumns(gameFilePath: str, shouldUseCache: bool = False) -> FileIndexColumns:
+	"""
+	Get the file index of the provided ggpack like 'getFileIndex' does, but with the entries stored as columns. This skips creating a dict for each entry, and the columns are a lot cheaper to send to another process
+	:param gameFilePath: The path to the ggpack to get the file index of
+	:param shouldUseCache: Whether the file index can be loaded from and stored in the file index cache. See 'getFileIndex'
+	:return: The entries of the file index
+	"""
+	fileIndex = _getFileIndex(gameFilePath, shouldUseCache)
+	return fileIndex if isinstance(fileIndex, FileIndexColumns) else FileIndexColumns.fromFileIndex(fileIndex)
+
+def _getFileIndex(gameFilePath: str, shouldUseCache: bool) -> Union[Dict, FileIndexColumns]:
+	"""Get the file index of the provided ggpack as columns, or as the dict that 'GGDictParser.fromGgDict' returns if the file index doesn't have the usual layout"""
+	if shouldUseCache:
+		# Get the state of the ggpack before reading it, so that if it changes while it's being read, the cache doesn't store an outdated file index
+		packKey = FileIndexCache.getPackKey(gameFilePath)
+		cachedFileIndexColumns = FileIndexCache.loadFileIndexColumns(gameFilePath, packKey)
+		if cachedFileIndexColumns is not None:
+			return cachedFileIndexColumns
 	with open(gameFilePath, 'rb') as gameFile:
 		fileSize = os.path.getsize(gameFilePath)
 		dataOffset = Utils.readInt(gameFile)
@@ -82,20 +139,209 @@ def getFileIndex(gameFilePath: str) -> Dict:
 		encodedFileIndex = gameFile.read(dataSize)
 	game: Game = Game.ggpackPathToGameName(gameFilePath)
 	decodedFileIndex = decodeGameData(encodedFileIndex, game)
-	gameFileIndex = GGDictParser.fromGgDict(decodedFileIndex, game)
+	gameFileIndex = GGDictParser.fromGgDictFileIndex(decodedFileIndex, game)
+	if gameFileIndex is None:
+		# The file index doesn't have the usual layout, so parse it the generic way
+		gameFileIndex = GGDictParser.fromGgDict(decodedFileIndex, game)
+	if shouldUseCache:
+		FileIndexCache.storeFileIndex(gameFilePath, gameFileIndex, packKey)
 	return gameFileIndex
 
-def getPackedFile(fileEntry: FileEntry) -> bytes:
-	with open(fileEntry.packFilePath, 'rb') as gameFile:
-		gameFile.seek(fileEntry.offset)
-		encodedFileData = gameFile.read(fileEntry.size)
+def getFileIndexes(gameFilePaths: List[str], shouldUseCache: bool = False, maxWorkerCount: int = None) -> Dict[str, Union[FileIndexColumns, BaseException]]:
+	"""
+	Get the file indexes of multiple ggpacks at once. Reading, decoding, and parsing the file indexes is spread over multiple processes, so loading takes about as long as the largest ggpack takes, instead of as long as all ggpacks together
+	:param gameFilePaths: The paths to the ggpacks to get the file indexes of
+	:param shouldUseCache: Whether the file indexes can be loaded from and stored in the file index cache. See 'getFileIndex'
+	:param maxWorkerCount: The maximum number of processes to use. If this is None, the number of CPU cores is used
+	:return: A dict with the ggpack paths as keys, in the provided order, and as values either the file index of that ggpack as columns, as returned by 'getFileIndexColumns', or the error that occurred while loading it
+	"""
+	# The ggpacks are being (re)loaded, so this is when maps of ggpacks that changed on disk, for instance by a game update, should stop being used
+	MappedPackFile.closeOutdatedMappedPackFiles()
+	gameFilePathToFileIndex: Dict[str, Union[None, FileIndexColumns, BaseException]] = {gameFilePath: None for gameFilePath in gameFilePaths}
+	if shouldUseCache:
+		# Cached file indexes load a lot faster than starting a process, so only the ggpacks without a valid cache need parsing
+		for gameFilePath in gameFilePaths:
+			try:
+				gameFilePathToFileIndex[gameFilePath] = FileIndexCache.loadFileIndexColumns(gameFilePath)
+			except Exception as e:
+				gameFilePathToFileIndex[gameFilePath] = e
+	gameFilePathsToParse = [gameFilePath for gameFilePath, fileIndex in gameFilePathToFileIndex.items() if fileIndex is None]
+	if len(gameFilePathsToParse) == 1:
+		# Starting a process for a single ggpack would only slow things down
+		try:
+			gameFilePathToFileIndex[gameFilePathsToParse[0]] = getFileIndexColumns(gameFilePathsToParse[0], shouldUseCache)
+		except Exception as e:
+			gameFilePathToFileIndex[gameFilePathsToParse[0]] = e
+	elif gameFilePathsToParse:
+		with concurrent.futures.ProcessPoolExecutor(min(len(gameFilePathsToParse), maxWorkerCount or os.cpu_count() or 1)) as pool:
+			futureToGameFilePath: Dict[concurrent.futures.Future, str] = {pool.submit(getFileIndexColumns, gameFilePath, shouldUseCache): gameFilePath for gameFilePath in gameFilePathsToParse}
+			for completedFuture in concurrent.futures.as_completed(futureToGameFilePath):
+				gameFilePathToFileIndex[futureToGameFilePath[completedFuture]] = completedFuture.exception() or completedFuture.result()
+	return gameFilePathToFileIndex
+
+def getFileEntryIndex(gameFilePaths: List[str], shouldUseCache: bool = False, maxWorkerCount: int = None) -> FileEntryIndex:
+	"""
+	Load the file indexes of the provided ggpacks into one table and index their filenames, so batch tools can look up entries by name, extension, prefix, or pattern without going through every entry. See 'FileEntryIndex'
+	:param gameFilePaths: The paths to the ggpacks to load. Their rows are added to the table in this order
+	:param shouldUseCache: Whether the file indexes can be loaded from and stored in the file index cache. See 'getFileIndexes'
+	:param maxWorkerCount: The maximum number of processes to load the file indexes with. See 'getFileIndexes'
+	:return: The index over the entries of all the provided ggpacks. Its table is available as 'fileEntryTable'
+	"""
+	fileEntryTable = FileEntryTable()
+	for gameFilePath, fileIndex in getFileIndexes(gameFilePaths, shouldUseCache, maxWorkerCount).items():
+		if isinstance(fileIndex, BaseException):
+			raise DecodeError(f"Unable to load the file index of '{gameFilePath}' to index it: {fileIndex}") from fileIndex
+		fileEntryTable.addFileIndex(gameFilePath, fileIndex)
+	return FileEntryIndex(fileEntryTable)
+
+def getContentHashes(gameFilePath: str, shouldUseCache: bool = False, maxWorkerCount: int = None) -> ContentHashes:
+	"""
+	Hash the encoded and the decoded data of every entry in the provided ggpack. Entries get hashed by multiple processes at once, in jobs of about 'HASH_JOB_SIZE' bytes
+	:param gameFilePath: The path to the ggpack to hash the entries of
+	:param shouldUseCache: If True, cached content hashes are returned if the ggpack didn't change since they were stored. Otherwise, or if there were no valid cached content hashes, the calculated content hashes are stored alongside the cached file index
+	:param maxWorkerCount: The maximum number of processes to hash entries with. If this is None, the number of CPU cores is used. If this is 1, everything gets hashed in this process
+	:return: The content hashes, in the same order as the entries that 'getFileIndexColumns' returns
+	"""
+	packKey = None
+	if shouldUseCache:
+		packKey = FileIndexCache.getPackKey(gameFilePath)
+		cachedContentHashes = FileIndexCache.loadContentHashes(gameFilePath, packKey)
+		if cachedContentHashes is not None:
+			return cachedContentHashes
+	fileIndex = getFileIndexColumns(gameFilePath, shouldUseCache)
+	hashJobs = _groupHashJobs(fileIndex.sizes)
+	hashJobArguments = [(gameFilePath, fileIndex.filenames[hashJob.start:hashJob.stop], fileIndex.offsets[hashJob.start:hashJob.stop], fileIndex.sizes[hashJob.start:hashJob.stop]) for hashJob in hashJobs]
+	workerCount = min(len(hashJobs), maxWorkerCount or os.cpu_count() or 1)
+	if workerCount <= 1:
+		# Starting worker processes would only slow things down
+		hashJobResults = [_hashPackedFiles(*hashJobArgument) for hashJobArgument in hashJobArguments]
+	else:
+		with concurrent.futures.ProcessPoolExecutor(workerCount) as pool:
+			hashJobResults = list(pool.map(_hashPackedFiles, *zip(*hashJobArguments)))
+	contentHashes = ContentHashes([], [])
+	for encodedHashes, decodedHashes in hashJobResults:
+		contentHashes.encodedHashes.extend(encodedHashes)
+		contentHashes.decodedHashes.extend(decodedHashes)
+	if shouldUseCache:
+		FileIndexCache.storeContentHashes(gameFilePath, contentHashes, packKey)
+	return contentHashes
+
+def _groupHashJobs(entrySizes: Iterable[int]) -> List[range]:
+	"""Group consecutive entries into jobs of about 'HASH_JOB_SIZE' bytes. Returns the indexes of the entries in each job"""
+	hashJobs: List[range] = []
+	hashJobStartIndex = 0
+	hashJobSize = 0
+	for entryIndex, entrySize in enumerate(entrySizes):
+		if entryIndex > hashJobStartIndex and hashJobSize + entrySize > HASH_JOB_SIZE:
+			hashJobs.append(range(hashJobStartIndex, entryIndex))
+			hashJobStartIndex = entryIndex
+			hashJobSize = 0
+		hashJobSize += entrySize
+	if hashJobStartIndex < len(entrySizes):
+		hashJobs.append(range(hashJobStartIndex, len(entrySizes)))
+	return hashJobs
+
+def _hashPackedFiles(gameFilePath: str, filenames: List[str], offsets: Iterable[int], sizes: Iterable[int]) -> Tuple[List[bytes], List[bytes]]:
+	"""Hash the provided entries of the provided ggpack with 'hashPackedFile'. This runs in a worker process, so only the columns of the entries get sent, and only the hashes get sent back"""
+	MappedPackFile.getMappedPackFile(gameFilePath).adviseSequentialAccess()
+	# Put the entries of the job in a single table, instead of creating a separate entry for each of them
+	fileEntryTable = FileEntryTable()
+	fileEntryTable.addFileIndex(gameFilePath, FileIndexColumns(filenames, offsets, sizes, None))
+	encodedHashes: List[bytes] = []
+	decodedHashes: List[bytes] = []
+	for fileEntry in fileEntryTable:
+		encodedHash, decodedHash = hashPackedFile(fileEntry)
+		encodedHashes.append(encodedHash)
+		decodedHashes.append(decodedHash)
+	return encodedHashes, decodedHashes
+
+def findDuplicateFileEntries(gameFilePaths: List[str], shouldUseCache: bool = False, maxWorkerCount: int = None) -> List[List[FileEntry]]:
+	"""
+	Find the entries that hold the same data, in one ggpack or across multiple ggpacks, whether they have the same filename or not
+	:param gameFilePaths: The paths to the ggpacks to search
+	:param shouldUseCache: Whether file indexes and content hashes can be loaded from and stored in the cache. See 'getContentHashes'
+	:param maxWorkerCount: The maximum number of processes to hash entries with. See 'getContentHashes'
+	:return: Groups of entries with the same decoded data, each with at least two entries. The groups that waste the most space come first
+	"""
+	fileEntryTable = FileEntryTable()
+	contentKeyToRowIndexes: Dict[Tuple[int, bytes], List[int]] = {}
+	for gameFilePath in gameFilePaths:
+		contentHashes = getContentHashes(gameFilePath, shouldUseCache, maxWorkerCount)
+		rowIndexes = fileEntryTable.addFileIndex(gameFilePath, getFileIndexColumns(gameFilePath, shouldUseCache))
+		for rowIndex, decodedHash in zip(rowIndexes, contentHashes.decodedHashes):
+			# Empty entries are all the same, but they don't waste any space
+			if fileEntryTable.getSize(rowIndex) > 0:
+				contentKeyToRowIndexes.setdefault((fileEntryTable.getSize(rowIndex), decodedHash), []).append(rowIndex)
+	duplicateFileEntryGroups = [[fileEntryTable[rowIndex] for rowIndex in rowIndexes] for rowIndexes in contentKeyToRowIndexes.values() if len(rowIndexes) > 1]
+	duplicateFileEntryGroups.sort(key=lambda fileEntryGroup: fileEntryGroup[0].size * (len(fileEntryGroup) - 1), reverse=True)
+	return duplicateFileEntryGroups
+
+def getPackedFile(fileEntry: FileEntry) -> bytearray:
+	# Copy the entry out of the shared map of the ggpack into a buffer of its own and decode it there, so the data is only copied once
+	with MappedPackFile.getMappedPackFile(fileEntry.packFilePath).getRange(fileEntry.offset, fileEntry.size) as encodedFileData:
+		fileData = bytearray(encodedFileData)
 	if fileEntry.fileExtension == '.assets.bank':
 		# sound bank files aren't encoded
-		return encodedFileData
+		return fileData
 	else:
-		return decodeGameData(encodedFileData, fileEntry.game)
+		return GameDataCodec.decodeGameDataInPlace(fileData, fileEntry.game, fileEntry.size)
 
-def getConvertedPackedFile(fileEntry: FileEntry) -> Union[bytes, Dict, fsb5.FSB5, List, Image.Image, str]:
+def iteratePackedFileChunks(fileEntry: FileEntry, chunkSize: int = DECODE_CHUNK_SIZE) -> Iterator[bytearray]:
+	"""
+	Read and decode the provided file entry in chunks, so that even very large entries don't need to be in memory all at once
+	:param fileEntry: The file entry to read
+	:param chunkSize: The maximum size of each chunk
+	:return: A generator that yields the decoded chunks in order. Joined together they're the same as what 'getPackedFile' returns
+	"""
+	mappedPackFile = MappedPackFile.getMappedPackFile(fileEntry.packFilePath)
+	for startIndex in range(0, fileEntry.size, chunkSize):
+		with mappedPackFile.getRange(fileEntry.offset + startIndex, min(chunkSize, fileEntry.size - startIndex)) as encodedChunk:
+			chunk = bytearray(encodedChunk)
+		if fileEntry.fileExtension != '.assets.bank':
+			# sound bank files aren't encoded. Thimbleweed Park and Delores need the last encoded byte of the previous chunk to decode this chunk
+			GameDataCodec.decodeGameDataInPlace(chunk, fileEntry.game, fileEntry.size, startIndex, mappedPackFile[fileEntry.offset + startIndex - 1] if startIndex > 0 else None)
+		yield chunk
+
+def hashPackedFile(fileEntry: FileEntry) -> Tuple[bytes, bytes]:
+	"""
+	Hash the encoded data of the provided file entry as it's stored in its ggpack, and its decoded data, in chunks so that even very large entries don't need to be in memory all at once
+	:param fileEntry: The file entry to hash
+	:return: The hash of the encoded data and the hash of the decoded data, see 'ContentHashes'
+	"""
+	encodedHash = ContentHashes.createHash()
+	decodedHash = ContentHashes.createHash()
+	# sound bank files aren't encoded
+	shouldDecode = fileEntry.fileExtension != '.assets.bank'
+	mappedPackFile = MappedPackFile.getMappedPackFile(fileEntry.packFilePath)
+	for startIndex in range(0, fileEntry.size, DECODE_CHUNK_SIZE):
+		with mappedPackFile.getRange(fileEntry.offset + startIndex, min(DECODE_CHUNK_SIZE, fileEntry.size - startIndex)) as encodedChunk:
+			encodedHash.update(encodedChunk)
+			if not shouldDecode:
+				decodedHash.update(encodedChunk)
+				continue
+			chunk = bytearray(encodedChunk)
+		decodedHash.update(GameDataCodec.decodeGameDataInPlace(chunk, fileEntry.game, fileEntry.size, startIndex, mappedPackFile[fileEntry.offset + startIndex - 1] if startIndex > 0 else None))
+	return encodedHash.digest(), decodedHash.digest()
+
+def openPackedFile(fileEntry: FileEntry) -> PackedFileReader:
+	"""Open the provided file entry as a seekable file-like object, that only reads and decodes the parts of the entry that are actually read. Close it when done, or use it in a 'with' statement"""
+	return PackedFileReader(fileEntry)
+
+def _readPackedFileRange(fileEntry: FileEntry, startIndex: int, length: int) -> bytearray:
+	with openPackedFile(fileEntry) as packedFile:
+		return packedFile.readRange(startIndex, length)
+
+def getConvertedPackedFile(fileEntry: FileEntry) -> Union[bytearray, Dict, fsb5.FSB5, List, Image.Image, str]:
+	if fileEntry.fileExtension in ('.ktx', '.ktxbz'):
+		# Compressed image, return it as a Pillow image. Only the first detail level is shown, so let the parser read only what it needs
+		with openPackedFile(fileEntry) as ktxFile:
+			return KtxParser.fromKtx(ktxFile, fileEntry.filename, 1)[0]
+	elif fileEntry.fileExtension == '.assets.bank':
+		# Music bank file. Only read the header to list the samples, the samples themselves get read when they're needed
+		return BankParser.LazySoundbank(functools.partial(_readPackedFileRange, fileEntry), fileEntry.size, fileEntry.game)
+	elif fileEntry.fileExtension == '.png':
+		# Basic image, return it as a Pillow image. Pillow reads the whole image anyway, so decode the entry in one go instead of in many small reads
+		return Image.open(io.BytesIO(getPackedFile(fileEntry)))
 	fileData = getPackedFile(fileEntry)
 	# All extensions and their counts:
 	# - Thimbleweed Park: .bnut: 187, .byack: 118, .fnt: 32, .json: 421, .lip: 14,294, .nut: 1, .ogg: 17,272, .png: 566, .tsv: 6, .txt: 42, .wav: 644, .wimpy: 163,
@@ -113,7 +359,10 @@ def getConvertedPackedFile(fileEntry: FileEntry) -> Union[bytes, Dict, fsb5.FSB5
 		if fileData.startswith(GGDictParser.HEADER):
 			return GGDictParser.fromGgDict(fileData, fileEntry.game)
 		elif fileData[0] == 0x7B:  # 0x7B is the ASCII code for '{', which a plain JSON file starts with
-			return json.loads(fileData.rstrip(b'\x07'))  # Some Thimbleweed Park JSONs end with an extra \x07 byte, remove it before parsing
+			# Some Thimbleweed Park JSONs end with an extra \x07 byte, remove it before parsing. Removing bytes from the end of a bytearray doesn't copy it
+			while fileData[-1] == 0x07:
+				del fileData[-1]
+			return json.loads(fileData)
 		else:
 			return fileData.decode('utf-8')
 	elif fileEntry.fileExtension == '.dink':
@@ -126,12 +375,6 @@ def getConvertedPackedFile(fileEntry: FileEntry) -> Union[bytes, Dict, fsb5.FSB5
 		if fileEntry.game == Game.RETURN_TO_MONKEY_ISLAND:
 			return "\n\n".join(YackParser.fromYack(fileData, fileEntry.filename))
 		return fileData.decode('utf-8')
-	elif fileEntry.fileExtension in ('.ktx', '.ktxbz'):
-		# Compressed image, return it as a Pillow image
-		return KtxParser.fromKtx(fileData, fileEntry.filename, 1)[0]
-	elif fileEntry.fileExtension == '.png':
-		# Basic image, return it as a Pillow image
-		return Image.open(io.BytesIO(fileData))
 	elif fileEntry.fileExtension == '.tsv':
 		# Tab-separated file, return it as a list of lists of strings
 		table: List[List[str]] = []
@@ -146,50 +389,344 @@ def getConvertedPackedFile(fileEntry: FileEntry) -> Union[bytes, Dict, fsb5.FSB5
 	elif fileEntry.fileExtension in ('.ogg', '.wav'):
 		# Sound data, return them as they are
 		return fileData
-	elif fileEntry.fileExtension == '.assets.bank':
-		# Music bank file, no need to convert anything
-		return BankParser.fromBytesToBank(fileData, fileEntry.game)
 	print(f"Unknown/unsupported file extension '{fileEntry.fileExtension}' for file entry '{fileEntry}'")
 	return fileData
 
-def createPackFile(filenamesToPack: Union[List[str], Tuple[str]], packFilename: str, targetGame: Game):
-	"""Pack the files from the provided filenames into a ggpack that the game can recognise"""
+def createPackFile(filenamesToPack: Union[List[str], Tuple[str]], packFilename: str, targetGame: Game, shouldVerifyEncoding: bool = False, maxWorkerCount: int = None,
+				   shouldOptimizeLayout: bool = False, shouldAlignLargeEntries: bool = False) -> Union[None, PackLayout.PackLayoutReport]:
+	"""
+	Pack the files from the provided filenames into a ggpack that the game can recognise
+	Files get encoded by multiple processes at once, and are written in a fixed order, so the ggpack is the same however many processes are used
+	Memory usage is limited to the encoded files that are waiting to be written, and large files get encoded and written to disk in chunks, so it doesn't depend on how large the files or the ggpack are
+	:param filenamesToPack: The paths of the files to pack
+	:param packFilename: The path of the ggpack to create
+	:param targetGame: The game that the ggpack is for, which determines how the data is encoded
+	:param shouldVerifyEncoding: If True, all encoded data gets decoded again and compared to the original data, and a PackingError is raised if they differ
+	:param maxWorkerCount: The maximum number of processes to encode files with. If this is None, the number of CPU cores is used. If this is 1, everything gets encoded in this process
+	:param shouldOptimizeLayout: If True, the files are stored grouped by type and access pattern instead of in the provided order, see 'PackLayout.getOptimizedFileOrder'
+	:param shouldAlignLargeEntries: If True, large files are stored at page boundaries, which makes reading them through a memory map touch fewer pages, at the cost of some padding
+	:return: If the layout was optimized or large entries were aligned, a report of the expected read locality of the created ggpack, otherwise None
+	"""
 	print(f"Creating pack file '{packFilename}' with {len(filenamesToPack):,} file(s)")
-	packHeaderSize = 8  # A pack file starts with two ints, so take that into account when storing offsets
-	fileOffsetsDict = {"files": [], "guid": _FILE_INDEX_GUID}
-	# First collect the data we need
-	encodedFilesData = bytearray()
+	# Check all the files first, so a missing file doesn't get noticed halfway through writing the ggpack
 	for filenameToPack in filenamesToPack:
 		if not os.path.isfile(filenameToPack):
 			raise PackingError(f"Asked to pack file '{filenameToPack}' but that file doesn't exist")
-		with open(filenameToPack, 'rb') as fileToPack:
-			# .bank files contain music and sounds, and are stored unencoded
-			if filenameToPack.endswith('.assets.bank'):
-				encodedDataToPack = fileToPack.read()
+	if shouldOptimizeLayout:
+		filenamesToPack = PackLayout.getOptimizedFileOrder(filenamesToPack)
+	packHeaderSize = 8  # A pack file starts with two ints, the offset and the size of the file index
+	# Write to a temporary file first, so the ggpack being replaced stays intact if packing fails
+	temporaryPackFilename = f"{packFilename}.{os.getpid()}.tmp"
+	try:
+		with open(temporaryPackFilename, 'wb') as packFile:
+			# Reserve room for the header, it gets filled in once the offset and size of the file index are known
+			packFile.write(bytes(packHeaderSize))
+			fileIndexEntries = _writeEncodedFilesToPack(filenamesToPack, packFile, targetGame, shouldVerifyEncoding, maxWorkerCount or os.cpu_count() or 1, shouldAlignLargeEntries)
+			fileOffsetsDict = {"files": fileIndexEntries, "guid": _FILE_INDEX_GUID}
+
+			fileIndex = GGDictParser.toGgDict(fileOffsetsDict, targetGame)
+			encodedFileIndex = encodeGameData(fileIndex, targetGame)
+			if shouldVerifyEncoding and not _verifyEncodedGameData(fileIndex, encodedFileIndex, targetGame):
+				raise PackingError(f"Encoding the file index for {targetGame.value} didn't survive decoding again")
+			fileIndexOffset = packFile.tell()
+			packFile.write(encodedFileIndex)
+			packFile.seek(0)
+			packFile.write(Utils.toWritableInt(fileIndexOffset))
+			packFile.write(Utils.toWritableInt(len(fileIndex)))
+		# If the ggpack being replaced is mapped, close that map first, since the ggpack can't be changed while it's mapped on some platforms
+		MappedPackFile.closeMappedPackFile(packFilename)
+		os.replace(temporaryPackFilename, packFilename)
+	finally:
+		if os.path.isfile(temporaryPackFilename):
+			os.remove(temporaryPackFilename)
+	if not shouldOptimizeLayout and not shouldAlignLargeEntries:
+		return None
+	packLayoutReport = PackLayout.PackLayoutReport(FileIndexColumns.fromFileIndex(fileOffsetsDict))
+	print(packLayoutReport)
+	return packLayoutReport
+
+def _writeEncodedFilesToPack(filenamesToPack: Union[List[str], Tuple[str]], packFile: BinaryIO, targetGame: Game, shouldVerifyEncoding: bool, workerCount: int, shouldAlignLargeEntries: bool) -> List[Dict]:
+	"""
+	Encode the provided files, using worker processes if there's more than one worker, and write them to the provided ggpack in the provided order
+	If large entries should be aligned, padding gets written before them so they start at a page boundary
+	:return: The file index entries of the written files, in order
+	"""
+	fileIndexEntries: List[Dict] = []
+
+	def writeEncodedFile(filenameToPack: str, encodedFileData: Union[None, bytes]):
+		fileOffset = packFile.tell()
+		if shouldAlignLargeEntries:
+			paddingSize = PackLayout.getAlignmentPaddingSize(fileOffset, os.path.getsize(filenameToPack) if encodedFileData is None else len(encodedFileData))
+			if paddingSize:
+				packFile.write(bytes(paddingSize))
+				fileOffset += paddingSize
+		if encodedFileData is None:
+			fileSize = _writeEncodedFileToPack(filenameToPack, packFile, targetGame, shouldVerifyEncoding)
+		else:
+			packFile.write(encodedFileData)
+			fileSize = len(encodedFileData)
+		fileIndexEntries.append({"filename": os.path.basename(filenameToPack), "offset": fileOffset, "size": fileSize})
+
+	packJobs = _groupPackJobs(filenamesToPack)
+	if workerCount <= 1 or len(packJobs) <= 1:
+		# Starting worker processes would only slow things down
+		for filenameToPack in filenamesToPack:
+			writeEncodedFile(filenameToPack, None)
+		return fileIndexEntries
+	with concurrent.futures.ProcessPoolExecutor(workerCount) as pool:
+		# The jobs that are being encoded or waiting to be written, in order. Large files don't get sent to the workers, they get encoded here in chunks once it's their turn
+		pendingPackJobs: Deque[Tuple[List[str], Union[None, concurrent.futures.Future], int]] = collections.deque()
+		pendingByteCount = 0
+		for packJobFilenames, packJobSize in packJobs:
+			# Write the oldest jobs first if the reorder window is full, so memory usage stays limited
+			while pendingPackJobs and (pendingByteCount + packJobSize > MAX_PACK_BYTES_IN_FLIGHT or len(pendingPackJobs) >= workerCount * 4):
+				pendingByteCount -= _writePackJob(pendingPackJobs.popleft(), writeEncodedFile)
+			if packJobSize > PACK_JOB_SIZE:
+				pendingPackJobs.append((packJobFilenames, None, 0))
+			else:
+				pendingPackJobs.append((packJobFilenames, pool.submit(_encodeFilesForPack, packJobFilenames, targetGame, shouldVerifyEncoding), packJobSize))
+				pendingByteCount += packJobSize
+		while pendingPackJobs:
+			_writePackJob(pendingPackJobs.popleft(), writeEncodedFile)
+	return fileIndexEntries
+
+def _groupPackJobs(filenamesToPack: Union[List[str], Tuple[str]]) -> List[Tuple[List[str], int]]:
+	"""Group consecutive small files into jobs of about 'PACK_JOB_SIZE' bytes, so they don't need to be sent to the workers one by one. Files larger than that get a job of their own. Returns the filenames and the total size of each job"""
+	packJobs: List[Tuple[List[str], int]] = []
+	packJobFilenames: List[str] = []
+	packJobSize = 0
+	for filenameToPack in filenamesToPack:
+		fileSize = os.path.getsize(filenameToPack)
+		if packJobFilenames and (packJobSize + fileSize > PACK_JOB_SIZE):
+			packJobs.append((packJobFilenames, packJobSize))
+			packJobFilenames = []
+			packJobSize = 0
+		packJobFilenames.append(filenameToPack)
+		packJobSize += fileSize
+	if packJobFilenames:
+		packJobs.append((packJobFilenames, packJobSize))
+	return packJobs
+
+def _writePackJob(pendingPackJob: Tuple[List[str], Union[None, concurrent.futures.Future], int], writeEncodedFile: Callable[[str, Union[None, bytes]], None]) -> int:
+	"""Write the files of a pending job, waiting for its worker to finish encoding them if needed. Returns the size of the job, so it can be removed from the reorder window"""
+	packJobFilenames, packJobFuture, packJobSize = pendingPackJob
+	encodedFilesData = packJobFuture.result() if packJobFuture else [None] * len(packJobFilenames)
+	for filenameToPack, encodedFileData in zip(packJobFilenames, encodedFilesData):
+		writeEncodedFile(filenameToPack, encodedFileData)
+	return packJobSize
+
+def _encodeFilesForPack(filenamesToPack: List[str], targetGame: Game, shouldVerifyEncoding: bool) -> List[bytes]:
+	"""Encode the provided files for a ggpack. This runs in a worker process, so the encoded data gets sent back to be written"""
+	encodedFilesData: List[bytes] = []
+	for filenameToPack in filenamesToPack:
+		with io.BytesIO() as encodedFile:
+			_writeEncodedFileToPack(filenameToPack, encodedFile, targetGame, shouldVerifyEncoding)
+			encodedFilesData.append(encodedFile.getvalue())
+	return encodedFilesData
+
+def _writeEncodedFileToPack(filenameToPack: str, packFile: BinaryIO, targetGame: Game, shouldVerifyEncoding: bool) -> int:
+	"""
+	Encode the provided file and write it to the current position in the provided ggpack, one chunk at a time
+	:return: The number of bytes written, which is also the size of the file
+	"""
+	with open(filenameToPack, 'rb') as fileToPack:
+		# Encoding depends on the length of the whole file, so that needs to be known before the first chunk gets encoded
+		fileSize = os.fstat(fileToPack.fileno()).st_size
+		# .bank files contain music and sounds, and are stored unencoded
+		shouldEncode = not filenameToPack.endswith('.assets.bank')
+		chunk = bytearray(min(fileSize, DECODE_CHUNK_SIZE))
+		previousEncodedByte: Union[None, int] = None
+		for startIndex in range(0, fileSize, DECODE_CHUNK_SIZE):
+			chunkView = memoryview(chunk)[:min(DECODE_CHUNK_SIZE, fileSize - startIndex)]
+			if fileToPack.readinto(chunkView) != len(chunkView):
+				raise PackingError(f"File '{filenameToPack}' got smaller while it was being packed")
+			if shouldEncode:
+				decodedChunk = bytes(chunkView) if shouldVerifyEncoding else None
+				GameDataCodec.encodeGameDataInPlace(chunkView, targetGame, fileSize, startIndex, previousEncodedByte)
+				if shouldVerifyEncoding and GameDataCodec.decodeGameDataRange(chunkView, targetGame, fileSize, startIndex, previousEncodedByte) != decodedChunk:
+					raise PackingError(f"Encoding file '{filenameToPack}' for {targetGame.value} didn't survive decoding again")
+				# Thimbleweed Park and Delores need the last encoded byte of a chunk to encode the next chunk
+				previousEncodedByte = chunkView[-1]
+			packFile.write(chunkView)
+			chunkView.release()
+		if fileToPack.read(1):
+			raise PackingError(f"File '{filenameToPack}' got larger while it was being packed")
+	return fileSize
+
+def patchPackFile(filenamesToPatch: Union[List[str], Tuple[str]], packFilename: str, shouldVerifyEncoding: bool = False):
+	"""
+	Replace or add the provided files in an existing ggpack, without rewriting the whole ggpack like 'createPackFile' does
+	A file that fits in the space of the entry it replaces gets written over that entry, other files get added after the old file index, and then only the file index and header get rewritten. So patching takes time depending on the size of the patched files, not on the size of the ggpack
+	Files that get written over their old entry are encoded, and verified if that's requested, before anything is written over, and the header only points to the new file index at the very end. So if patching raises an error, the ggpack still has its old contents. An interrupted patch can still leave it broken though, so keep a backup of ggpacks that can't easily be recreated
+	:param filenamesToPatch: The paths of the files to put in the ggpack. Each file replaces the entry with the same filename, or gets added as a new entry if there's no such entry yet
+	:param packFilename: The path of the ggpack to patch. The game is determined from this path, since the patched files need to be encoded the same way as the rest of the ggpack
+	:param shouldVerifyEncoding: If True, all encoded data gets decoded again and compared to the original data, and a PackingError is raised if they differ
+	"""
+	print(f"Patching pack file '{packFilename}' with {len(filenamesToPatch):,} file(s)")
+	for filenameToPatch in filenamesToPatch:
+		if not os.path.isfile(filenameToPatch):
+			raise PackingError(f"Asked to patch file '{filenameToPatch}' into a ggpack but that file doesn't exist")
+	targetGame: Game = Game.ggpackPathToGameName(packFilename)
+	fileIndex = getFileIndex(packFilename)
+	filenameToFileIndexEntry: Dict[str, Dict] = {fileIndexEntry['filename']: fileIndexEntry for fileIndexEntry in fileIndex['files']}
+	exclusiveFileIndexEntryIds = _getExclusiveFileIndexEntryIds(fileIndex['files'])
+	# If the ggpack is mapped, close that map first, since the ggpack can't be changed while it's mapped on some platforms
+	MappedPackFile.closeMappedPackFile(packFilename)
+	with open(packFilename, 'r+b') as packFile:
+		fileIndexOffset = Utils.readInt(packFile)
+		fileIndexSize = Utils.readInt(packFile)
+		# New data goes after the old file index, so the old header and file index stay valid until the header gets rewritten at the end
+		appendOffset = max([fileIndexOffset + fileIndexSize] + [fileIndexEntry['offset'] + fileIndexEntry['size'] for fileIndexEntry in fileIndex['files']])
+		# The offset and encoded data of each file that gets written over its old entry. These only get written once all of them are encoded
+		inPlaceFileWrites: List[Tuple[int, bytes]] = []
+		for filenameToPatch in filenamesToPatch:
+			filename = os.path.basename(filenameToPatch)
+			fileSize = os.path.getsize(filenameToPatch)
+			fileIndexEntry = filenameToFileIndexEntry.get(filename, None)
+			if fileIndexEntry is None:
+				fileIndexEntry = {"filename": filename, "offset": appendOffset, "size": 0}
+				fileIndex['files'].append(fileIndexEntry)
+				filenameToFileIndexEntry[filename] = fileIndexEntry
+			elif fileSize <= fileIndexEntry['size'] and id(fileIndexEntry) in exclusiveFileIndexEntryIds:
+				# The new data fits in the space of the old data, and no other entry uses that space, so it can be overwritten
+				encodedFileData = _encodeFilesForPack([filenameToPatch], targetGame, shouldVerifyEncoding)[0]
+				if len(encodedFileData) != fileSize:
+					raise PackingError(f"File '{filenameToPatch}' changed size while it was being patched into '{packFilename}'")
+				inPlaceFileWrites.append((fileIndexEntry['offset'], encodedFileData))
+				fileIndexEntry['size'] = fileSize
+				continue
+			fileIndexEntry['offset'] = appendOffset
+			appendOffset += fileSize
+			# Once moved, an entry owns its new space, so patching it again in the same call can overwrite it
+			exclusiveFileIndexEntryIds.add(id(fileIndexEntry))
+			packFile.seek(fileIndexEntry['offset'])
+			if _writeEncodedFileToPack(filenameToPatch, packFile, targetGame, shouldVerifyEncoding) != fileSize:
+				raise PackingError(f"File '{filenameToPatch}' changed size while it was being patched into '{packFilename}'")
+			fileIndexEntry['size'] = fileSize
+
+		fileIndexData = GGDictParser.toGgDict(fileIndex, targetGame)
+		encodedFileIndex = encodeGameData(fileIndexData, targetGame)
+		if shouldVerifyEncoding and not _verifyEncodedGameData(fileIndexData, encodedFileIndex, targetGame):
+			raise PackingError(f"Encoding the file index for {targetGame.value} didn't survive decoding again")
+		for inPlaceOffset, encodedFileData in inPlaceFileWrites:
+			packFile.seek(inPlaceOffset)
+			packFile.write(encodedFileData)
+		packFile.seek(appendOffset)
+		packFile.write(encodedFileIndex)
+		# The new file index can be smaller than the old one, so remove anything that's left after it
+		packFile.truncate()
+		packFile.seek(0)
+		packFile.write(Utils.toWritableInt(appendOffset))
+		packFile.write(Utils.toWritableInt(len(fileIndexData)))
+	print(f"Patched {len(filenamesToPatch):,} file(s) into '{packFilename}', {len(inPlaceFileWrites):,} of them in place")
+
+def _getExclusiveFileIndexEntryIds(fileIndexEntries: List[Dict]) -> set:
+	"""Get the IDs of the file index entries whose data doesn't overlap with the data of any other entry, so their data can be overwritten without affecting other entries"""
+	sortedFileIndexEntries = sorted(fileIndexEntries, key=lambda fileIndexEntry: fileIndexEntry['offset'])
+	exclusiveFileIndexEntryIds = set()
+	previousEntryEnd = 0
+	for entryIndex, fileIndexEntry in enumerate(sortedFileIndexEntries):
+		entryEnd = fileIndexEntry['offset'] + fileIndexEntry['size']
+		nextEntryOffset = sortedFileIndexEntries[entryIndex + 1]['offset'] if entryIndex + 1 < len(sortedFileIndexEntries) else entryEnd
+		if previousEntryEnd <= fileIndexEntry['offset'] and entryEnd <= nextEntryOffset:
+			exclusiveFileIndexEntryIds.add(id(fileIndexEntry))
+		previousEntryEnd = max(previousEntryEnd, entryEnd)
+	return exclusiveFileIndexEntryIds
+
+def verifyPackEncoding(gameFilePath: str) -> List[str]:
+	"""
+	Check that the encoding used when creating pack files exactly matches the provided game's own ggpack, by decoding and re-encoding every entry and the file index, and comparing that with the original encoded data
+	:param gameFilePath: The path to the ggpack file to check
+	:return: A list of the names of the entries that didn't re-encode to their original data. The file index is listed as 'file index'. If everything matched, the list is empty
+	"""
+	game: Game = Game.ggpackPathToGameName(gameFilePath)
+	mismatchedEntryNames: List[str] = []
+	with open(gameFilePath, 'rb') as gameFile:
+		dataOffset = Utils.readInt(gameFile)
+		dataSize = Utils.readInt(gameFile)
+		gameFile.seek(dataOffset)
+		encodedFileIndex = gameFile.read(dataSize)
+		decodedFileIndex = decodeGameData(encodedFileIndex, game)
+		if encodeGameData(decodedFileIndex, game) != encodedFileIndex:
+			mismatchedEntryNames.append('file index')
+		for fileEntryData in GGDictParser.fromGgDict(decodedFileIndex, game)['files']:
+			if fileEntryData['filename'].endswith('.assets.bank'):
+				# Sound banks aren't encoded, so there's nothing to verify
+				continue
+			gameFile.seek(fileEntryData['offset'])
+			encodedFileData = gameFile.read(fileEntryData['size'])
+			if encodeGameData(decodeGameData(encodedFileData, game), game) != encodedFileData:
+				mismatchedEntryNames.append(fileEntryData['filename'])
+	return mismatchedEntryNames
+
+def savePackedFiles(fileEntries: Iterable[FileEntry], savePath: str, shouldConvertData: bool, decodedHashes: List[bytes] = None, shouldHardlinkDuplicates: bool = False) -> List[Union[None, BaseException]]:
+	"""
+	Save multiple file entries with 'savePackedFile'. Sending a compact 'FileEntryTable' with many entries to a worker process is a lot cheaper than sending each entry separately
+	:param decodedHashes: Optionally, the decoded content hash of each entry, in order, as returned by 'getContentHashes'. If provided, entries that get saved as they are, are skipped if an identical file was already saved at their path, for instance by an earlier export
+	:param shouldHardlinkDuplicates: If True and decoded hashes are provided, an entry with the same data as an entry that was saved before it, is saved as a hardlink to that entry's file instead of being written again
+	:return: A list with for each entry, in order, the error that occurred while saving it, or None if saving went fine
+	"""
+	saveErrors: List[Union[None, BaseException]] = []
+	decodedHashToSavedFilePath: Dict[bytes, str] = {}
+	advisedPackFilePaths = set()
+	for fileEntryIndex, fileEntry in enumerate(fileEntries):
+		try:
+			if fileEntry.packFilePath not in advisedPackFilePaths:
+				# Saving usually goes through a lot of entries of the same ggpack, so let the operating system read ahead. Doing that once per ggpack is enough
+				advisedPackFilePaths.add(fileEntry.packFilePath)
+				MappedPackFile.getMappedPackFile(fileEntry.packFilePath).adviseSequentialAccess()
+			if decodedHashes and shouldSaveUnconverted(fileEntry, shouldConvertData):
+				_saveUnconvertedPackedFileByHash(fileEntry, savePath, decodedHashes[fileEntryIndex], decodedHashToSavedFilePath if shouldHardlinkDuplicates else None)
 			else:
-				encodedDataToPack = decodeGameData(fileToPack.read(), targetGame)
-			fileOffsetsDict['files'].append({"filename": os.path.basename(filenameToPack), "offset": packHeaderSize + len(encodedFilesData), "size": len(encodedDataToPack)})
-			encodedFilesData.extend(encodedDataToPack)
-	del encodedDataToPack  # Prevent accidentally using 'encodedDataToPack' instead of 'encodedFilesData' later, and save memory usage
-
-	fileIndex = GGDictParser.toGgDict(fileOffsetsDict, targetGame)
-	with open(packFilename, 'wb') as packFile:
-		# First write the offset to and size of the file index
-		packFile.write(Utils.toWritableInt(packHeaderSize + len(encodedFilesData)))
-		packFile.write(Utils.toWritableInt(len(fileIndex)))
-		# Then write the encoded file data
-		packFile.write(encodedFilesData)
-		# And finally write the file index
-		packFile.write(decodeGameData(fileIndex, targetGame))
+				savePackedFile(fileEntry, savePath, shouldConvertData)
+			saveErrors.append(None)
+		except Exception as e:
+			saveErrors.append(e)
+	return saveErrors
+
+def _saveUnconvertedPackedFileByHash(fileEntry: FileEntry, savePath: str, decodedHash: bytes, decodedHashToSavedFilePath: Union[None, Dict[bytes, str]]):
+	"""Save the provided file entry as it is, unless an identical file already exists at its path. If a dict of saved files is provided, an entry with the same data as a saved file gets hardlinked to that file"""
+	filePath = os.path.join(savePath, fileEntry.filename)
+	if not _isSavedFileIdentical(filePath, fileEntry.size, decodedHash):
+		# Remove the existing file first, otherwise writing to it would also change any files that are hardlinked to it
+		if os.path.isfile(filePath):
+			os.remove(filePath)
+		savedFilePath = decodedHashToSavedFilePath.get(decodedHash, None) if decodedHashToSavedFilePath is not None else None
+		isLinked = False
+		if savedFilePath is not None:
+			try:
+				os.link(savedFilePath, filePath)
+				isLinked = True
+			except OSError:
+				# Not all filesystems support hardlinks, the file then just gets written normally
+				pass
+		if not isLinked:
+			savePackedFile(fileEntry, savePath, False)
+	if decodedHashToSavedFilePath is not None:
+		decodedHashToSavedFilePath.setdefault(decodedHash, filePath)
+
+def _isSavedFileIdentical(filePath: str, fileSize: int, decodedHash: bytes) -> bool:
+	"""Check whether the file at the provided path has the provided size and decoded content hash"""
+	if not os.path.isfile(filePath) or os.path.getsize(filePath) != fileSize:
+		return False
+	savedFileHash = ContentHashes.createHash()
+	with open(filePath, 'rb') as savedFile:
+		for savedFileChunk in iter(functools.partial(savedFile.read, DECODE_CHUNK_SIZE), b''):
+			savedFileHash.update(savedFileChunk)
+	return savedFileHash.digest() == decodedHash
+
+def shouldSaveUnconverted(fileEntry: FileEntry, shouldConvertData: bool) -> bool:
+	"""Check whether 'savePackedFile' saves the provided entry as it is, which is the case if converting isn't wanted or if the entry doesn't need converting"""
+	return not shouldConvertData or fileEntry.fileExtension in ('.ogg', '.otf', '.png', '.tsv', '.ttf', '.txt', '.wav')
 
 def savePackedFile(fileEntry: FileEntry, savePath: str, shouldConvertData: bool):
 	"""Save the provided file entry to the provided path, optionally converted. The savepath should be a folder, the fileEntry's filename will be appended to that path"""
 	filePath = os.path.join(savePath, fileEntry.filename)
 	# Load and possibly convert data
-	if not shouldConvertData or fileEntry.fileExtension in ('.ogg', '.otf', '.png', '.tsv', '.ttf', '.txt', '.wav'):
-		fileData = getPackedFile(fileEntry)
+	if shouldSaveUnconverted(fileEntry, shouldConvertData):
 		with open(filePath, 'wb') as saveFile:
-			saveFile.write(fileData)
+			for fileDataChunk in iteratePackedFileChunks(fileEntry):
+				saveFile.write(fileDataChunk)
 	else:
 		# Convert data
 		if fileEntry.convertedData:
@@ -208,14 +745,15 @@ def savePackedFile(fileEntry: FileEntry, savePath: str, shouldConvertData: bool)
 		elif isinstance(fileData, Image.Image):
 			filePath += '.png'
 		elif isinstance(fileData, fsb5.FSB5):
-			fileData = BankParser.fromBankToBytesDict(fileData)
+			# Convert the samples one by one while saving, so only one sample needs to be in memory at a time
+			fileData = BankParser.iterateBankSamples(fileData)
 
 		# Save data
 		if isinstance(fileData, Image.Image):
 			fileData.save(filePath)
-		elif isinstance(fileData, dict):
-			# A dict is presumed to have filenames as keys and the file data for ach file as values. Save each in the selected folder
-			for subfilename, subfilebytes in fileData.items():
+		elif isinstance(fileData, (dict, types.GeneratorType)):
+			# A dict is presumed to have filenames as keys and the file data for ach file as values, and a generator to yield filename and file data pairs. Save each in the selected folder
+			for subfilename, subfilebytes in (fileData.items() if isinstance(fileData, dict) else fileData):
 				with open(os.path.join(savePath, subfilename), 'wb') as saveFile:
 					saveFile.write(subfilebytes)
 		elif isinstance(fileData, str):
@@ -3,7 +3,7 @@
 
 import zlib
 from io import BytesIO
-from typing import List
+from typing import BinaryIO, List, Union
 
 import texture2ddecoder
 from PIL import Image
@@ -16,6 +16,29 @@ _HEADER = b'\xAB\x4B\x54\x58\x20\x31\x31\xBB\x0D\x0A\x1A\x0A'
 _ENDIANNESS_CHECK_LITTLE = b'\x04\x03\x02\x01'
 _ENDIANNESS_CHECK_BIG = b'\x01\x02\x03\x04'
 
+class _ZlibStreamReader:
+	"""A minimal read-only file-like object that decompresses data from another file-like object, but only as far as is needed for each read"""
+	_COMPRESSED_CHUNK_SIZE = 1024 * 1024
+
+	def __init__(self, compressedFile: BinaryIO):
+		self._compressedFile = compressedFile
+		self._decompressor = zlib.decompressobj()
+		self._decompressedBuffer = bytearray()
+
+	def read(self, size: int) -> bytes:
+		while len(self._decompressedBuffer) < size and not self._decompressor.eof:
+			# Limiting the decompressed size leaves the rest of the compressed data in 'unconsumed_tail', so decompress that before reading more
+			compressedData = self._decompressor.unconsumed_tail
+			if not compressedData:
+				compressedData = self._compressedFile.read(self._COMPRESSED_CHUNK_SIZE)
+				if not compressedData:
+					break
+			self._decompressedBuffer.extend(self._decompressor.decompress(compressedData, size - len(self._decompressedBuffer)))
+		result = bytes(self._decompressedBuffer[:size])
+		del self._decompressedBuffer[:size]
+		return result
+
+
 def _checkValue(expected, actual, errorMessagePrefix="Unexpected value"):
 	if expected != actual:
 		errorMessagePrefix = errorMessagePrefix
@@ -23,19 +46,21 @@ def _checkValue(expected, actual, errorMessagePrefix="Unexpected value"):
 		printableActual = Utils.getPrintableBytes(actual) if isinstance(actual, bytes) else actual
 		raise KtxError(f"{errorMessagePrefix}. Expected '{printableExpected}' but found '{printableActual}'")
 
-def fromKtx(ktxData: bytes, filename: str, detailLevelsToLoad: int = -1) -> List[Image.Image]:
+def fromKtx(ktxData: Union[bytes, BinaryIO], filename: str, detailLevelsToLoad: int = -1) -> List[Image.Image]:
 	"""
 	Convert the provided KTX-formatted image data into a list of Pillow images, one for each mipmap (or detail) level
-	:param ktxData: The KTX-formatted data to convert
+	:param ktxData: The KTX-formatted data to convert. This can also be a file-like object, in which case only the parts that are needed get read from it
 	:param filename: The filename of the KTX image file. This is needed to determine whether the data is compressed or not
 	:param detailLevelsToLoad: A lot of the images contain different detail levels, or mipmaps. If this number is specified, only load that number of mipmap levels, instead of all of them
 	:return: A list of Pillow Images, one for each mipmap level. The first image in the list is full-size, the next one is half the size, the following quarter size, and so on
 	"""
+	if isinstance(ktxData, (bytes, bytearray, memoryview)):
+		ktxData = BytesIO(ktxData)
 	if filename.endswith('bz'):
-		# The image data is compressed, decompress it first
-		ktxReader: BytesIO = BytesIO(zlib.decompress(ktxData))
+		# The image data is compressed, decompress it while reading, so we don't need to keep both the compressed and the decompressed data in memory
+		ktxReader: BinaryIO = _ZlibStreamReader(ktxData)
 	else:
-		ktxReader: BytesIO = BytesIO(ktxData)
+		ktxReader: BinaryIO = ktxData
 	# Header
 	_checkValue(_HEADER, ktxReader.read(12), "Invalid header in KTX data")
 	# A value indicating if it's little or big endian
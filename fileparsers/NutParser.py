@@ -1,10 +1,7 @@
 import Keys
+from fileparsers.ggpackhelpers import GameDataCodec
 
 def fromBytes(sourceBytes: bytes) -> str:
-	sourceLength = len(sourceBytes)
-	decodedBytes = bytearray(sourceLength)
-	keyOffset = sourceLength & 0xFF
-	keyLength = len(Keys.THIMBLEWEED_PARK_BNUT_KEY)
-	for index in range(sourceLength):
-		decodedBytes[index] = sourceBytes[index] ^ Keys.THIMBLEWEED_PARK_BNUT_KEY[(index + keyOffset) % keyLength]
-	return bytes(decodedBytes).decode('utf-8')
+	decodedBytes = bytearray(sourceBytes)
+	GameDataCodec.xorWithRepeatingKey(decodedBytes, Keys.THIMBLEWEED_PARK_BNUT_KEY, len(sourceBytes) & 0xFF)
+	return decodedBytes.decode('utf-8')
@@ -7,6 +7,7 @@ from typing import List
 
 import Keys, Utils
 from CustomExceptions import YackError
+from fileparsers.ggpackhelpers import GameDataCodec
 
 
 class _YackOpCodes(IntEnum):
@@ -54,12 +55,9 @@ def _decodeYack(encodedYackBytes: bytes, yackFilename: str) -> bytes:
 	:return: The decoded yack file, ready to be parsed
 	"""
 	# Based on https://github.com/jonsth131/ggtool/blob/main/libdinky/src/decoder.rs
-	decodedYackBytes = bytearray(len(encodedYackBytes))
+	decodedYackBytes = bytearray(encodedYackBytes)
 	val = len(os.path.basename(yackFilename)) - 5  # Subtract the '.yack' file extension
-	keyLength = len(Keys.RTMI_KEY_YACK)
-	for index in range(len(encodedYackBytes)):
-		keyIndex = (index + val) % keyLength
-		decodedYackBytes[index] = encodedYackBytes[index] ^ Keys.RTMI_KEY_YACK[keyIndex]
+	GameDataCodec.xorWithRepeatingKey(decodedYackBytes, Keys.RTMI_KEY_YACK, val)
 	return bytes(decodedYackBytes)
 
 def fromYack(encodedYackBytes: bytes, yackFilename: str) -> List[str]:
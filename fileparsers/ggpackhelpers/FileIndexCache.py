@@ -0,0 +1,218 @@
+"""
+Stores the decoded file index of each ggpack on disk, so opening the same game again doesn't need to read, decode, and parse the whole GGDict file index again
+Each cached index is stored with the path, size, modification time, and a hash of the header of the ggpack it came from, and is only used if all of those still match
+The cache is stored in a compact binary format that loads without any GGDict parsing:
+- The magic number, and the version of the cache format
+- The absolute path of the ggpack, its size, its modification time in nanoseconds, and the header hash
+- The GUID from the file index
+- The number of entries, followed by all the entry offsets, all the entry sizes, and all the entry filenames joined by \x00 characters
+The content hashes of a ggpack's entries can be stored alongside its file index, in a separate file with the same header, followed by the number of entries, all the encoded hashes, and all the decoded hashes
+"""
+
+import array, hashlib, os, platform, struct, sys
+from typing import BinaryIO, Callable, Dict, Tuple, Union
+
+import Utils
+from models.ContentHashes import ContentHashes
+from models.FileIndexColumns import FileIndexColumns
+
+
+_CACHE_MAGIC = b'TMIC'
+_CONTENT_HASHES_CACHE_MAGIC = b'TMCH'
+_CACHE_FORMAT_VERSION = 1
+# How many bytes of the encoded file index get included in the header hash, together with the ggpack header itself
+_HEADER_HASH_INDEX_BYTES = 4096
+_HEADER_HASH_SIZE = 16
+# The magic number, format version, ggpack size, and ggpack modification time
+_CACHE_HEADER_STRUCT = struct.Struct('<4sHQq')
+_LENGTH_STRUCT = struct.Struct('<I')
+
+
+def getCacheFolder() -> str:
+	"""Get the folder where the file index caches are stored, which is the usual per-user cache location for each operating system"""
+	if platform.system() == 'Windows':
+		baseCacheFolder = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
+	elif platform.system() == 'Darwin':
+		baseCacheFolder = os.path.join(os.path.expanduser('~'), 'Library', 'Caches')
+	else:
+		baseCacheFolder = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+	return os.path.join(baseCacheFolder, 'ThimbleMonkey', 'FileIndexes')
+
+def _getCacheFilePath(gameFilePath: str, fileExtension: str = '.idx') -> str:
+	return os.path.join(getCacheFolder(), hashlib.sha1(os.path.abspath(gameFilePath).encode('utf-8')).hexdigest() + fileExtension)
+
+def getPackKey(gameFilePath: str) -> Tuple[int, int, bytes]:
+	"""
+	Get the values that identify the current state of the provided ggpack
+	:return: A tuple with the size of the ggpack, its modification time in nanoseconds, and a hash of its header and the start of its encoded file index
+	"""
+	fileStats = os.stat(gameFilePath)
+	with open(gameFilePath, 'rb') as gameFile:
+		packHeader = gameFile.read(8)
+		headerHash = hashlib.blake2b(packHeader, digest_size=_HEADER_HASH_SIZE)
+		if len(packHeader) == 8:
+			gameFile.seek(Utils.parseInt(packHeader))
+			headerHash.update(gameFile.read(min(_HEADER_HASH_INDEX_BYTES, max(0, Utils.parseInt(packHeader, 4)))))
+	return fileStats.st_size, fileStats.st_mtime_ns, headerHash.digest()
+
+def _toLittleEndianBytes(values: array.array) -> bytes:
+	if sys.byteorder != 'little':
+		values = array.array(values.typecode, values)
+		values.byteswap()
+	return values.tobytes()
+
+def _fromLittleEndianBytes(typecode: str, data: memoryview) -> array.array:
+	values = array.array(typecode)
+	values.frombytes(data)
+	if sys.byteorder != 'little':
+		values.byteswap()
+	return values
+
+def _writeLengthPrefixedBytes(cacheFile, data: bytes):
+	cacheFile.write(_LENGTH_STRUCT.pack(len(data)))
+	cacheFile.write(data)
+
+def _readLengthPrefixedBytes(cacheData: memoryview, offset: int) -> Tuple[memoryview, int]:
+	length = _LENGTH_STRUCT.unpack_from(cacheData, offset)[0]
+	offset += _LENGTH_STRUCT.size
+	if offset + length > len(cacheData):
+		raise ValueError(f"Cached data of {length:,} bytes at offset {offset:,} doesn't fit in the cache of {len(cacheData):,} bytes")
+	return cacheData[offset:offset + length], offset + length
+
+def loadFileIndex(gameFilePath: str, packKey: Tuple[int, int, bytes] = None) -> Union[None, Dict]:
+	"""
+	Load the cached file index of the provided ggpack, if there is one and the ggpack hasn't changed since it was cached
+	:param gameFilePath: The path to the ggpack to load the cached file index for
+	:param packKey: The result of 'getPackKey' for the ggpack, if it's already known
+	:return: The file index, in the same format as 'GGPackParser.getFileIndex' returns, or None if there's no valid cached file index
+	"""
+	fileIndexColumns = loadFileIndexColumns(gameFilePath, packKey)
+	return fileIndexColumns.toFileIndex() if fileIndexColumns is not None else None
+
+def loadFileIndexColumns(gameFilePath: str, packKey: Tuple[int, int, bytes] = None) -> Union[None, FileIndexColumns]:
+	"""Load the cached file index of the provided ggpack like 'loadFileIndex' does, but return it as columns, which is how it's cached"""
+	cacheFilePath = _getCacheFilePath(gameFilePath)
+	if not os.path.isfile(cacheFilePath):
+		return None
+	try:
+		cacheData, offset = _readCacheData(cacheFilePath, _CACHE_MAGIC, gameFilePath, packKey)
+		if cacheData is None:
+			return None
+		guid, offset = _readLengthPrefixedBytes(cacheData, offset)
+		entryCount = _LENGTH_STRUCT.unpack_from(cacheData, offset)[0]
+		offset += _LENGTH_STRUCT.size
+		entryOffsets = _fromLittleEndianBytes('Q', cacheData[offset:offset + entryCount * 8])
+		offset += entryCount * 8
+		entrySizes = _fromLittleEndianBytes('Q', cacheData[offset:offset + entryCount * 8])
+		offset += entryCount * 8
+		entryFilenames, offset = _readLengthPrefixedBytes(cacheData, offset)
+		entryFilenames = str(entryFilenames, 'utf-8').split('\x00') if entryCount > 0 else []
+		if len(entryOffsets) != entryCount or len(entrySizes) != entryCount or len(entryFilenames) != entryCount:
+			return None
+	except (OSError, ValueError, struct.error) as e:
+		# A broken cache isn't a problem, the file index just needs to be read from the ggpack again
+		print(f"Unable to read the cached file index for '{gameFilePath}' from '{cacheFilePath}', ignoring it: {e}")
+		return None
+	return FileIndexColumns(entryFilenames, entryOffsets, entrySizes, str(guid, 'utf-8'))
+
+def storeFileIndex(gameFilePath: str, fileIndex: Union[Dict, FileIndexColumns], packKey: Tuple[int, int, bytes] = None) -> bool:
+	"""
+	Store the provided file index in the cache, replacing any previously cached file index for the provided ggpack
+	:param gameFilePath: The path to the ggpack that the file index belongs to
+	:param fileIndex: The file index, as returned by 'GGPackParser.getFileIndex' or by 'GGPackParser.getFileIndexColumns'
+	:param packKey: The result of 'getPackKey' from before the file index was read. This prevents caching an outdated file index if the ggpack changed while it was being read
+	:return: True if the file index was stored, False if it couldn't be stored. File indexes with fields that the cache format doesn't support don't get stored
+	"""
+	if isinstance(fileIndex, dict):
+		if set(fileIndex.keys()) != {'files', 'guid'} or any(set(fileEntryData.keys()) != {'filename', 'offset', 'size'} for fileEntryData in fileIndex['files']):
+			return False
+		try:
+			fileIndex = FileIndexColumns.fromFileIndex(fileIndex)
+		except (OverflowError, TypeError):
+			return False
+	if not isinstance(fileIndex.guid, str) or any('\x00' in filename for filename in fileIndex.filenames):
+		return False
+	def writeFileIndex(cacheFile):
+		_writeLengthPrefixedBytes(cacheFile, fileIndex.guid.encode('utf-8'))
+		cacheFile.write(_LENGTH_STRUCT.pack(len(fileIndex)))
+		cacheFile.write(_toLittleEndianBytes(fileIndex.offsets))
+		cacheFile.write(_toLittleEndianBytes(fileIndex.sizes))
+		_writeLengthPrefixedBytes(cacheFile, '\x00'.join(fileIndex.filenames).encode('utf-8'))
+	return _writeCacheFile(_getCacheFilePath(gameFilePath), _CACHE_MAGIC, gameFilePath, packKey, writeFileIndex, 'file index')
+
+def loadContentHashes(gameFilePath: str, packKey: Tuple[int, int, bytes] = None) -> Union[None, ContentHashes]:
+	"""
+	Load the cached content hashes of the entries of the provided ggpack, if they were stored and the ggpack hasn't changed since
+	:param gameFilePath: The path to the ggpack to load the cached content hashes for
+	:param packKey: The result of 'getPackKey' for the ggpack, if it's already known
+	:return: The content hashes, in the same order as the entries in the file index, or None if there are no valid cached content hashes
+	"""
+	cacheFilePath = _getCacheFilePath(gameFilePath, '.hashes')
+	if not os.path.isfile(cacheFilePath):
+		return None
+	try:
+		cacheData, offset = _readCacheData(cacheFilePath, _CONTENT_HASHES_CACHE_MAGIC, gameFilePath, packKey)
+		if cacheData is None:
+			return None
+		entryCount = _LENGTH_STRUCT.unpack_from(cacheData, offset)[0]
+		offset += _LENGTH_STRUCT.size
+		hashesSize = entryCount * ContentHashes.HASH_SIZE
+		if offset + 2 * hashesSize != len(cacheData):
+			return None
+		encodedHashes = [bytes(cacheData[hashOffset:hashOffset + ContentHashes.HASH_SIZE]) for hashOffset in range(offset, offset + hashesSize, ContentHashes.HASH_SIZE)]
+		offset += hashesSize
+		decodedHashes = [bytes(cacheData[hashOffset:hashOffset + ContentHashes.HASH_SIZE]) for hashOffset in range(offset, offset + hashesSize, ContentHashes.HASH_SIZE)]
+	except (OSError, ValueError, struct.error) as e:
+		print(f"Unable to read the cached content hashes for '{gameFilePath}' from '{cacheFilePath}', ignoring them: {e}")
+		return None
+	return ContentHashes(encodedHashes, decodedHashes)
+
+def storeContentHashes(gameFilePath: str, contentHashes: ContentHashes, packKey: Tuple[int, int, bytes] = None) -> bool:
+	"""
+	Store the provided content hashes in the cache, alongside the cached file index of the provided ggpack
+	:param gameFilePath: The path to the ggpack that the content hashes belong to
+	:param contentHashes: The content hashes, as returned by 'GGPackParser.getContentHashes'
+	:param packKey: The result of 'getPackKey' from before the content hashes were calculated
+	:return: True if the content hashes were stored, False if they couldn't be stored
+	"""
+	def writeContentHashes(cacheFile):
+		cacheFile.write(_LENGTH_STRUCT.pack(len(contentHashes)))
+		cacheFile.write(b''.join(contentHashes.encodedHashes))
+		cacheFile.write(b''.join(contentHashes.decodedHashes))
+	return _writeCacheFile(_getCacheFilePath(gameFilePath, '.hashes'), _CONTENT_HASHES_CACHE_MAGIC, gameFilePath, packKey, writeContentHashes, 'content hashes')
+
+def _readCacheData(cacheFilePath: str, magic: bytes, gameFilePath: str, packKey: Union[None, Tuple[int, int, bytes]]) -> Tuple[Union[None, memoryview], int]:
+	"""Read the provided cache file, and check that it's for the current state of the provided ggpack. Returns the cache data and the offset after the cache header, or None if the cache is outdated or of another format"""
+	with open(cacheFilePath, 'rb') as cacheFile:
+		cacheData = memoryview(cacheFile.read())
+	cachedMagic, formatVersion, packSize, packModificationTime = _CACHE_HEADER_STRUCT.unpack_from(cacheData)
+	if cachedMagic != magic or formatVersion != _CACHE_FORMAT_VERSION:
+		return None, 0
+	offset = _CACHE_HEADER_STRUCT.size
+	cachedPackPath, offset = _readLengthPrefixedBytes(cacheData, offset)
+	headerHash = bytes(cacheData[offset:offset + _HEADER_HASH_SIZE])
+	offset += _HEADER_HASH_SIZE
+	if str(cachedPackPath, 'utf-8') != os.path.abspath(gameFilePath) or (packSize, packModificationTime, headerHash) != (packKey or getPackKey(gameFilePath)):
+		# The ggpack changed since it was cached, so the cache is outdated
+		return None, 0
+	return cacheData, offset
+
+def _writeCacheFile(cacheFilePath: str, magic: bytes, gameFilePath: str, packKey: Union[None, Tuple[int, int, bytes]], writeCachedData: Callable[[BinaryIO], None], cachedDataDescription: str) -> bool:
+	"""Write a cache file for the provided ggpack, with the header that identifies the ggpack's current state, followed by whatever the provided function writes"""
+	temporaryCacheFilePath = f"{cacheFilePath}.{os.getpid()}.tmp"
+	try:
+		packSize, packModificationTime, headerHash = packKey or getPackKey(gameFilePath)
+		os.makedirs(os.path.dirname(cacheFilePath), exist_ok=True)
+		# Write to a temporary file first, so a cache file is never half-written, even if multiple instances store the same data at the same time
+		with open(temporaryCacheFilePath, 'wb') as cacheFile:
+			cacheFile.write(_CACHE_HEADER_STRUCT.pack(magic, _CACHE_FORMAT_VERSION, packSize, packModificationTime))
+			_writeLengthPrefixedBytes(cacheFile, os.path.abspath(gameFilePath).encode('utf-8'))
+			cacheFile.write(headerHash)
+			writeCachedData(cacheFile)
+		os.replace(temporaryCacheFilePath, cacheFilePath)
+	except OSError as e:
+		print(f"Unable to store the {cachedDataDescription} for '{gameFilePath}' in the cache at '{cacheFilePath}': {e}")
+		if os.path.isfile(temporaryCacheFilePath):
+			os.remove(temporaryCacheFilePath)
+		return False
+	return True
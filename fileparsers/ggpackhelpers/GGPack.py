@@ -0,0 +1,200 @@
+import os, threading
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+from CustomExceptions import DecodeError
+from enums.Game import Game
+from fileparsers import GGPackParser
+from fileparsers.ggpackhelpers import GameDataCodec
+from models.FileEntry import FileEntry, FileEntryTable
+
+
+class GGPack:
+	"""
+	A single opened ggpack. It keeps the ggpack file open and its file index loaded, so accessing entries doesn't need to open the ggpack or read its file index again
+	Entries can be looked up by filename like in a dict, and many entries can be read at once with 'readMany', which combines entries that are close together into single large reads
+	Close it when done, or use it in a 'with' statement
+	"""
+
+	# Entries that are at most this many bytes apart get read in one go, since reading a small gap is cheaper than starting a new read
+	MAX_READ_GAP_SIZE: int = 64 * 1024
+	# Combined reads are kept to about this size, so reading many entries doesn't need a lot of memory at once
+	MAX_READ_SIZE: int = 16 * 1024 * 1024
+
+	def __init__(self, packFilePath: str, shouldUseCache: bool = True):
+		"""
+		:param packFilePath: The path to the ggpack to open
+		:param shouldUseCache: Whether the file index can be loaded from and stored in the file index cache. See 'GGPackParser.getFileIndex'
+		"""
+		self._packFilePath: str = packFilePath
+		self._game: Game = Game.ggpackPathToGameName(packFilePath)
+		self._shouldUseCache: bool = shouldUseCache
+		self._packFile = open(packFilePath, 'rb')
+		# Reading is a seek followed by a read, so make sure multiple threads don't interfere with each other
+		self._packFileLock = threading.Lock()
+		# The file index is only loaded when it's needed, since reading entries that are already known doesn't need it
+		self._fileEntriesByFilename: Union[None, Dict[str, FileEntry]] = None
+
+	@property
+	def packFilePath(self) -> str:
+		return self._packFilePath
+
+	@property
+	def game(self) -> Game:
+		return self._game
+
+	@property
+	def closed(self) -> bool:
+		return self._packFile.closed
+
+	def _getFileEntriesByFilename(self) -> Dict[str, FileEntry]:
+		if self._fileEntriesByFilename is None:
+			fileEntryTable = FileEntryTable()
+			fileEntryTable.addFileIndex(self._packFilePath, GGPackParser.getFileIndexColumns(self._packFilePath, self._shouldUseCache))
+			self._fileEntriesByFilename = {fileEntry.filename: fileEntry for fileEntry in fileEntryTable}
+		return self._fileEntriesByFilename
+
+	@property
+	def fileEntries(self) -> List[FileEntry]:
+		"""All the entries in this ggpack, in the order of the file index"""
+		return list(self._getFileEntriesByFilename().values())
+
+	def __len__(self) -> int:
+		return len(self._getFileEntriesByFilename())
+
+	def __iter__(self) -> Iterator[str]:
+		return iter(self._getFileEntriesByFilename())
+
+	def __contains__(self, filename: str) -> bool:
+		return filename in self._getFileEntriesByFilename()
+
+	def __getitem__(self, filename: str) -> FileEntry:
+		return self._getFileEntriesByFilename()[filename]
+
+	def get(self, filename: str, defaultValue: FileEntry = None) -> Union[None, FileEntry]:
+		return self._getFileEntriesByFilename().get(filename, defaultValue)
+
+	def keys(self):
+		return self._getFileEntriesByFilename().keys()
+
+	def values(self):
+		return self._getFileEntriesByFilename().values()
+
+	def items(self):
+		return self._getFileEntriesByFilename().items()
+
+	def _toFileEntry(self, fileEntryOrFilename: Union[FileEntry, str]) -> FileEntry:
+		if isinstance(fileEntryOrFilename, str):
+			return self[fileEntryOrFilename]
+		if os.path.abspath(fileEntryOrFilename.packFilePath) != os.path.abspath(self._packFilePath):
+			raise ValueError(f"Entry '{fileEntryOrFilename}' isn't part of ggpack '{self._packFilePath}'")
+		return fileEntryOrFilename
+
+	def _readInto(self, offset: int, buffer: bytearray):
+		if self.closed:
+			raise ValueError("I/O operation on closed ggpack")
+		with self._packFileLock:
+			self._packFile.seek(offset)
+			bytesRead = self._packFile.readinto(buffer)
+		if bytesRead != len(buffer):
+			raise DecodeError(f"Tried to read {len(buffer):,} bytes at offset {offset:,} of ggpack '{self._packFilePath}', but it only had {bytesRead:,} bytes left")
+
+	def _decodeInPlace(self, fileEntry: FileEntry, fileData: Union[bytearray, memoryview]):
+		if fileEntry.fileExtension != '.assets.bank':
+			# sound bank files aren't encoded
+			GameDataCodec.decodeGameDataInPlace(fileData, fileEntry.game, fileEntry.size)
+
+	def read(self, fileEntryOrFilename: Union[FileEntry, str]) -> bytearray:
+		"""
+		Read and decode a single entry. This returns the same data as 'GGPackParser.getPackedFile'
+		:param fileEntryOrFilename: The entry to read, or the filename of the entry to read
+		:return: The decoded data of the entry
+		"""
+		fileEntry = self._toFileEntry(fileEntryOrFilename)
+		fileData = bytearray(fileEntry.size)
+		self._readInto(fileEntry.offset, fileData)
+		self._decodeInPlace(fileEntry, fileData)
+		return fileData
+
+	def readMany(self, fileEntriesOrFilenames: Iterable[Union[FileEntry, str]]) -> Iterator[Tuple[FileEntry, memoryview]]:
+		"""
+		Read and decode many entries at once. The entries are sorted by their offset in the ggpack, and entries that are close together are read with a single read, instead of reading each entry separately
+		:param fileEntriesOrFilenames: The entries to read, or the filenames of the entries to read
+		:return: A generator that yields a tuple with each entry and its decoded data, sorted by their offset in the ggpack.
+			The data is a view of the larger buffer that was read at once, so it isn't copied. Make a copy with 'bytearray()' if the data needs to be changed or kept around for long
+		"""
+		fileEntries = sorted((self._toFileEntry(fileEntryOrFilename) for fileEntryOrFilename in fileEntriesOrFilenames), key=lambda fileEntry: fileEntry.offset)
+		for readStart, readEnd, readFileEntries in self._groupReads(fileEntries):
+			readBuffer = bytearray(readEnd - readStart)
+			self._readInto(readStart, readBuffer)
+			readBufferView = memoryview(readBuffer)
+			for fileEntry in readFileEntries:
+				fileData = readBufferView[fileEntry.offset - readStart:fileEntry.offset - readStart + fileEntry.size]
+				self._decodeInPlace(fileEntry, fileData)
+				yield fileEntry, fileData
+
+	def _groupReads(self, sortedFileEntries: List[FileEntry]) -> Iterator[Tuple[int, int, List[FileEntry]]]:
+		"""Group the provided entries, sorted by offset, into reads. Each read is a tuple of the start offset, the end offset, and the entries in that read"""
+		readStart = readEnd = 0
+		readFileEntries: List[FileEntry] = []
+		for fileEntry in sortedFileEntries:
+			fileEntryEnd = fileEntry.offset + fileEntry.size
+			# Overlapping entries can't share a read, since each entry gets decoded in place. Entries that are too far apart or would make the read too big start a new read too
+			if readFileEntries and (fileEntry.offset < readEnd or fileEntry.offset - readEnd > self.MAX_READ_GAP_SIZE or fileEntryEnd - readStart > self.MAX_READ_SIZE):
+				yield readStart, readEnd, readFileEntries
+				readFileEntries = []
+			if not readFileEntries:
+				readStart = fileEntry.offset
+			readFileEntries.append(fileEntry)
+			readEnd = fileEntryEnd
+		if readFileEntries:
+			yield readStart, readEnd, readFileEntries
+
+	def extractMany(self, fileEntriesOrFilenames: Iterable[Union[FileEntry, str]], savePath: str) -> Iterator[Tuple[FileEntry, Union[None, BaseException]]]:
+		"""
+		Save many entries unconverted, using 'readMany' to read them. This saves the same files as 'GGPackParser.savePackedFile' does when not converting
+		:param fileEntriesOrFilenames: The entries to save, or the filenames of the entries to save
+		:param savePath: The folder to save the entries in
+		:return: A generator that yields a tuple with each entry and the error that occurred while saving it, or None if saving went fine
+		"""
+		fileEntries = [self._toFileEntry(fileEntryOrFilename) for fileEntryOrFilename in fileEntriesOrFilenames]
+		# Very large entries would need a lot of memory if read at once, so save those in chunks
+		largeFileEntries = [fileEntry for fileEntry in fileEntries if fileEntry.size > self.MAX_READ_SIZE]
+		for fileEntry in largeFileEntries:
+			yield fileEntry, self._extractInChunks(fileEntry, savePath)
+		savedFileEntryIds = set()
+		try:
+			for fileEntry, fileData in self.readMany(fileEntry for fileEntry in fileEntries if fileEntry.size <= self.MAX_READ_SIZE):
+				saveError = None
+				try:
+					with open(os.path.join(savePath, fileEntry.filename), 'wb') as saveFile:
+						saveFile.write(fileData)
+				except Exception as e:
+					saveError = e
+				savedFileEntryIds.add(id(fileEntry))
+				yield fileEntry, saveError
+		except Exception as e:
+			# Reading failed, so the entries that weren't saved yet can't be saved either
+			for fileEntry in fileEntries:
+				if fileEntry.size <= self.MAX_READ_SIZE and id(fileEntry) not in savedFileEntryIds:
+					yield fileEntry, e
+
+	def _extractInChunks(self, fileEntry: FileEntry, savePath: str) -> Union[None, BaseException]:
+		try:
+			with open(os.path.join(savePath, fileEntry.filename), 'wb') as saveFile:
+				for fileDataChunk in GGPackParser.iteratePackedFileChunks(fileEntry):
+					saveFile.write(fileDataChunk)
+		except Exception as e:
+			return e
+		return None
+
+	def close(self):
+		self._packFile.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.close()
+
+	def __str__(self):
+		return f"GGPack {self._packFilePath}"
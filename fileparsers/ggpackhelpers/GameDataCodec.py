@@ -0,0 +1,400 @@
+"""
+Vectorized versions of the game data decoding in GGPackParser, using NumPy
+The results are identical to those of the pure-Python decoding loops in GGPackParser, which are used as a fallback if NumPy isn't installed
+This also allows for decoding just a part of an entry, and contains the repeating-key XOR used by soundbanks, .bnut files, and .yack files. Those work with and without NumPy
+"""
+
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Tuple, Union
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+import Keys
+from enums.Game import Game
+
+
+IS_AVAILABLE: bool = numpy is not None
+
+# Return To Monkey Island keystreams only depend on the entry length, so they're cached. Keep the cache from growing without bounds, and don't cache very large keystreams since those are rarely reused
+_RTMI_KEYSTREAM_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+_RTMI_KEYSTREAM_CACHE_MAX_ENTRY_BYTES: int = 8 * 1024 * 1024
+# XOR'ing with a repeating key is done in blocks of about this size, to limit the size of temporary data
+_REPEATING_KEY_BLOCK_SIZE: int = 1024 * 1024
+# Maps each byte value to the value with its bits reversed, so 0b00000001 becomes 0b10000000
+_BIT_REVERSE_TABLE: bytes = bytes(int(f'{byteValue:08b}'[::-1], 2) for byteValue in range(256))
+
+
+def _createXorFeedbackKeystream(magicNumber: int, key: bytes) -> bytes:
+	"""
+	Thimbleweed Park and Delores XOR each byte with a key byte that only depends on the index of that byte.
+	Since that index is used modulo 256 and the key is 16 bytes long, the resulting keystream repeats every 256 bytes, so we only need to calculate it once
+	"""
+	return bytes(((index * magicNumber) & 0xFF) ^ key[index & 15] for index in range(256))
+
+
+_THIMBLEWEED_PARK_KEYSTREAM: bytes = _createXorFeedbackKeystream(Keys.THIMBLEWEED_PARK_MAGIC_NUMBER, Keys.THIMBLEWEED_PARK_KEY)
+_DELORES_KEYSTREAM: bytes = _createXorFeedbackKeystream(Keys.DELORES_MAGIC_NUMBER, Keys.DELORES_KEY)
+if IS_AVAILABLE:
+	_RTMI_KEY_1 = numpy.frombuffer(Keys.RTMI_KEY_1, dtype=numpy.uint8)
+	_RTMI_KEY_2 = numpy.frombuffer(Keys.RTMI_KEY_2, dtype=numpy.uint8)
+	_BIT_REVERSE_ARRAY = numpy.frombuffer(_BIT_REVERSE_TABLE, dtype=numpy.uint8)
+
+# Maps the starting decode state to the longest keystream calculated for it so far, with the most recently used keystream at the end
+_rtmiKeystreamCache: 'OrderedDict[int, numpy.ndarray]' = OrderedDict()
+_rtmiKeystreamCacheSize: int = 0
+_rtmiKeystreamCacheLock = threading.Lock()
+
+
+def _getIndexLimit(encodedGameDataLength: int, decodeLengthLimit: int) -> int:
+	return min(encodedGameDataLength, decodeLengthLimit) if decodeLengthLimit > 0 else encodedGameDataLength
+
+def _getXorFeedbackStartSum(keystream: bytes, encodedGameDataLength: int, startIndex: int, previousEncodedByte: Union[None, int]) -> int:
+	if startIndex == 0:
+		# The first byte doesn't have a previous byte, instead the starting sum is based on the data length
+		return encodedGameDataLength & 0xFF
+	return previousEncodedByte ^ keystream[(startIndex - 1) & 0xFF]
+
+def _decodeXorFeedbackInPlace(rangeArray: 'numpy.ndarray', keystream: bytes, encodedGameDataLength: int, startIndex: int, previousEncodedByte: Union[None, int]):
+	"""
+	Decode the data of Thimbleweed Park and Delores. The original decoding loop keeps a running 'decodeSum' that gets XOR'ed into each decoded byte, and that decoded byte then gets XOR'ed into the sum.
+	Those two XORs cancel each other out, so the sum after each byte is just that encoded byte XOR'ed with its key byte. That means each decoded byte only depends on its own encoded byte and the one before it, so it can be done for all bytes at once
+	"""
+	startDecodeSum = _getXorFeedbackStartSum(keystream, encodedGameDataLength, startIndex, previousEncodedByte)
+	# First turn each encoded byte into the decode sum after it
+	xorWithRepeatingKey(rangeArray, keystream, startIndex)
+	# Then XOR each sum with the one before it. Go back to front in blocks, so each block still has the unchanged sums before it, and NumPy's temporary copy of the overlapping data stays small
+	for blockEnd in range(len(rangeArray), 1, -_REPEATING_KEY_BLOCK_SIZE):
+		blockStart = max(1, blockEnd - _REPEATING_KEY_BLOCK_SIZE)
+		rangeArray[blockStart:blockEnd] ^= rangeArray[blockStart - 1:blockEnd - 1]
+	rangeArray[0] ^= startDecodeSum
+
+def _encodeXorFeedbackInPlace(rangeArray: 'numpy.ndarray', keystream: bytes, encodedGameDataLength: int, startIndex: int, previousEncodedByte: Union[None, int]):
+	"""
+	Encode data for Thimbleweed Park and Delores, the reverse of '_decodeXorFeedbackInPlace'. The decode sum after each byte is the previous sum XOR'ed with that decoded byte, so all the sums are a running XOR of the decoded data.
+	Each encoded byte is then the sum after that byte XOR'ed with its key byte
+	"""
+	startDecodeSum = _getXorFeedbackStartSum(keystream, encodedGameDataLength, startIndex, previousEncodedByte)
+	numpy.bitwise_xor.accumulate(rangeArray, out=rangeArray)
+	rangeArray ^= numpy.uint8(startDecodeSum)
+	xorWithRepeatingKey(rangeArray, keystream, startIndex)
+
+def _decodeXorFeedback(encodedGameData: bytes, keystream: bytes, indexLimit: int) -> bytearray:
+	"""Decode the whole provided Thimbleweed Park or Delores data. Bytes past the index limit are left at zero, just like the pure-Python decoding does"""
+	encodedGameDataLength = len(encodedGameData)
+	decodedGameData = bytearray(encodedGameDataLength)
+	if indexLimit > 0:
+		decodedArray = numpy.frombuffer(decodedGameData, dtype=numpy.uint8, count=indexLimit)
+		decodedArray[:] = numpy.frombuffer(encodedGameData, dtype=numpy.uint8, count=indexLimit)
+		_decodeXorFeedbackInPlace(decodedArray, keystream, encodedGameDataLength, 0, None)
+	return decodedGameData
+
+def _applyThimbleweedParkExtraDecoding(decodedRange: 'numpy.ndarray', startIndex: int, indexLimit: int):
+	"""Thimbleweed Park needs some extra decoding, the bytes at offsets 5 and 6 of every 16 bytes get XOR'ed once more. Stop where the pure-Python decoding loop does"""
+	decodedRange[(5 - startIndex) % 16:max(0, indexLimit - 1 - startIndex):16] ^= Keys.THIMBLEWEED_PARK_EXTRA_DECODE_NUMBER
+	decodedRange[(6 - startIndex) % 16:max(0, indexLimit - startIndex):16] ^= Keys.THIMBLEWEED_PARK_EXTRA_DECODE_NUMBER
+
+def decodeThimbleweedParkGameData(encodedGameData: bytes, decodeLengthLimit: int = 0) -> bytearray:
+	indexLimit = _getIndexLimit(len(encodedGameData), decodeLengthLimit)
+	decodedGameData = _decodeXorFeedback(encodedGameData, _THIMBLEWEED_PARK_KEYSTREAM, indexLimit)
+	_applyThimbleweedParkExtraDecoding(numpy.frombuffer(decodedGameData, dtype=numpy.uint8), 0, indexLimit)
+	return decodedGameData
+
+def decodeDeloresGameData(encodedGameData: bytes, decodeLengthLimit: int = 0) -> bytearray:
+	indexLimit = _getIndexLimit(len(encodedGameData), decodeLengthLimit)
+	return _decodeXorFeedback(encodedGameData, _DELORES_KEYSTREAM, indexLimit)
+
+@lru_cache(maxsize=256)
+def _getRtmiLowByteOrbit(startLowByte: int) -> Tuple[List[int], List[int]]:
+	"""
+	The lowest byte of the Return To Monkey Island decode state only depends on its own previous value, so it goes through a fixed sequence that quickly ends up in a loop
+	:param startLowByte: The lowest byte of the starting decode state
+	:return: A tuple with the bytes before the loop starts, and the bytes of the loop itself
+	"""
+	lowByteSequence: List[int] = []
+	lowByteToIndex = {}
+	lowByte = startLowByte
+	while lowByte not in lowByteToIndex:
+		lowByteToIndex[lowByte] = len(lowByteSequence)
+		lowByteSequence.append(lowByte)
+		lowByte = (lowByte + Keys.RTMI_KEY_1[lowByte]) & 0xFF
+	loopStartIndex = lowByteToIndex[lowByte]
+	return lowByteSequence[:loopStartIndex], lowByteSequence[loopStartIndex:]
+
+def _getRtmiLowBytes(startLowByte: int, startIndex: int, length: int) -> Tuple[List[int], List[int]]:
+	"""Get the lowest bytes of the decode state starting at the provided index, as the bytes before the loop is reached and the loop rotated to where the index is in it"""
+	leadIn, loop = _getRtmiLowByteOrbit(startLowByte)
+	if startIndex < len(leadIn):
+		return leadIn[startIndex:startIndex + length], loop
+	loopOffset = (startIndex - len(leadIn)) % len(loop)
+	return [], loop[loopOffset:] + loop[:loopOffset]
+
+def getRtmiDecodeState(encodedGameDataLength: int, index: int) -> int:
+	"""
+	Get the Return To Monkey Island decode state at the provided index, without having to go through all the states before it. This doesn't need NumPy
+	:param encodedGameDataLength: The length of the whole encoded entry, which determines the starting decode state
+	:param index: The index in the encoded entry to get the decode state for
+	:return: The decode state that the byte at the provided index gets decoded with
+	"""
+	startState = (encodedGameDataLength + Keys.RTMI_MAGIC_NUMBER) & 0xFFFF
+	leadIn, loop = _getRtmiLowByteOrbit(startState & 0xFF)
+	if index <= len(leadIn):
+		return (startState + sum(Keys.RTMI_KEY_1[lowByte] for lowByte in leadIn[:index])) & 0xFFFF
+	loopCount, loopOffset = divmod(index - len(leadIn), len(loop))
+	stateIncrease = sum(Keys.RTMI_KEY_1[lowByte] for lowByte in leadIn)
+	stateIncrease += loopCount * sum(Keys.RTMI_KEY_1[lowByte] for lowByte in loop)
+	stateIncrease += sum(Keys.RTMI_KEY_1[lowByte] for lowByte in loop[:loopOffset])
+	return (startState + stateIncrease) & 0xFFFF
+
+def _createRtmiKeystream(encodedGameDataLength: int, startIndex: int, length: int) -> 'numpy.ndarray':
+	"""
+	Create the bytes that the Return To Monkey Island decoding XORs the encoded data with.
+	The decode state gets increased each byte by the key value at its lowest byte, so the state at each index is the start state plus the sum of all the previous increases.
+	Since the lowest byte follows a short fixed sequence, that sum can be calculated for all indexes at once. The 16-bit integer type makes sure the sum wraps around just like the state does
+	"""
+	firstState = getRtmiDecodeState(encodedGameDataLength, startIndex)
+	leadIn, loop = _getRtmiLowBytes((encodedGameDataLength + Keys.RTMI_MAGIC_NUMBER) & 0xFF, startIndex, length)
+	loopLength = length - len(leadIn)
+	# Tiling the short loop is a lot quicker than 'numpy.resize', which copies it one repetition at a time
+	lowBytes = numpy.concatenate((numpy.array(leadIn, dtype=numpy.uint8), numpy.tile(numpy.array(loop, dtype=numpy.uint8), -(-loopLength // len(loop)))[:loopLength]))
+	decodeStates = numpy.empty(length, dtype=numpy.uint16)
+	if length > 0:
+		decodeStates[0] = firstState
+		numpy.cumsum(_RTMI_KEY_1[lowBytes[:-1]], dtype=numpy.uint16, out=decodeStates[1:])
+		decodeStates[1:] += numpy.uint16(firstState)
+	return _RTMI_KEY_1[(decodeStates + Keys.RTMI_MAGIC_NUMBER) & 0xFF] ^ _RTMI_KEY_2[decodeStates]
+
+def getRtmiKeystream(encodedGameDataLength: int, keystreamLength: int = -1) -> 'numpy.ndarray':
+	"""
+	Get the bytes that encoded Return To Monkey Island data of the provided length should be XOR'ed with to decode it. Results are cached, so entries with the same length only need this calculated once
+	:param encodedGameDataLength: The length of the whole encoded entry, which determines the starting decode state
+	:param keystreamLength: How many keystream bytes are needed. If this is smaller than 0, the keystream for the whole entry is returned
+	:return: A read-only array with the keystream bytes
+	"""
+	global _rtmiKeystreamCacheSize
+	if keystreamLength < 0:
+		keystreamLength = encodedGameDataLength
+	startState = (encodedGameDataLength + Keys.RTMI_MAGIC_NUMBER) & 0xFFFF
+	with _rtmiKeystreamCacheLock:
+		cachedKeystream = _rtmiKeystreamCache.get(startState, None)
+		if cachedKeystream is not None and len(cachedKeystream) >= keystreamLength:
+			_rtmiKeystreamCache.move_to_end(startState)
+			return cachedKeystream[:keystreamLength]
+	keystream = _createRtmiKeystream(encodedGameDataLength, 0, keystreamLength)
+	keystream.flags.writeable = False
+	if keystreamLength <= _RTMI_KEYSTREAM_CACHE_MAX_ENTRY_BYTES:
+		with _rtmiKeystreamCacheLock:
+			replacedKeystream = _rtmiKeystreamCache.pop(startState, None)
+			if replacedKeystream is not None:
+				_rtmiKeystreamCacheSize -= len(replacedKeystream)
+				if len(replacedKeystream) > keystreamLength:
+					# Another thread stored a longer keystream in the meantime, keep that one
+					keystream = replacedKeystream[:keystreamLength]
+					_rtmiKeystreamCache[startState] = replacedKeystream
+					_rtmiKeystreamCacheSize += len(replacedKeystream)
+					return keystream
+			_rtmiKeystreamCache[startState] = keystream
+			_rtmiKeystreamCacheSize += keystreamLength
+			# Evict the least recently used keystreams until the cache fits again
+			while _rtmiKeystreamCacheSize > _RTMI_KEYSTREAM_CACHE_MAX_BYTES:
+				evictedStartState, evictedKeystream = _rtmiKeystreamCache.popitem(last=False)
+				_rtmiKeystreamCacheSize -= len(evictedKeystream)
+	return keystream
+
+def _getRtmiKeystreamRange(encodedGameDataLength: int, startIndex: int, length: int) -> 'numpy.ndarray':
+	if startIndex == 0 and length <= _RTMI_KEYSTREAM_CACHE_MAX_ENTRY_BYTES:
+		return getRtmiKeystream(encodedGameDataLength, length)
+	with _rtmiKeystreamCacheLock:
+		cachedKeystream = _rtmiKeystreamCache.get((encodedGameDataLength + Keys.RTMI_MAGIC_NUMBER) & 0xFFFF, None)
+		if cachedKeystream is not None and len(cachedKeystream) >= startIndex + length:
+			return cachedKeystream[startIndex:startIndex + length]
+	# Only create the requested part, since the decode state at its start can be calculated directly. Creating the keystream from the start of the entry every time would make reading an entry in parts take quadratic time
+	return _createRtmiKeystream(encodedGameDataLength, startIndex, length)
+
+def decodeRtmiGameData(encodedGameData: bytes, decodeLengthLimit: int = 0) -> bytearray:
+	"""Decoding Return To Monkey Island data is XOR'ing it with a keystream that only depends on the data length, so get that keystream and XOR everything at once"""
+	encodedGameDataLength = len(encodedGameData)
+	indexLimit = _getIndexLimit(encodedGameDataLength, decodeLengthLimit)
+	decodedGameData = bytearray(encodedGameDataLength)
+	if indexLimit > 0:
+		numpy.bitwise_xor(numpy.frombuffer(encodedGameData, dtype=numpy.uint8, count=indexLimit), getRtmiKeystream(encodedGameDataLength, indexLimit), out=numpy.frombuffer(decodedGameData, dtype=numpy.uint8, count=indexLimit))
+	return decodedGameData
+
+def _verifyRange(rangeLength: int, game: Game, encodedGameDataLength: int, startIndex: int, previousEncodedByte: Union[None, int]):
+	if startIndex < 0 or startIndex + rangeLength > encodedGameDataLength:
+		raise ValueError(f"Range from {startIndex:,} with length {rangeLength:,} doesn't fit in an entry of {encodedGameDataLength:,} bytes")
+	if game in (Game.THIMBLEWEED_PARK, Game.DELORES) and startIndex > 0 and previousEncodedByte is None:
+		raise ValueError(f"Coding {game.value} data from index {startIndex:,} needs the previous encoded byte")
+
+def decodeGameDataRange(encodedRange: bytes, game: Game, encodedGameDataLength: int, startIndex: int, previousEncodedByte: Union[None, int] = None) -> bytearray:
+	"""
+	Decode just a part of a packed entry. The result is the same as the matching part of decoding the whole entry
+	:param encodedRange: The encoded bytes to decode
+	:param game: The game that the entry is from, since each game decodes differently
+	:param encodedGameDataLength: The length of the whole encoded entry, since decoding depends on it
+	:param startIndex: The index in the whole entry where the encoded range starts
+	:param previousEncodedByte: The encoded byte just before the range. Thimbleweed Park and Delores need this if the start index isn't 0
+	:return: The decoded range
+	"""
+	return decodeGameDataInPlace(bytearray(encodedRange), game, encodedGameDataLength, startIndex, previousEncodedByte)
+
+def decodeGameDataInPlace(gameDataRange: Union[bytearray, memoryview], game: Game, encodedGameDataLength: int, startIndex: int = 0, previousEncodedByte: Union[None, int] = None) -> Union[bytearray, memoryview]:
+	"""
+	Decode (a part of) a packed entry in the provided buffer itself, so no copies of the data are needed. The parameters work the same as for 'decodeGameDataRange'
+	:param gameDataRange: The encoded bytes to decode. This needs to be writable, like a bytearray or a memoryview of one, since it gets changed in place
+	:return: The same buffer that was passed in, for convenience
+	"""
+	with memoryview(gameDataRange) as rangeView:
+		rangeView = rangeView.cast('B')
+		_verifyRange(len(rangeView), game, encodedGameDataLength, startIndex, previousEncodedByte)
+		if len(rangeView) == 0:
+			return gameDataRange
+		if game == Game.THIMBLEWEED_PARK:
+			if IS_AVAILABLE:
+				rangeArray = numpy.frombuffer(rangeView, dtype=numpy.uint8)
+				_decodeXorFeedbackInPlace(rangeArray, _THIMBLEWEED_PARK_KEYSTREAM, encodedGameDataLength, startIndex, previousEncodedByte)
+				_applyThimbleweedParkExtraDecoding(rangeArray, startIndex, encodedGameDataLength)
+			else:
+				_decodeXorFeedbackRangeByteByByte(rangeView, Keys.THIMBLEWEED_PARK_MAGIC_NUMBER, Keys.THIMBLEWEED_PARK_KEY, encodedGameDataLength, startIndex, previousEncodedByte)
+				_applyThimbleweedParkExtraDecodingByteByByte(rangeView, startIndex, encodedGameDataLength)
+		elif game == Game.DELORES:
+			if IS_AVAILABLE:
+				_decodeXorFeedbackInPlace(numpy.frombuffer(rangeView, dtype=numpy.uint8), _DELORES_KEYSTREAM, encodedGameDataLength, startIndex, previousEncodedByte)
+			else:
+				_decodeXorFeedbackRangeByteByByte(rangeView, Keys.DELORES_MAGIC_NUMBER, Keys.DELORES_KEY, encodedGameDataLength, startIndex, previousEncodedByte)
+		elif game == Game.RETURN_TO_MONKEY_ISLAND:
+			if IS_AVAILABLE:
+				rangeArray = numpy.frombuffer(rangeView, dtype=numpy.uint8)
+				rangeArray ^= _getRtmiKeystreamRange(encodedGameDataLength, startIndex, len(rangeArray))
+			else:
+				_decodeRtmiRangeByteByByte(rangeView, encodedGameDataLength, startIndex)
+		else:
+			raise NotImplementedError(f"Decoding for the game '{game}' is not implemented")
+	return gameDataRange
+
+def _applyThimbleweedParkExtraDecodingByteByByte(decodedRange: Union[bytearray, memoryview], startIndex: int, indexLimit: int):
+	for index in range(startIndex + (5 - startIndex) % 16, min(startIndex + len(decodedRange), indexLimit - 1), 16):
+		decodedRange[index - startIndex] ^= Keys.THIMBLEWEED_PARK_EXTRA_DECODE_NUMBER
+	for index in range(startIndex + (6 - startIndex) % 16, min(startIndex + len(decodedRange), indexLimit), 16):
+		decodedRange[index - startIndex] ^= Keys.THIMBLEWEED_PARK_EXTRA_DECODE_NUMBER
+
+def _getStartDecodeSum(magicNumber: int, key: bytes, encodedGameDataLength: int, startIndex: int, previousEncodedByte: Union[None, int]) -> int:
+	if startIndex == 0:
+		return encodedGameDataLength & 255
+	# The decode sum is the previous encoded byte XOR'ed with its key byte, see '_decodeXorFeedbackInPlace'
+	previousIndex = startIndex - 1
+	return previousEncodedByte ^ (((previousIndex & 255) * magicNumber) & 255) ^ key[previousIndex & 15]
+
+def _decodeXorFeedbackRangeByteByByte(rangeToDecode: Union[bytearray, memoryview], magicNumber: int, key: bytes, encodedGameDataLength: int, startIndex: int, previousEncodedByte: Union[None, int]):
+	decodeSum = _getStartDecodeSum(magicNumber, key, encodedGameDataLength, startIndex, previousEncodedByte)
+	for rangeIndex in range(len(rangeToDecode)):
+		index = startIndex + rangeIndex
+		decodedByte = (index & 255) * magicNumber
+		decodedByte = (decodedByte ^ key[index & 15]) & 255
+		decodedByte = (decodedByte ^ decodeSum) & 255
+		rangeToDecode[rangeIndex] = rangeToDecode[rangeIndex] ^ decodedByte
+		decodeSum = decodeSum ^ rangeToDecode[rangeIndex]
+
+def _decodeRtmiRangeByteByByte(rangeToDecode: Union[bytearray, memoryview], encodedGameDataLength: int, startIndex: int):
+	decodeSum = getRtmiDecodeState(encodedGameDataLength, startIndex)
+	for rangeIndex in range(len(rangeToDecode)):
+		key1decodeByte = Keys.RTMI_KEY_1[(decodeSum + Keys.RTMI_MAGIC_NUMBER) & 0xFF]
+		key2decodeByte = Keys.RTMI_KEY_2[decodeSum]
+		rangeToDecode[rangeIndex] = (rangeToDecode[rangeIndex] ^ key1decodeByte ^ key2decodeByte)
+		decodeSum = (decodeSum + Keys.RTMI_KEY_1[decodeSum & 0xFF]) & 0xFFFF
+
+def xorWithRepeatingKey(data: bytearray, key: bytes, keyOffset: int = 0, shouldReverseBits: bool = False) -> bytearray:
+	"""
+	XOR the provided data in place with the provided key, repeating the key as often as needed. This doesn't depend on the data length or on previous bytes, so it's the same for any part of the data
+	:param data: The data to XOR. This needs to be writable, like a bytearray, since it gets changed in place
+	:param key: The key to XOR the data with
+	:param keyOffset: The index in the key that the first byte of the data gets XOR'ed with
+	:param shouldReverseBits: If True, the bits of each data byte get reversed before XOR'ing, which is needed for soundbanks
+	:return: The same data object that was passed in, for convenience
+	"""
+	keyLength = len(key)
+	keyOffset %= keyLength
+	rotatedKey = key[keyOffset:] + key[:keyOffset]
+	# Make each block a multiple of the key length, so every block starts at the start of the rotated key
+	blockSize = keyLength * max(1, _REPEATING_KEY_BLOCK_SIZE // keyLength)
+	with memoryview(data) as dataView:
+		dataView = dataView.cast('B')
+		if IS_AVAILABLE:
+			dataArray = numpy.frombuffer(dataView, dtype=numpy.uint8)
+			keyArray = numpy.frombuffer(rotatedKey, dtype=numpy.uint8)
+			for blockStart in range(0, len(dataArray), blockSize):
+				block = dataArray[blockStart:blockStart + blockSize]
+				if shouldReverseBits:
+					numpy.take(_BIT_REVERSE_ARRAY, block, out=block, mode='clip')
+				fullKeyLength = len(block) - len(block) % keyLength
+				# XOR'ing as rows the size of the key saves creating a repeated key the size of the block
+				block[:fullKeyLength].reshape(-1, keyLength)[:] ^= keyArray
+				block[fullKeyLength:] ^= keyArray[:len(block) - fullKeyLength]
+		else:
+			# Without NumPy, XOR'ing as large integers is still a lot faster than XOR'ing byte by byte
+			repeatedKey = rotatedKey * (blockSize // keyLength)
+			for blockStart in range(0, len(dataView), blockSize):
+				block = dataView[blockStart:blockStart + blockSize]
+				blockBytes = block.tobytes()
+				if shouldReverseBits:
+					blockBytes = blockBytes.translate(_BIT_REVERSE_TABLE)
+				xoredValue = int.from_bytes(blockBytes, 'little') ^ int.from_bytes(repeatedKey[:len(block)], 'little')
+				block[:] = xoredValue.to_bytes(len(block), 'little')
+	return data
+
+def encodeGameDataRange(decodedRange: bytes, game: Game, encodedGameDataLength: int, startIndex: int, previousEncodedByte: Union[None, int] = None) -> bytearray:
+	"""
+	Encode (a part of) data so the game can decode it. This is the exact reverse of 'decodeGameDataRange', so the parameters work the same way
+	:param decodedRange: The decoded bytes to encode
+	:param game: The game that the data is for, since each game encodes differently
+	:param encodedGameDataLength: The length of the whole entry, since encoding depends on it
+	:param startIndex: The index in the whole entry where the provided range starts
+	:param previousEncodedByte: The encoded byte just before the range. Thimbleweed Park and Delores need this if the start index isn't 0
+	:return: The encoded range
+	"""
+	return encodeGameDataInPlace(bytearray(decodedRange), game, encodedGameDataLength, startIndex, previousEncodedByte)
+
+def encodeGameDataInPlace(gameDataRange: Union[bytearray, memoryview], game: Game, encodedGameDataLength: int, startIndex: int = 0, previousEncodedByte: Union[None, int] = None) -> Union[bytearray, memoryview]:
+	"""
+	Encode (a part of) data in the provided buffer itself, the reverse of 'decodeGameDataInPlace'
+	:param gameDataRange: The decoded bytes to encode. This needs to be writable, like a bytearray or a memoryview of one, since it gets changed in place
+	:return: The same buffer that was passed in, for convenience
+	"""
+	if game == Game.RETURN_TO_MONKEY_ISLAND:
+		# Return To Monkey Island just XORs with a keystream, so encoding and decoding are the same
+		return decodeGameDataInPlace(gameDataRange, game, encodedGameDataLength, startIndex)
+	with memoryview(gameDataRange) as rangeView:
+		rangeView = rangeView.cast('B')
+		_verifyRange(len(rangeView), game, encodedGameDataLength, startIndex, previousEncodedByte)
+		if len(rangeView) == 0:
+			return gameDataRange
+		if game == Game.THIMBLEWEED_PARK:
+			# The extra decoding step happens after the XOR decoding, so undo it first
+			if IS_AVAILABLE:
+				rangeArray = numpy.frombuffer(rangeView, dtype=numpy.uint8)
+				_applyThimbleweedParkExtraDecoding(rangeArray, startIndex, encodedGameDataLength)
+				_encodeXorFeedbackInPlace(rangeArray, _THIMBLEWEED_PARK_KEYSTREAM, encodedGameDataLength, startIndex, previousEncodedByte)
+			else:
+				_applyThimbleweedParkExtraDecodingByteByByte(rangeView, startIndex, encodedGameDataLength)
+				_encodeXorFeedbackRangeByteByByte(rangeView, Keys.THIMBLEWEED_PARK_MAGIC_NUMBER, Keys.THIMBLEWEED_PARK_KEY, encodedGameDataLength, startIndex, previousEncodedByte)
+		elif game == Game.DELORES:
+			if IS_AVAILABLE:
+				_encodeXorFeedbackInPlace(numpy.frombuffer(rangeView, dtype=numpy.uint8), _DELORES_KEYSTREAM, encodedGameDataLength, startIndex, previousEncodedByte)
+			else:
+				_encodeXorFeedbackRangeByteByByte(rangeView, Keys.DELORES_MAGIC_NUMBER, Keys.DELORES_KEY, encodedGameDataLength, startIndex, previousEncodedByte)
+		else:
+			raise NotImplementedError(f"Encoding for the game '{game}' is not implemented")
+	return gameDataRange
+
+def _encodeXorFeedbackRangeByteByByte(rangeToEncode: Union[bytearray, memoryview], magicNumber: int, key: bytes, encodedGameDataLength: int, startIndex: int, previousEncodedByte: Union[None, int]):
+	decodeSum = _getStartDecodeSum(magicNumber, key, encodedGameDataLength, startIndex, previousEncodedByte)
+	for rangeIndex in range(len(rangeToEncode)):
+		index = startIndex + rangeIndex
+		keyByte = (((index & 255) * magicNumber) ^ key[index & 15]) & 255
+		decodedByte = rangeToEncode[rangeIndex]
+		rangeToEncode[rangeIndex] = decodedByte ^ keyByte ^ decodeSum
+		decodeSum = decodeSum ^ decodedByte
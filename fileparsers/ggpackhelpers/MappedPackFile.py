@@ -0,0 +1,116 @@
+"""
+Memory-maps whole ggpacks, so packed entries can be accessed as slices of the mapped file instead of opening, seeking, and reading the ggpack for every entry
+Each ggpack is mapped only once per process, and all entries of that ggpack share that mapping. The operating system's page cache then serves repeated reads of the same data
+"""
+
+import mmap, os, threading
+from typing import Dict, Tuple
+
+from CustomExceptions import DecodeError
+
+
+class MappedPackFile:
+	"""A read-only memory map of a single ggpack file"""
+
+	def __init__(self, packFilePath: str):
+		self._packFilePath: str = packFilePath
+		fileStats = os.stat(packFilePath)
+		# Used to check whether the ggpack changed on disk since it was mapped
+		self._fileState: Tuple[int, int] = (fileStats.st_size, fileStats.st_mtime_ns)
+		with open(packFilePath, 'rb') as packFile:
+			# The map keeps its own handle to the file, so the file itself can be closed again
+			self._mappedFile: mmap.mmap = mmap.mmap(packFile.fileno(), 0, access=mmap.ACCESS_READ)
+		self._isSequentialAccessAdvised: bool = False
+
+	@property
+	def packFilePath(self) -> str:
+		return self._packFilePath
+
+	@property
+	def closed(self) -> bool:
+		return self._mappedFile.closed
+
+	def __len__(self) -> int:
+		return len(self._mappedFile)
+
+	def __getitem__(self, index: int) -> int:
+		return self._mappedFile[index]
+
+	def isOutdated(self) -> bool:
+		"""Check whether the ggpack file changed on disk since it was mapped"""
+		try:
+			fileStats = os.stat(self._packFilePath)
+		except OSError:
+			return True
+		return (fileStats.st_size, fileStats.st_mtime_ns) != self._fileState
+
+	def getRange(self, offset: int, length: int) -> memoryview:
+		"""
+		Get a part of the ggpack without copying it
+		:param offset: Where in the ggpack the range starts
+		:param length: How many bytes the range is long
+		:return: A read-only view of the requested range of the mapped ggpack. Release it or let it go out of scope when done, since the map can't be closed while views of it exist
+		"""
+		if offset < 0 or length < 0 or offset + length > len(self._mappedFile):
+			raise DecodeError(f"Range at offset {offset:,} with length {length:,} doesn't fit in ggpack '{self._packFilePath}' of {len(self._mappedFile):,} bytes")
+		with memoryview(self._mappedFile) as mappedFileView:
+			return mappedFileView[offset:offset + length]
+
+	def adviseSequentialAccess(self):
+		"""Tell the operating system that the ggpack will be read from start to end, so it reads ahead more aggressively and drops pages that were already read sooner. This only works on platforms that support 'madvise'"""
+		if not self._isSequentialAccessAdvised and hasattr(mmap, 'MADV_SEQUENTIAL'):
+			self._mappedFile.madvise(mmap.MADV_SEQUENTIAL)
+		self._isSequentialAccessAdvised = True
+
+	def close(self):
+		self._mappedFile.close()
+
+
+# Maps the absolute path of each mapped ggpack to its map
+_mappedPackFiles: Dict[str, MappedPackFile] = {}
+_mappedPackFilesLock = threading.Lock()
+
+
+def getMappedPackFile(packFilePath: str) -> MappedPackFile:
+	"""
+	Get the shared memory map of the provided ggpack, mapping it if that hasn't happened yet
+	Whether the ggpack changed on disk isn't checked here, since that would need a system call for every entry access. Writing to a ggpack with 'GGPackParser' closes its map, and 'closeOutdatedMappedPackFiles' closes the maps of ggpacks that were changed in other ways
+	:param packFilePath: The path to the ggpack to get the map of
+	:return: The map of the ggpack
+	"""
+	absolutePackFilePath = os.path.abspath(packFilePath)
+	with _mappedPackFilesLock:
+		mappedPackFile = _mappedPackFiles.get(absolutePackFilePath, None)
+		if mappedPackFile is None or mappedPackFile.closed:
+			if mappedPackFile is not None:
+				_closeMappedPackFile(mappedPackFile)
+			mappedPackFile = MappedPackFile(absolutePackFilePath)
+			_mappedPackFiles[absolutePackFilePath] = mappedPackFile
+		return mappedPackFile
+
+def closeMappedPackFile(packFilePath: str):
+	"""Close the shared map of the provided ggpack, if there is one. This needs to be done before the ggpack is written to, since some platforms don't allow changing mapped files"""
+	with _mappedPackFilesLock:
+		mappedPackFile = _mappedPackFiles.pop(os.path.abspath(packFilePath), None)
+		if mappedPackFile is not None:
+			_closeMappedPackFile(mappedPackFile)
+
+def closeOutdatedMappedPackFiles():
+	"""Close the shared maps of the ggpacks that changed on disk since they were mapped, for instance by a game update, so they get mapped again the next time they're used"""
+	with _mappedPackFilesLock:
+		for absolutePackFilePath, mappedPackFile in list(_mappedPackFiles.items()):
+			if mappedPackFile.closed or mappedPackFile.isOutdated():
+				_closeMappedPackFile(_mappedPackFiles.pop(absolutePackFilePath))
+
+def closeAllMappedPackFiles():
+	with _mappedPackFilesLock:
+		for mappedPackFile in _mappedPackFiles.values():
+			_closeMappedPackFile(mappedPackFile)
+		_mappedPackFiles.clear()
+
+def _closeMappedPackFile(mappedPackFile: MappedPackFile):
+	try:
+		mappedPackFile.close()
+	except BufferError:
+		# Some views of the map are still in use. The map gets closed once those are gone, so just stop sharing it
+		pass
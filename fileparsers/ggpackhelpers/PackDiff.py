@@ -0,0 +1,177 @@
+"""
+Compares two versions of a game's ggpacks, for instance from before and after a game patch, without extracting either version
+Entries are matched by filename. Entries with a different size have changed, and entries with the same size only need their encoded data compared, since encoding the same data for the same game always gives the same result
+So only entries that actually changed ever get decoded, and only if a text diff of them was requested
+"""
+
+import concurrent.futures, difflib, json, os
+from typing import Dict, Iterable, List, Tuple, Union
+
+from CustomExceptions import DecodeError
+from fileparsers import DinkParser, GGPackParser
+from fileparsers.dinkhelpers.DinkScript import DinkScript
+from fileparsers.ggpackhelpers import FileIndexCache, MappedPackFile
+from models.FileEntry import FileEntry, FileEntryTable
+from models.PackOverlay import PackOverlay
+
+
+# Text diffs are only made for these file types, the other types are binary or too large to usefully show line by line
+TEXT_DIFF_FILE_EXTENSIONS = ('.anim', '.atlas', '.attach', '.blend', '.bnut', '.byack', '.dink', '.dinky', '.emitter', '.json', '.nut', '.tsv', '.txt', '.wimpy', '.yack')
+
+
+class PackDiff:
+	"""The differences between two versions of a game's ggpacks"""
+
+	def __init__(self):
+		self.addedFileEntries: List[FileEntry] = []
+		self.removedFileEntries: List[FileEntry] = []
+		# The old and the new entry of each changed file
+		self.changedFileEntries: List[Tuple[FileEntry, FileEntry]] = []
+		self.unchangedFileCount: int = 0
+		# Unified diffs of the changed files that have a text representation, if they were requested, stored by filename
+		self.textDiffs: Dict[str, str] = {}
+
+	def __str__(self):
+		return f"{len(self.addedFileEntries):,} files added, {len(self.removedFileEntries):,} files removed, {len(self.changedFileEntries):,} files changed, {self.unchangedFileCount:,} files unchanged"
+
+
+def diffPacks(oldGameFilePaths: List[str], newGameFilePaths: List[str], shouldCreateTextDiffs: bool = False, shouldUseCache: bool = False, maxWorkerCount: int = None) -> PackDiff:
+	"""
+	Find which files were added, removed, and changed between two versions of a game's ggpacks
+	When a file exists in multiple ggpacks of a version, the version the game uses is compared, see 'PackOverlay'
+	:param oldGameFilePaths: The paths to the ggpacks of the old version
+	:param newGameFilePaths: The paths to the ggpacks of the new version
+	:param shouldCreateTextDiffs: If True, a unified diff is made of each changed file with a text representation, see 'TEXT_DIFF_FILE_EXTENSIONS'
+	:param shouldUseCache: Whether file indexes can be loaded from and stored in the cache. Cached content hashes, see 'GGPackParser.getContentHashes', are then also used to skip comparing entries
+	:param maxWorkerCount: The maximum number of processes to compare entries with. If this is None, the number of CPU cores is used. If this is 1, everything gets compared in this process
+	:return: The differences between the two versions
+	"""
+	oldPackOverlay, oldEncodedHashes = _loadVersion(oldGameFilePaths, shouldUseCache, maxWorkerCount)
+	newPackOverlay, newEncodedHashes = _loadVersion(newGameFilePaths, shouldUseCache, maxWorkerCount)
+	packDiff = PackDiff()
+	packDiff.removedFileEntries = [oldPackOverlay.resolve(filename) for filename in oldPackOverlay.filenames if filename not in newPackOverlay]
+	# The pairs of old and new entries that need to be compared or diffed, and whether they're already known to be different
+	fileEntryPairsToCompare: List[Tuple[FileEntry, FileEntry, bool]] = []
+	for filename in newPackOverlay.filenames:
+		newFileEntry = newPackOverlay.resolve(filename)
+		oldFileEntry = oldPackOverlay.resolve(filename)
+		if oldFileEntry is None:
+			packDiff.addedFileEntries.append(newFileEntry)
+			continue
+		isChanged: Union[None, bool] = None
+		if oldFileEntry.size != newFileEntry.size:
+			isChanged = True
+		elif oldFileEntry.game == newFileEntry.game:
+			oldEncodedHash = oldEncodedHashes.get((oldFileEntry.packFilePath, oldFileEntry.offset, oldFileEntry.size), None)
+			newEncodedHash = newEncodedHashes.get((newFileEntry.packFilePath, newFileEntry.offset, newFileEntry.size), None)
+			if oldEncodedHash is not None and newEncodedHash is not None:
+				isChanged = oldEncodedHash != newEncodedHash
+		if isChanged is False:
+			packDiff.unchangedFileCount += 1
+		elif isChanged is None or (shouldCreateTextDiffs and newFileEntry.fileExtension in TEXT_DIFF_FILE_EXTENSIONS):
+			fileEntryPairsToCompare.append((oldFileEntry, newFileEntry, bool(isChanged)))
+		else:
+			packDiff.changedFileEntries.append((oldFileEntry, newFileEntry))
+
+	compareJobs = _groupCompareJobs(fileEntryPairsToCompare)
+	compareJobArguments = [(FileEntryTable.fromFileEntries(oldFileEntry for oldFileEntry, newFileEntry, isKnownChanged in compareJob),
+							FileEntryTable.fromFileEntries(newFileEntry for oldFileEntry, newFileEntry, isKnownChanged in compareJob),
+							[isKnownChanged for oldFileEntry, newFileEntry, isKnownChanged in compareJob], shouldCreateTextDiffs) for compareJob in compareJobs]
+	workerCount = min(len(compareJobs), maxWorkerCount or os.cpu_count() or 1)
+	if workerCount <= 1:
+		# Starting worker processes would only slow things down
+		compareJobResults = [_compareFileEntries(*compareJobArgument) for compareJobArgument in compareJobArguments]
+	else:
+		with concurrent.futures.ProcessPoolExecutor(workerCount) as pool:
+			compareJobResults = list(pool.map(_compareFileEntries, *zip(*compareJobArguments)))
+	for compareJob, compareResults in zip(compareJobs, compareJobResults):
+		for (oldFileEntry, newFileEntry, isKnownChanged), (isChanged, textDiff) in zip(compareJob, compareResults):
+			if not isChanged:
+				packDiff.unchangedFileCount += 1
+				continue
+			packDiff.changedFileEntries.append((oldFileEntry, newFileEntry))
+			if textDiff is not None:
+				packDiff.textDiffs[newFileEntry.filename] = textDiff
+	return packDiff
+
+def _loadVersion(gameFilePaths: List[str], shouldUseCache: bool, maxWorkerCount: Union[None, int]) -> Tuple[PackOverlay, Dict[Tuple[str, int, int], bytes]]:
+	"""Load the file indexes of the ggpacks of a single version. Returns the overlay of the ggpacks, and the cached encoded content hashes of their entries by ggpack, offset, and size, if there are any"""
+	fileEntryTable = FileEntryTable()
+	entryToEncodedHash: Dict[Tuple[str, int, int], bytes] = {}
+	gameFilePaths = PackOverlay.sortPackFilePathsByPrecedence(gameFilePaths)
+	for gameFilePath, fileIndex in GGPackParser.getFileIndexes(gameFilePaths, shouldUseCache, maxWorkerCount).items():
+		if isinstance(fileIndex, BaseException):
+			raise DecodeError(f"Unable to load the file index of '{gameFilePath}' to compare it: {fileIndex}") from fileIndex
+		fileEntryTable.addFileIndex(gameFilePath, fileIndex)
+		contentHashes = FileIndexCache.loadContentHashes(gameFilePath) if shouldUseCache else None
+		if contentHashes is not None and len(contentHashes) == len(fileIndex):
+			entryToEncodedHash.update(zip(((gameFilePath, offset, size) for offset, size in zip(fileIndex.offsets, fileIndex.sizes)), contentHashes.encodedHashes))
+	return PackOverlay(fileEntryTable, gameFilePaths), entryToEncodedHash
+
+def _groupCompareJobs(fileEntryPairs: List[Tuple[FileEntry, FileEntry, bool]]) -> List[List[Tuple[FileEntry, FileEntry, bool]]]:
+	"""Group consecutive pairs of entries into jobs of about 'GGPackParser.HASH_JOB_SIZE' bytes, so they can be sent to the worker processes together"""
+	compareJobs: List[List[Tuple[FileEntry, FileEntry, bool]]] = []
+	compareJob: List[Tuple[FileEntry, FileEntry, bool]] = []
+	compareJobSize = 0
+	for fileEntryPair in fileEntryPairs:
+		if compareJob and compareJobSize + fileEntryPair[1].size > GGPackParser.HASH_JOB_SIZE:
+			compareJobs.append(compareJob)
+			compareJob = []
+			compareJobSize = 0
+		compareJob.append(fileEntryPair)
+		compareJobSize += fileEntryPair[1].size
+	if compareJob:
+		compareJobs.append(compareJob)
+	return compareJobs
+
+def _compareFileEntries(oldFileEntries: Iterable[FileEntry], newFileEntries: Iterable[FileEntry], isKnownChangedList: List[bool], shouldCreateTextDiffs: bool) -> List[Tuple[bool, Union[None, str]]]:
+	"""Compare each old entry with its new entry, and diff the text of the ones that changed if that's requested. This runs in a worker process. Returns for each pair whether it changed, and its text diff if one was made"""
+	compareResults: List[Tuple[bool, Union[None, str]]] = []
+	for oldFileEntry, newFileEntry, isKnownChanged in zip(oldFileEntries, newFileEntries, isKnownChangedList):
+		isChanged = isKnownChanged or not _isFileEntryDataEqual(oldFileEntry, newFileEntry)
+		textDiff = None
+		if isChanged and shouldCreateTextDiffs and newFileEntry.fileExtension in TEXT_DIFF_FILE_EXTENSIONS:
+			textDiff = _createTextDiff(oldFileEntry, newFileEntry)
+		compareResults.append((isChanged, textDiff))
+	return compareResults
+
+def _isFileEntryDataEqual(oldFileEntry: FileEntry, newFileEntry: FileEntry) -> bool:
+	if oldFileEntry.size != newFileEntry.size:
+		return False
+	if oldFileEntry.game != newFileEntry.game:
+		# Different games encode the same data differently, so only the decoded data can be compared
+		return GGPackParser.hashPackedFile(oldFileEntry)[1] == GGPackParser.hashPackedFile(newFileEntry)[1]
+	oldMappedPackFile = MappedPackFile.getMappedPackFile(oldFileEntry.packFilePath)
+	newMappedPackFile = MappedPackFile.getMappedPackFile(newFileEntry.packFilePath)
+	for startIndex in range(0, oldFileEntry.size, GGPackParser.DECODE_CHUNK_SIZE):
+		chunkSize = min(GGPackParser.DECODE_CHUNK_SIZE, oldFileEntry.size - startIndex)
+		with oldMappedPackFile.getRange(oldFileEntry.offset + startIndex, chunkSize) as oldChunk, newMappedPackFile.getRange(newFileEntry.offset + startIndex, chunkSize) as newChunk:
+			# Comparing bytes is a lot quicker than comparing memoryviews
+			if oldChunk.tobytes() != newChunk.tobytes():
+				return False
+	return True
+
+def _createTextDiff(oldFileEntry: FileEntry, newFileEntry: FileEntry) -> Union[None, str]:
+	"""Create a unified diff of the text representations of the provided entries, or return None if they don't have a text representation"""
+	try:
+		oldText = _getPackedFileText(oldFileEntry)
+		newText = _getPackedFileText(newFileEntry)
+	except Exception as e:
+		return f"Unable to create a text diff: {e}"
+	if oldText is None or newText is None:
+		return None
+	return ''.join(difflib.unified_diff(oldText.splitlines(keepends=True), newText.splitlines(keepends=True), f"old/{oldFileEntry.filename}", f"new/{newFileEntry.filename}"))
+
+def _getPackedFileText(fileEntry: FileEntry) -> Union[None, str]:
+	"""Convert the provided entry to text the same way 'GGPackParser.savePackedFile' does, or return None if it doesn't convert to text"""
+	fileData = GGPackParser.getConvertedPackedFile(fileEntry)
+	if isinstance(fileData, str):
+		return fileData
+	elif isinstance(fileData, dict):
+		if fileData and isinstance(next(iter(fileData.values())), DinkScript):
+			return DinkParser.fromDinkScriptDictToStrings(fileData)
+		return json.dumps(fileData, indent=2)
+	elif isinstance(fileData, list) and all(isinstance(row, list) for row in fileData):
+		# A table from a tab-separated file
+		return '\n'.join('\t'.join(row) for row in fileData)
+	return None
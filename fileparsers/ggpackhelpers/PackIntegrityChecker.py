@@ -0,0 +1,171 @@
+"""
+Checks whether a ggpack is sound, for instance a mod ggpack made with 'GGPackParser.createPackFile'
+First the structure gets checked: the header and file index, whether every entry fits in the ggpack, and whether entries overlap
+Then every entry gets decoded and converted like it would be when it's shown, spread over multiple processes, to find entries that the parsers can't handle and entries that take unusually long
+"""
+
+import concurrent.futures, os, statistics, time
+from typing import Dict, List, Tuple, Union
+
+import Utils
+from enums.Game import Game
+from fileparsers import GGPackParser
+from models.FileEntry import FileEntryTable
+from models.FileIndexColumns import FileIndexColumns
+
+
+# The data of a ggpack starts after its header, the offset and size of the file index
+_PACK_HEADER_SIZE = 8
+# An entry is a timing outlier if converting it took this many times longer per byte than is usual for its file type...
+_TIMING_OUTLIER_FACTOR = 10
+# ...and it took at least this many seconds, so quick entries don't get reported because of measuring noise
+_MIN_TIMING_OUTLIER_DURATION = 0.1
+# Entries smaller than this are counted as this size when calculating the time per byte, since for small entries the fixed cost of converting dominates
+_MIN_TIMING_ENTRY_SIZE = 4096
+# Roughly how many times its own size converting an entry can take in memory, for instance because an image gets decompressed, and how much memory a worker process uses by itself
+_CONVERSION_MEMORY_FACTOR = 4
+_WORKER_BASE_MEMORY_USAGE = 128 * 1024 * 1024
+
+
+class PackIntegrityReport:
+	"""The results of checking a single ggpack"""
+
+	def __init__(self, gameFilePath: str):
+		self.gameFilePath: str = gameFilePath
+		self.entryCount: int = 0
+		# The error that occurred while reading the header or file index. If this is set, nothing else could be checked
+		self.fileIndexError: Union[None, str] = None
+		# Problems with the layout of the entries, like entries that don't fit in the ggpack or that overlap
+		self.structureProblems: List[str] = []
+		# The filename and error of each entry that couldn't be converted
+		self.conversionErrors: List[Tuple[str, str]] = []
+		# The filename, conversion duration, and usual duration for an entry of that type and size, of each entry that took unusually long to convert
+		self.timingOutliers: List[Tuple[str, float, float]] = []
+		self.convertedEntryCount: int = 0
+		self.totalConversionDuration: float = 0.0
+
+	@property
+	def isValid(self) -> bool:
+		return self.fileIndexError is None and not self.structureProblems and not self.conversionErrors
+
+	def __str__(self):
+		lines = [f"Integrity of '{self.gameFilePath}': {'OK' if self.isValid else 'PROBLEMS FOUND'}"]
+		if self.fileIndexError:
+			lines.append(f"  Unable to read the file index: {self.fileIndexError}")
+			return '\n'.join(lines)
+		lines.append(f"  {self.entryCount:,} entries, {self.convertedEntryCount:,} converted in {self.totalConversionDuration:.1f} seconds of processing time")
+		lines.extend(f"  Structure: {structureProblem}" for structureProblem in self.structureProblems)
+		lines.extend(f"  Conversion of '{filename}' failed: {error}" for filename, error in self.conversionErrors)
+		lines.extend(f"  Conversion of '{filename}' took {duration:.2f} seconds, usually about {usualDuration:.2f} seconds" for filename, duration, usualDuration in self.timingOutliers)
+		return '\n'.join(lines)
+
+
+def checkPackIntegrity(gameFilePath: str, shouldConvertEntries: bool = True, maxWorkerCount: int = None, maxMemoryUsage: int = 2 * 1024 * 1024 * 1024) -> PackIntegrityReport:
+	"""
+	Check the structure of the provided ggpack, and optionally whether all its entries can be converted
+	:param gameFilePath: The path to the ggpack to check
+	:param shouldConvertEntries: If True, every entry that fits in the ggpack gets converted with 'GGPackParser.getConvertedPackedFile', and conversion errors and timing outliers get reported. If False, only the structure is checked
+	:param maxWorkerCount: The maximum number of processes to convert entries with. If this is None, the number of CPU cores is used. If this is 1, everything gets converted in this process
+	:param maxMemoryUsage: Roughly how many bytes of memory the worker processes can use together. Fewer workers get used if converting the largest entry in each of them at once could use more than this. Entries are read through a memory map and converted one at a time, so memory usage doesn't depend on the size of the ggpack itself
+	:return: The report with all the problems that were found
+	"""
+	report = PackIntegrityReport(gameFilePath)
+	try:
+		# This checks the header, and whether the file index fits in the ggpack and can be parsed
+		fileIndex = GGPackParser.getFileIndexColumns(gameFilePath)
+		with open(gameFilePath, 'rb') as gameFile:
+			fileIndexOffset = Utils.readInt(gameFile)
+	except Exception as e:
+		report.fileIndexError = f"{type(e).__name__}: {e}"
+		return report
+	report.entryCount = len(fileIndex)
+	if Game.ggpackPathToGameName(gameFilePath) == Game.UNKNOWN:
+		report.structureProblems.append(f"The game can't be determined from the filename '{os.path.basename(gameFilePath)}', so entries can't be decoded")
+	validEntryIndexes = _checkEntryRanges(fileIndex, fileIndexOffset, report)
+	if shouldConvertEntries and validEntryIndexes:
+		_checkEntryConversions(gameFilePath, fileIndex, validEntryIndexes, maxWorkerCount, maxMemoryUsage, report)
+	return report
+
+def _checkEntryRanges(fileIndex: FileIndexColumns, fileIndexOffset: int, report: PackIntegrityReport) -> List[int]:
+	"""Check that each entry lies between the header and the file index, and that entries don't overlap or share a filename. Returns the indexes of the entries that lie within the ggpack's data"""
+	validEntryIndexes: List[int] = []
+	filenameCounts: Dict[str, int] = {}
+	for entryIndex, (filename, offset, size) in enumerate(zip(fileIndex.filenames, fileIndex.offsets, fileIndex.sizes)):
+		filenameCounts[filename] = filenameCounts.get(filename, 0) + 1
+		if offset < _PACK_HEADER_SIZE or offset + size > fileIndexOffset:
+			report.structureProblems.append(f"Entry '{filename}' at offset {offset:,} with size {size:,} doesn't fit between the header and the file index at offset {fileIndexOffset:,}")
+		else:
+			validEntryIndexes.append(entryIndex)
+	for filename, filenameCount in filenameCounts.items():
+		if filenameCount > 1:
+			report.structureProblems.append(f"Filename '{filename}' is used by {filenameCount:,} entries")
+	# After sorting by offset, an entry can only overlap with the entry that reaches furthest among the entries before it
+	furthestEntryIndex: Union[None, int] = None
+	for entryIndex in sorted(validEntryIndexes, key=lambda validEntryIndex: (fileIndex.offsets[validEntryIndex], fileIndex.sizes[validEntryIndex])):
+		if furthestEntryIndex is not None and fileIndex.offsets[entryIndex] < fileIndex.offsets[furthestEntryIndex] + fileIndex.sizes[furthestEntryIndex] and fileIndex.sizes[entryIndex] > 0:
+			report.structureProblems.append(f"Entry '{fileIndex.filenames[entryIndex]}' at offset {fileIndex.offsets[entryIndex]:,} overlaps with entry '{fileIndex.filenames[furthestEntryIndex]}' at offset {fileIndex.offsets[furthestEntryIndex]:,}")
+		if furthestEntryIndex is None or fileIndex.offsets[entryIndex] + fileIndex.sizes[entryIndex] > fileIndex.offsets[furthestEntryIndex] + fileIndex.sizes[furthestEntryIndex]:
+			furthestEntryIndex = entryIndex
+	return validEntryIndexes
+
+def _checkEntryConversions(gameFilePath: str, fileIndex: FileIndexColumns, entryIndexes: List[int], maxWorkerCount: Union[None, int], maxMemoryUsage: int, report: PackIntegrityReport):
+	"""Convert the provided entries in worker processes, and add the conversion errors and timing outliers to the report"""
+	game = Game.ggpackPathToGameName(gameFilePath)
+	conversionJobs: List[List[int]] = [[]]
+	conversionJobSize = 0
+	for entryIndex in entryIndexes:
+		if conversionJobs[-1] and conversionJobSize + fileIndex.sizes[entryIndex] > GGPackParser.HASH_JOB_SIZE:
+			conversionJobs.append([])
+			conversionJobSize = 0
+		conversionJobs[-1].append(entryIndex)
+		conversionJobSize += fileIndex.sizes[entryIndex]
+	conversionJobTables: List[FileEntryTable] = []
+	for conversionJob in conversionJobs:
+		conversionJobTable = FileEntryTable()
+		for entryIndex in conversionJob:
+			conversionJobTable.addFileEntry(fileIndex.filenames[entryIndex], fileIndex.offsets[entryIndex], fileIndex.sizes[entryIndex], gameFilePath, game)
+		conversionJobTables.append(conversionJobTable)
+
+	largestEntrySize = max(fileIndex.sizes[entryIndex] for entryIndex in entryIndexes)
+	memoryLimitedWorkerCount = maxMemoryUsage // (_WORKER_BASE_MEMORY_USAGE + largestEntrySize * _CONVERSION_MEMORY_FACTOR)
+	workerCount = max(1, min(len(conversionJobTables), maxWorkerCount or os.cpu_count() or 1, memoryLimitedWorkerCount))
+	if workerCount <= 1:
+		conversionJobResults = [_convertFileEntries(conversionJobTable) for conversionJobTable in conversionJobTables]
+	else:
+		# Jobs are at most about 'GGPackParser.HASH_JOB_SIZE' bytes and the worker count is limited by the memory budget, so memory usage stays bounded without replacing workers
+		with concurrent.futures.ProcessPoolExecutor(workerCount) as pool:
+			conversionJobResults = list(pool.map(_convertFileEntries, conversionJobTables))
+
+	fileExtensionToDurationsPerByte: Dict[str, List[float]] = {}
+	entryResults: List[Tuple[str, str, int, float]] = []
+	for conversionJob, conversionJobTable, conversionResults in zip(conversionJobs, conversionJobTables, conversionJobResults):
+		for rowIndex, (entryIndex, (duration, conversionError)) in enumerate(zip(conversionJob, conversionResults)):
+			filename = fileIndex.filenames[entryIndex]
+			report.convertedEntryCount += 1
+			report.totalConversionDuration += duration
+			if conversionError is not None:
+				report.conversionErrors.append((filename, conversionError))
+				continue
+			fileExtension = conversionJobTable.getFileExtensionOfRow(rowIndex)
+			timingSize = max(fileIndex.sizes[entryIndex], _MIN_TIMING_ENTRY_SIZE)
+			fileExtensionToDurationsPerByte.setdefault(fileExtension, []).append(duration / timingSize)
+			entryResults.append((filename, fileExtension, timingSize, duration))
+	fileExtensionToMedianDurationPerByte = {fileExtension: statistics.median(durationsPerByte) for fileExtension, durationsPerByte in fileExtensionToDurationsPerByte.items()}
+	for filename, fileExtension, timingSize, duration in entryResults:
+		usualDuration = fileExtensionToMedianDurationPerByte[fileExtension] * timingSize
+		if duration >= _MIN_TIMING_OUTLIER_DURATION and duration > usualDuration * _TIMING_OUTLIER_FACTOR:
+			report.timingOutliers.append((filename, duration, usualDuration))
+	report.timingOutliers.sort(key=lambda timingOutlier: timingOutlier[1], reverse=True)
+
+def _convertFileEntries(fileEntryTable: FileEntryTable) -> List[Tuple[float, Union[None, str]]]:
+	"""Convert each of the provided entries and time how long that takes. This runs in a worker process. Returns for each entry the duration in seconds, and the error if converting failed"""
+	conversionResults: List[Tuple[float, Union[None, str]]] = []
+	for fileEntry in fileEntryTable:
+		startTime = time.perf_counter()
+		try:
+			GGPackParser.getConvertedPackedFile(fileEntry)
+			conversionError = None
+		except Exception as e:
+			conversionError = f"{type(e).__name__}: {e}"
+		conversionResults.append((time.perf_counter() - startTime, conversionError))
+	return conversionResults
@@ -0,0 +1,159 @@
+"""
+Decides where files go in a ggpack, so files that get read together are stored close together, and reports how well a ggpack's layout suits sequential and memory-mapped reads
+Files are grouped by when they are usually needed: scripts and text get loaded at startup, then room and animation data, then textures, each directly after the atlas that describes it, and finally fonts and sounds, which are large and get streamed
+Large entries can also be aligned to page boundaries, so reading them through a memory map doesn't touch a page more than needed
+"""
+
+import mmap
+from typing import Dict, Iterable, List, Tuple, Union
+
+from models.FileEntry import FileEntryTable
+from models.FileIndexColumns import FileIndexColumns
+
+
+PAGE_SIZE = mmap.PAGESIZE
+# Entries at least this large get aligned to a page boundary, smaller entries would waste too much space on padding relative to their size
+LARGE_ENTRY_SIZE = 64 * 1024
+
+_TEXTURE_FILE_EXTENSIONS = ('.ktx', '.ktxbz', '.png')
+# Files that describe how a texture is split up. A '.json' file is only counted as an atlas if there's a texture with the same name
+_ATLAS_FILE_EXTENSIONS = ('.atlas', '.json')
+# The groups that files get stored in, in order. Files with an extension that isn't listed here get stored with the data files
+_FILE_EXTENSION_GROUPS: Tuple[Tuple[str, ...], ...] = (
+	('.bnut', '.byack', '.dink', '.dinky', '.nut', '.tsv', '.txt', '.yack'),
+	('.anim', '.attach', '.blend', '.emitter', '.fnt', '.json', '.lip', '.wimpy'),
+	_TEXTURE_FILE_EXTENSIONS,
+	('.otf', '.ttf'),
+	('.assets.bank', '.bank', '.ogg', '.strings.bank', '.wav')
+)
+_FILE_EXTENSION_TO_GROUP_INDEX: Dict[str, int] = {fileExtension: groupIndex for groupIndex, fileExtensions in enumerate(_FILE_EXTENSION_GROUPS) for fileExtension in fileExtensions}
+_UNKNOWN_GROUP_INDEX = 1
+_TEXTURE_GROUP_INDEX = _FILE_EXTENSION_TO_GROUP_INDEX[_TEXTURE_FILE_EXTENSIONS[0]]
+
+
+def getOptimizedFileOrder(filenames: Union[List[str], Tuple[str]]) -> List[str]:
+	"""
+	Sort the provided files into the order they should be stored in a ggpack, so files that get read together are stored next to each other
+	Outside the texture group, files are sorted by file extension and then by name, so for instance all '.lip' files end up together. In the texture group, each atlas is followed by its texture
+	:param filenames: The paths of the files to sort. Only the filenames themselves are used to decide the order
+	:return: The same paths, in their optimized order. Files that would be stored in the same place keep their original order
+	"""
+	textureNames = set()
+	for filename in filenames:
+		name, fileExtension = _splitFilename(filename)
+		if fileExtension in _TEXTURE_FILE_EXTENSIONS:
+			textureNames.add(name)
+
+	def getSortKey(filename: str) -> Tuple[int, str, str]:
+		name, fileExtension = _splitFilename(filename)
+		if fileExtension in _TEXTURE_FILE_EXTENSIONS or (fileExtension in _ATLAS_FILE_EXTENSIONS and name in textureNames):
+			# Sort by name first, so an atlas and its texture end up next to each other, and put the atlas first since it's needed to use the texture
+			return _TEXTURE_GROUP_INDEX, name, '' if fileExtension in _ATLAS_FILE_EXTENSIONS else fileExtension
+		return _FILE_EXTENSION_TO_GROUP_INDEX.get(fileExtension, _UNKNOWN_GROUP_INDEX), fileExtension, name
+
+	return sorted(filenames, key=getSortKey)
+
+def getAlignmentPaddingSize(entryOffset: int, entrySize: int) -> int:
+	"""Get how many padding bytes to write before an entry of the provided size, so that it starts at a page boundary if it's large enough to be aligned"""
+	if entrySize < LARGE_ENTRY_SIZE:
+		return 0
+	return -entryOffset % PAGE_SIZE
+
+def _splitFilename(filename: str) -> Tuple[str, str]:
+	"""Split the provided path into the lowercase name of the file and its file extension, splitting at the first period, like 'FileEntryTable.getFileExtension' does"""
+	filename = filename.replace('\\', '/').rsplit('/', 1)[-1].lower()
+	return filename.split('.', 1)[0], FileEntryTable.getFileExtension(filename)
+
+
+class FileExtensionLayoutStats:
+	"""How the entries with a single file extension are laid out in a ggpack"""
+
+	def __init__(self, fileExtension: str, entryCount: int, byteCount: int, spanByteCount: int, pageCount: int):
+		self.fileExtension: str = fileExtension
+		self.entryCount: int = entryCount
+		# The total size of all the entries
+		self.byteCount: int = byteCount
+		# The distance from the start of the first entry to the end of the last entry
+		self.spanByteCount: int = spanByteCount
+		# How many pages need to be read to read all these entries
+		self.pageCount: int = pageCount
+
+	@property
+	def locality(self) -> float:
+		"""How much of the range spanned by these entries is taken up by these entries themselves, from 0 to 1. At 1, reading all these entries is a single sequential read"""
+		return self.byteCount / self.spanByteCount if self.spanByteCount else 1.0
+
+	@property
+	def minimumPageCount(self) -> int:
+		"""How many pages would need to be read to read all these entries if they were stored together"""
+		return -(-self.byteCount // PAGE_SIZE)
+
+	def __str__(self):
+		return f"{self.fileExtension}: {self.entryCount:,} entries, {self.byteCount:,} bytes, locality {self.locality:.1%}, {self.pageCount:,} pages read, at least {self.minimumPageCount:,} needed"
+
+
+class PackLayoutReport:
+	"""The expected read locality of a ggpack, per file extension, and how many of its large entries are aligned to page boundaries"""
+
+	def __init__(self, fileIndex: FileIndexColumns):
+		"""
+		:param fileIndex: The file index of the ggpack to report on, as returned by 'GGPackParser.getFileIndexColumns'
+		"""
+		self.fileExtensionStats: Dict[str, FileExtensionLayoutStats] = {}
+		self.largeEntryCount: int = 0
+		self.alignedLargeEntryCount: int = 0
+		# Bytes between entries that don't belong to any entry, for instance alignment padding
+		self.unusedByteCount: int = 0
+
+		fileExtensionToEntries: Dict[str, List[Tuple[int, int]]] = {}
+		for filename, entryOffset, entrySize in zip(fileIndex.filenames, fileIndex.offsets, fileIndex.sizes):
+			fileExtensionToEntries.setdefault(FileEntryTable.getFileExtension(filename), []).append((entryOffset, entrySize))
+			if entrySize >= LARGE_ENTRY_SIZE:
+				self.largeEntryCount += 1
+				if entryOffset % PAGE_SIZE == 0:
+					self.alignedLargeEntryCount += 1
+		for fileExtension in sorted(fileExtensionToEntries):
+			self.fileExtensionStats[fileExtension] = _getFileExtensionLayoutStats(fileExtension, fileExtensionToEntries[fileExtension])
+		self.unusedByteCount = _getUnusedByteCount(zip(fileIndex.offsets, fileIndex.sizes))
+
+	@property
+	def locality(self) -> float:
+		"""The locality of all file extensions together, weighted by the size of their entries"""
+		byteCount = sum(stats.byteCount for stats in self.fileExtensionStats.values())
+		spanByteCount = sum(stats.spanByteCount for stats in self.fileExtensionStats.values())
+		return byteCount / spanByteCount if spanByteCount else 1.0
+
+	def __str__(self):
+		lines = [f"Pack layout: locality {self.locality:.1%}, {self.alignedLargeEntryCount:,} of {self.largeEntryCount:,} large entries page-aligned, {self.unusedByteCount:,} unused bytes between entries"]
+		lines.extend(f"  {stats}" for stats in self.fileExtensionStats.values())
+		return '\n'.join(lines)
+
+def _getFileExtensionLayoutStats(fileExtension: str, entries: List[Tuple[int, int]]) -> FileExtensionLayoutStats:
+	entries.sort()
+	byteCount = 0
+	spanStart = entries[0][0]
+	spanEnd = spanStart
+	pageCount = 0
+	lastCountedPage = -1
+	for entryOffset, entrySize in entries:
+		byteCount += entrySize
+		if entrySize == 0:
+			continue
+		spanEnd = max(spanEnd, entryOffset + entrySize)
+		# Entries are sorted by offset, so a page can only be shared with the previous entries, which counted up to 'lastCountedPage'
+		firstPage = max(entryOffset // PAGE_SIZE, lastCountedPage + 1)
+		lastPage = (entryOffset + entrySize - 1) // PAGE_SIZE
+		if lastPage >= firstPage:
+			pageCount += lastPage - firstPage + 1
+			lastCountedPage = lastPage
+	return FileExtensionLayoutStats(fileExtension, len(entries), byteCount, spanEnd - spanStart, pageCount)
+
+def _getUnusedByteCount(entries: Iterable[Tuple[int, int]]) -> int:
+	unusedByteCount = 0
+	# The data of a ggpack starts after its header, the offset and size of the file index
+	previousEntryEnd = 8
+	for entryOffset, entrySize in sorted(entries):
+		if entryOffset > previousEntryEnd:
+			unusedByteCount += entryOffset - previousEntryEnd
+		previousEntryEnd = max(previousEntryEnd, entryOffset + entrySize)
+	return unusedByteCount
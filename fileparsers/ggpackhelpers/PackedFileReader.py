@@ -0,0 +1,86 @@
+import io
+from typing import Union
+
+from fileparsers.ggpackhelpers import GameDataCodec, MappedPackFile
+from models.FileEntry import FileEntry
+
+
+class PackedFileReader(io.RawIOBase):
+	"""
+	A read-only file-like object for a single packed file entry. Seeking is supported, and only the parts of the entry that are actually read get read from the ggpack and decoded
+	Wrap it in an 'io.BufferedReader' if a lot of small reads are going to be done
+	"""
+
+	def __init__(self, fileEntry: FileEntry):
+		super().__init__()
+		self._fileEntry: FileEntry = fileEntry
+		# Sound bank files aren't encoded, so those can be passed through as they are
+		self._isEncoded: bool = fileEntry.fileExtension != '.assets.bank'
+		self._position: int = 0
+		self._mappedPackFile: MappedPackFile.MappedPackFile = MappedPackFile.getMappedPackFile(fileEntry.packFilePath)
+
+	@property
+	def fileEntry(self) -> FileEntry:
+		return self._fileEntry
+
+	def readable(self) -> bool:
+		return True
+
+	def seekable(self) -> bool:
+		return True
+
+	def tell(self) -> int:
+		return self._position
+
+	def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+		if whence == io.SEEK_SET:
+			newPosition = offset
+		elif whence == io.SEEK_CUR:
+			newPosition = self._position + offset
+		elif whence == io.SEEK_END:
+			newPosition = self._fileEntry.size + offset
+		else:
+			raise ValueError(f"Invalid 'whence' value {whence}")
+		if newPosition < 0:
+			raise ValueError(f"Negative seek position {newPosition:,}")
+		self._position = newPosition
+		return self._position
+
+	def readinto(self, buffer) -> int:
+		if self.closed:
+			raise ValueError("I/O operation on closed file")
+		with memoryview(buffer) as bufferView:
+			bufferView = bufferView.cast('B')
+			bytesToRead = min(len(bufferView), self._fileEntry.size - self._position)
+			if bytesToRead <= 0:
+				return 0
+			# Copy from the map of the ggpack straight into the provided buffer and decode it there, so the data doesn't need to be copied again
+			self._readRangeInto(self._position, bufferView[:bytesToRead])
+		self._position += bytesToRead
+		return bytesToRead
+
+	def readRange(self, startIndex: int, length: int) -> bytearray:
+		"""Read and decode the provided range of the entry, without changing the current position"""
+		decodedRange = bytearray(length)
+		self._readRangeInto(startIndex, decodedRange)
+		return decodedRange
+
+	def _readRangeInto(self, startIndex: int, rangeBuffer: Union[bytearray, memoryview]):
+		if self.closed:
+			raise ValueError("I/O operation on closed file")
+		length = len(rangeBuffer)
+		if startIndex < 0 or startIndex + length > self._fileEntry.size:
+			raise ValueError(f"Range from {startIndex:,} with length {length:,} doesn't fit in entry '{self._fileEntry.filename}' of {self._fileEntry.size:,} bytes")
+		if self._fileEntry.offset + startIndex + length > len(self._mappedPackFile):
+			raise EOFError(f"Tried to read {length:,} bytes from entry '{self._fileEntry.filename}' at index {startIndex:,}, but the ggpack only has {len(self._mappedPackFile):,} bytes")
+		with self._mappedPackFile.getRange(self._fileEntry.offset + startIndex, length) as encodedRange:
+			rangeBuffer[:] = encodedRange
+		if self._isEncoded:
+			# Thimbleweed Park and Delores decoding needs the encoded byte before the range
+			previousEncodedByte = self._mappedPackFile[self._fileEntry.offset + startIndex - 1] if startIndex > 0 else None
+			GameDataCodec.decodeGameDataInPlace(rangeBuffer, self._fileEntry.game, self._fileEntry.size, startIndex, previousEncodedByte)
+
+	def close(self):
+		# The map of the ggpack is shared with other readers, so it stays open
+		self._mappedPackFile = None
+		super().close()
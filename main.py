@@ -2,6 +2,7 @@ import multiprocessing, sys
 
 from PySide6.QtWidgets import QApplication
 
+from fileparsers.ggpackhelpers import PackIntegrityChecker
 from ui.MainWindow import MainWindow
 
 
@@ -9,11 +10,21 @@ if __name__ == '__main__':
 	multiprocessing.freeze_support()  # This is needed to make multiprocessing work in a PyInstaller EXE
 	gamepath = None
 	filenameFilter = None
+	packPathsToVerify = []
 	for arg in sys.argv[1:]:
 		if arg.startswith('gamepath='):
 			gamepath = arg.split('=', 1)[1]
 		elif arg.startswith('filter='):
 			filenameFilter = arg.split('=', 1)[1]
+		elif arg.startswith('verify='):
+			packPathsToVerify.append(arg.split('=', 1)[1])
+
+	if packPathsToVerify:
+		# Check the provided ggpacks and print the results, without starting the user interface
+		integrityReports = [PackIntegrityChecker.checkPackIntegrity(packPathToVerify) for packPathToVerify in packPathsToVerify]
+		for integrityReport in integrityReports:
+			print(integrityReport)
+		sys.exit(0 if all(integrityReport.isValid for integrityReport in integrityReports) else 1)
 
 	app = QApplication()
 	app.setApplicationName("ThimbleMonkey")
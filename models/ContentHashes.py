@@ -0,0 +1,25 @@
+import hashlib
+from typing import List
+
+
+class ContentHashes:
+	"""
+	Hashes of the contents of all the entries of a ggpack, in the same order as the entries in its file index
+	Each entry has a hash of its encoded data as stored in the ggpack, and a hash of its decoded data. Entries with the same decoded hash hold the same file, even if they have different names or are in different ggpacks
+	"""
+	HASH_SIZE: int = 16
+
+	def __init__(self, encodedHashes: List[bytes], decodedHashes: List[bytes]):
+		self.encodedHashes: List[bytes] = encodedHashes
+		self.decodedHashes: List[bytes] = decodedHashes
+
+	@staticmethod
+	def createHash():
+		"""Create the hash object that content hashes are calculated with, so hashes calculated elsewhere, for instance of an exported file, can be compared to these"""
+		return hashlib.blake2b(digest_size=ContentHashes.HASH_SIZE)
+
+	def __len__(self) -> int:
+		return len(self.decodedHashes)
+
+	def __str__(self):
+		return f"Content hashes of {len(self.decodedHashes):,} entries"
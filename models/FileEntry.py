@@ -1,34 +1,235 @@
-import os
-from typing import Union
+import array, sys
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
 
 from enums.Game import Game
+from models.FileIndexColumns import FileIndexColumns
+
+
+class FileEntryTable:
+	"""
+	Stores many packed file entries compactly, as columns instead of as separate objects.
+	Filenames are interned, ggpacks and file extensions are stored once in their own tables and referred to by ID, and offsets and sizes are stored in typed arrays.
+	This keeps memory usage low, makes the table cheap to send to other processes, and allows for quick filtering and statistics over all entries.
+	Use 'FileEntry' objects, which are views of a row in this table, where a single entry is needed
+	"""
+
+	def __init__(self):
+		self._packFilePaths: List[str] = []
+		self._packGames: List[Game] = []
+		self._packFilePathToPackId: Dict[str, int] = {}
+		self._fileExtensions: List[str] = []
+		self._fileExtensionToFileExtensionId: Dict[str, int] = {}
+		self._filenames: List[str] = []
+		self._packIds: array.array = array.array('H')
+		self._offsets: array.array = array.array('Q')
+		self._sizes: array.array = array.array('Q')
+		self._fileExtensionIds: array.array = array.array('H')
+
+	@staticmethod
+	def getFileExtension(filename: str) -> str:
+		# Split at the first period, so we can distinguish between, for instance, '.strings.bank' and '.assets.bank'
+		return '.' + filename.split('.', 1)[-1]
+
+	def _getPackId(self, packFilePath: str, game: Game) -> int:
+		packId = self._packFilePathToPackId.get(packFilePath, None)
+		if packId is None:
+			packId = len(self._packFilePaths)
+			self._packFilePaths.append(packFilePath)
+			self._packGames.append(game)
+			self._packFilePathToPackId[packFilePath] = packId
+		return packId
+
+	def _getFileExtensionId(self, fileExtension: str) -> int:
+		fileExtensionId = self._fileExtensionToFileExtensionId.get(fileExtension, None)
+		if fileExtensionId is None:
+			fileExtensionId = len(self._fileExtensions)
+			self._fileExtensions.append(fileExtension)
+			self._fileExtensionToFileExtensionId[fileExtension] = fileExtensionId
+		return fileExtensionId
+
+	def _addRow(self, filename: str, offset: int, size: int, packId: int):
+		self._filenames.append(sys.intern(filename))
+		self._packIds.append(packId)
+		self._offsets.append(offset)
+		self._sizes.append(size)
+		self._fileExtensionIds.append(self._getFileExtensionId(self.getFileExtension(filename)))
+
+	def addFileEntry(self, filename: str, offset: int, size: int, packFilePath: str, game: Game) -> 'FileEntry':
+		"""Add a single entry to this table, and return the view of its row"""
+		self._addRow(filename, offset, size, self._getPackId(packFilePath, game))
+		return FileEntry.fromTableRow(self, len(self._filenames) - 1)
+
+	def addFileIndex(self, packFilePath: str, fileIndex: Union[Dict, FileIndexColumns]) -> range:
+		"""
+		Add all the entries from the provided ggpack file index to this table
+		:param packFilePath: The path to the ggpack that the file index is from
+		:param fileIndex: The file index, either as returned by 'GGPackParser.getFileIndex', or as columns as returned by 'GGPackParser.getFileIndexColumns'. Columns get added without going through each entry separately
+		:return: The indexes of the added rows
+		"""
+		if isinstance(fileIndex, dict):
+			fileIndex = FileIndexColumns.fromFileIndex(fileIndex)
+		firstRowIndex = len(self._filenames)
+		packId = self._getPackId(packFilePath, Game.ggpackPathToGameName(packFilePath))
+		filenames = [sys.intern(filename) for filename in fileIndex.filenames]
+		fileExtensionIds = array.array('H', [self._getFileExtensionId(self.getFileExtension(filename)) for filename in filenames])
+		self._filenames.extend(filenames)
+		self._packIds.extend(array.array('H', [packId]) * len(filenames))
+		self._offsets.extend(fileIndex.offsets)
+		self._sizes.extend(fileIndex.sizes)
+		self._fileExtensionIds.extend(fileExtensionIds)
+		return range(firstRowIndex, len(self._filenames))
+
+	@staticmethod
+	def fromFileEntries(fileEntries: Iterable['FileEntry']) -> 'FileEntryTable':
+		"""Create a new table with just the provided entries. This is useful to send a part of a large table to another process. Converted data isn't copied"""
+		fileEntryTable = FileEntryTable()
+		for fileEntry in fileEntries:
+			fileEntryTable._addRow(fileEntry.filename, fileEntry.offset, fileEntry.size, fileEntryTable._getPackId(fileEntry.packFilePath, fileEntry.game))
+		return fileEntryTable
+
+	def __len__(self) -> int:
+		return len(self._filenames)
+
+	def __getitem__(self, rowIndex: int) -> 'FileEntry':
+		if rowIndex < 0:
+			rowIndex += len(self._filenames)
+		if not 0 <= rowIndex < len(self._filenames):
+			raise IndexError(f"Row index {rowIndex:,} is out of range for a table with {len(self._filenames):,} rows")
+		return FileEntry.fromTableRow(self, rowIndex)
+
+	def __iter__(self) -> Iterator['FileEntry']:
+		for rowIndex in range(len(self._filenames)):
+			yield FileEntry.fromTableRow(self, rowIndex)
+
+	@property
+	def fileEntries(self) -> List['FileEntry']:
+		return list(self)
+
+	@property
+	def packFilePaths(self) -> List[str]:
+		return list(self._packFilePaths)
+
+	def getFilename(self, rowIndex: int) -> str:
+		return self._filenames[rowIndex]
+
+	def getOffset(self, rowIndex: int) -> int:
+		return self._offsets[rowIndex]
+
+	def getSize(self, rowIndex: int) -> int:
+		return self._sizes[rowIndex]
+
+	def getPackFilePath(self, rowIndex: int) -> str:
+		return self._packFilePaths[self._packIds[rowIndex]]
+
+	def getGame(self, rowIndex: int) -> Game:
+		return self._packGames[self._packIds[rowIndex]]
+
+	def getFileExtensionOfRow(self, rowIndex: int) -> str:
+		return self._fileExtensions[self._fileExtensionIds[rowIndex]]
+
+	def findRowIndexes(self, fileExtension: str = None, packFilePath: str = None) -> List[int]:
+		"""
+		Find the rows that match all the provided criteria
+		:param fileExtension: If provided, only rows with this file extension match
+		:param packFilePath: If provided, only rows from this ggpack match
+		:return: The indexes of the matching rows, in order
+		"""
+		criteria = []
+		if fileExtension is not None:
+			if fileExtension not in self._fileExtensionToFileExtensionId:
+				return []
+			criteria.append((self._fileExtensionIds, self._fileExtensionToFileExtensionId[fileExtension]))
+		if packFilePath is not None:
+			if packFilePath not in self._packFilePathToPackId:
+				return []
+			criteria.append((self._packIds, self._packFilePathToPackId[packFilePath]))
+		if numpy is not None:
+			matches = numpy.ones(len(self._filenames), dtype=bool)
+			for column, value in criteria:
+				matches &= numpy.frombuffer(column, dtype=numpy.uint16) == value
+			return numpy.flatnonzero(matches).tolist()
+		return [rowIndex for rowIndex in range(len(self._filenames)) if all(column[rowIndex] == value for column, value in criteria)]
+
+	def getFileExtensionCounts(self) -> Dict[str, int]:
+		"""Count how many entries there are of each file extension"""
+		if numpy is not None:
+			counts = numpy.bincount(numpy.frombuffer(self._fileExtensionIds, dtype=numpy.uint16), minlength=len(self._fileExtensions)).tolist()
+		else:
+			counts = [0] * len(self._fileExtensions)
+			for fileExtensionId in self._fileExtensionIds:
+				counts[fileExtensionId] += 1
+		return dict(zip(self._fileExtensions, counts))
+
+	def getTotalSize(self, rowIndexes: Iterable[int] = None) -> int:
+		"""Get the total size in bytes of the provided rows, or of all rows if none are provided"""
+		if rowIndexes is None:
+			return int(numpy.frombuffer(self._sizes, dtype=numpy.uint64).sum()) if numpy is not None else sum(self._sizes)
+		return sum(self._sizes[rowIndex] for rowIndex in rowIndexes)
 
 
 class FileEntry:
 	"""
 	This class represents a packed file entry.
 	It knows in which ggpack-file it is, and where
+	It's usually a light view of a row in a 'FileEntryTable', which stores the actual values. Entries that aren't part of a table store their values themselves
 	"""
+	__slots__ = ('_fileEntryTable', '_rowIndex', '_values', 'convertedData')
 
 	def __init__(self, filename: str, offset: int, size: int, packFilePath: str, game: Game):
-		self.filename: str = filename
-		self.offset: int = offset
-		self.size: int = size
-		self.packFilePath: str = packFilePath
-
-		self._fileExtension: Union[None, str] = None
-		self.game: Game = game
+		"""Create a file entry that isn't part of a larger table. Entries of whole ggpacks should be added to a shared 'FileEntryTable' instead, with 'FileEntryTable.addFileIndex'"""
+		self._fileEntryTable: Union[None, FileEntryTable] = None
+		self._rowIndex: int = 0
+		# The filename, offset, size, ggpack path, and game, only set if this entry isn't a view of a table row
+		self._values: Union[None, Tuple[str, int, int, str, Game]] = (filename, offset, size, packFilePath, game)
 		# 'convertedData' can be set to the converted data that's parsed when a file entry is opened.
 		# This is useful when saving that data, so it doesn't need to be converted again
 		# To keep memory usage in check, it should be cleared again when this file entry tab is closed
 		self.convertedData = None
 
+	@staticmethod
+	def fromTableRow(fileEntryTable: FileEntryTable, rowIndex: int) -> 'FileEntry':
+		fileEntry = FileEntry.__new__(FileEntry)
+		fileEntry._fileEntryTable = fileEntryTable
+		fileEntry._rowIndex = rowIndex
+		fileEntry._values = None
+		fileEntry.convertedData = None
+		return fileEntry
+
+	@property
+	def filename(self) -> str:
+		return self._values[0] if self._fileEntryTable is None else self._fileEntryTable.getFilename(self._rowIndex)
+
+	@property
+	def offset(self) -> int:
+		return self._values[1] if self._fileEntryTable is None else self._fileEntryTable.getOffset(self._rowIndex)
+
+	@property
+	def size(self) -> int:
+		return self._values[2] if self._fileEntryTable is None else self._fileEntryTable.getSize(self._rowIndex)
+
+	@property
+	def packFilePath(self) -> str:
+		return self._values[3] if self._fileEntryTable is None else self._fileEntryTable.getPackFilePath(self._rowIndex)
+
+	@property
+	def game(self) -> Game:
+		return self._values[4] if self._fileEntryTable is None else self._fileEntryTable.getGame(self._rowIndex)
+
 	@property
 	def fileExtension(self) -> str:
-		if self._fileExtension is None:
-			# Split at the first period, so we can distinguish between, for instance, '.strings.bank' and '.assets.bank'
-			self._fileExtension = '.' + self.filename.split('.', 1)[-1]
-		return self._fileExtension
+		return FileEntryTable.getFileExtension(self._values[0]) if self._fileEntryTable is None else self._fileEntryTable.getFileExtensionOfRow(self._rowIndex)
+
+	def __reduce__(self):
+		# Only send this entry's own values to other processes, instead of the whole table it's a view of
+		return FileEntry, (self.filename, self.offset, self.size, self.packFilePath, self.game), self.convertedData
+
+	def __setstate__(self, convertedData):
+		self.convertedData = convertedData
 
 	def __str__(self):
 		return f"{self.filename} in {self.packFilePath}"
@@ -0,0 +1,105 @@
+import array, bisect, fnmatch, re
+from typing import Dict, Iterable, List
+
+from models.FileEntry import FileEntry, FileEntryTable
+
+
+class FileEntryIndex:
+	"""
+	Lookup indexes over the filenames in a 'FileEntryTable', so entries can be found by name without going through every entry.
+	Supports lookups by exact name, by name ignoring case, by file extension, by name prefix, and by wildcard pattern. All lookups return row indexes of the table, which 'getFileEntries' turns into entries.
+	Filenames are compared in lowercase, like the file browser does. With mods, multiple rows can have the same filename, so lookups by name can return multiple rows
+	"""
+
+	def __init__(self, fileEntryTable: FileEntryTable):
+		self._fileEntryTable: FileEntryTable = fileEntryTable
+		self._rowCount: int = 0
+		self._lowercaseNameToRowIndexes: Dict[str, List[int]] = {}
+		self._lowercaseFileExtensionToRowIndexes: Dict[str, List[int]] = {}
+		# The lowercase names in sorted order for prefix lookups, all row indexes sorted by name, and where the rows of each sorted name start in those. These get rebuilt when they're needed after rows were added
+		self._sortedLowercaseNames: List[str] = []
+		self._rowIndexesSortedByName: array.array = array.array('I')
+		self._sortedNameRowStarts: array.array = array.array('I', [0])
+		self._isSortedByNameOutdated: bool = False
+		self.addRows(range(len(fileEntryTable)))
+
+	def addRows(self, rowIndexes: Iterable[int]):
+		"""Add rows of the table to the indexes, for instance the rows returned by 'FileEntryTable.addFileIndex' when a ggpack gets loaded after this index was created"""
+		for rowIndex in rowIndexes:
+			lowercaseName = self._fileEntryTable.getFilename(rowIndex).lower()
+			self._lowercaseNameToRowIndexes.setdefault(lowercaseName, []).append(rowIndex)
+			self._lowercaseFileExtensionToRowIndexes.setdefault(FileEntryTable.getFileExtension(lowercaseName), []).append(rowIndex)
+			self._rowCount += 1
+			self._isSortedByNameOutdated = True
+
+	def _updateSortedByName(self):
+		if not self._isSortedByNameOutdated:
+			return
+		self._sortedLowercaseNames = sorted(self._lowercaseNameToRowIndexes)
+		self._rowIndexesSortedByName = array.array('I')
+		self._sortedNameRowStarts = array.array('I', [0])
+		for lowercaseName in self._sortedLowercaseNames:
+			self._rowIndexesSortedByName.extend(self._lowercaseNameToRowIndexes[lowercaseName])
+			self._sortedNameRowStarts.append(len(self._rowIndexesSortedByName))
+		self._isSortedByNameOutdated = False
+
+	@property
+	def fileEntryTable(self) -> FileEntryTable:
+		return self._fileEntryTable
+
+	def __len__(self) -> int:
+		"""The number of indexed rows"""
+		return self._rowCount
+
+	def getFileEntries(self, rowIndexes: Iterable[int]) -> List[FileEntry]:
+		"""Get the entries of the provided rows, as returned by the lookup methods"""
+		return [self._fileEntryTable[rowIndex] for rowIndex in rowIndexes]
+
+	def findRowIndexesByName(self, filename: str, isCaseSensitive: bool = True) -> List[int]:
+		"""
+		Find the rows with the provided filename
+		:param filename: The filename to look up, without a path
+		:param isCaseSensitive: If False, filenames that only differ in case also match
+		:return: The indexes of the matching rows, in order
+		"""
+		rowIndexes = self._lowercaseNameToRowIndexes.get(filename.lower(), [])
+		if isCaseSensitive:
+			return [rowIndex for rowIndex in rowIndexes if self._fileEntryTable.getFilename(rowIndex) == filename]
+		return list(rowIndexes)
+
+	def findRowIndexesByExtension(self, fileExtension: str) -> List[int]:
+		"""Find the rows with the provided file extension, ignoring case. The extension includes the leading period, and is everything after the first period of a filename, see 'FileEntryTable.getFileExtension'"""
+		return list(self._lowercaseFileExtensionToRowIndexes.get(fileExtension.lower(), []))
+
+	def findRowIndexesByPrefix(self, prefix: str) -> List[int]:
+		"""Find the rows whose filename starts with the provided prefix, ignoring case. The indexes are sorted by filename"""
+		self._updateSortedByName()
+		prefix = prefix.lower()
+		firstNameIndex = bisect.bisect_left(self._sortedLowercaseNames, prefix)
+		endNameIndex = firstNameIndex
+		while endNameIndex < len(self._sortedLowercaseNames) and self._sortedLowercaseNames[endNameIndex].startswith(prefix):
+			endNameIndex += 1
+		# The rows of the matching names are consecutive in the rows sorted by name
+		return self._rowIndexesSortedByName[self._sortedNameRowStarts[firstNameIndex]:self._sortedNameRowStarts[endNameIndex]].tolist()
+
+	def findRowIndexesByPattern(self, pattern: str) -> List[int]:
+		"""
+		Find the rows whose filename matches the provided wildcard pattern, ignoring case. '*' matches any number of characters, '?' a single character, and '[...]' any of the characters between the brackets, like the 'fnmatch' module does
+		Patterns that are a plain name, a prefix followed by '*', or a text surrounded by '*' are looked up without matching every filename against the pattern
+		:return: The indexes of the matching rows, in order
+		"""
+		pattern = pattern.lower()
+		plainText = pattern.strip('*')
+		if not any(wildcard in plainText for wildcard in '*?['):
+			if plainText == pattern:
+				return self.findRowIndexesByName(pattern, False)
+			elif not pattern.startswith('*'):
+				return sorted(self.findRowIndexesByPrefix(plainText))
+			isMatch = lambda lowercaseName: plainText in lowercaseName if pattern.endswith('*') else lowercaseName.endswith(plainText)
+		else:
+			isMatch = re.compile(fnmatch.translate(pattern), re.DOTALL).match
+		# Each name only needs to be matched once, however many rows have that name
+		return sorted(rowIndex for lowercaseName, rowIndexes in self._lowercaseNameToRowIndexes.items() if isMatch(lowercaseName) for rowIndex in rowIndexes)
+
+	def __str__(self):
+		return f"File entry index of {self._rowCount:,} rows with {len(self._lowercaseNameToRowIndexes):,} different filenames"
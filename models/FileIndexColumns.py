@@ -0,0 +1,35 @@
+import array
+from typing import Dict, List, Union
+
+
+class FileIndexColumns:
+	"""
+	The entries of a ggpack file index, stored as columns instead of as a dict per entry
+	This is what the file index parser and the file index cache produce, and what a 'FileEntryTable' stores, so entries can be added to a table without creating a dict for each of them first
+	"""
+
+	def __init__(self, filenames: List[str], offsets: array.array, sizes: array.array, guid: Union[None, str]):
+		self.filenames: List[str] = filenames
+		self.offsets: array.array = offsets
+		self.sizes: array.array = sizes
+		self.guid: Union[None, str] = guid
+
+	@staticmethod
+	def fromFileIndex(fileIndex: Dict) -> 'FileIndexColumns':
+		"""Create columns from a file index dict, as returned by 'GGPackParser.getFileIndex'. Fields other than the filename, offset, and size of each entry and the GUID are ignored"""
+		files: List[Dict] = fileIndex['files']
+		filenames = [fileEntryData['filename'] for fileEntryData in files]
+		offsets = array.array('Q', [fileEntryData['offset'] for fileEntryData in files])
+		sizes = array.array('Q', [fileEntryData['size'] for fileEntryData in files])
+		return FileIndexColumns(filenames, offsets, sizes, fileIndex.get('guid', None))
+
+	def toFileIndex(self) -> Dict[str, Union[List[Dict], str]]:
+		"""Convert these columns to a file index dict, in the same format as 'GGDictParser.fromGgDict' returns for a ggpack file index"""
+		files = [{"filename": filename, "offset": offset, "size": size} for filename, offset, size in zip(self.filenames, self.offsets, self.sizes)]
+		return {"files": files, "guid": self.guid}
+
+	def __len__(self) -> int:
+		return len(self.filenames)
+
+	def __str__(self):
+		return f"File index with {len(self.filenames):,} entries"
@@ -0,0 +1,122 @@
+import os, re
+from typing import Dict, Iterable, List, Union
+
+from models.FileEntry import FileEntry, FileEntryTable
+
+
+class PackOverlay:
+	"""
+	A single filesystem view of all the ggpacks in a 'FileEntryTable', like the game sees it.
+	When multiple ggpacks contain a file with the same name, for instance because a mod replaces that file, the entry from the ggpack with the highest precedence wins, and the other entries are shadowed by it.
+	Winning entries are stored by filename, so resolving a filename takes the same time however many entries there are. The shadowed entries are kept as well, since they can still be useful to inspect
+	"""
+
+	def __init__(self, fileEntryTable: FileEntryTable, packFilePathsByPrecedence: Iterable[str] = None):
+		"""
+		:param fileEntryTable: The table with the entries of all the ggpacks to combine
+		:param packFilePathsByPrecedence: The ggpacks in the table, from lowest to highest precedence. If this isn't provided, ggpacks get their precedence from their filename, see 'sortPackFilePathsByPrecedence'
+		"""
+		self._fileEntryTable: FileEntryTable = fileEntryTable
+		if packFilePathsByPrecedence is None:
+			packFilePathsByPrecedence = PackOverlay.sortPackFilePathsByPrecedence(fileEntryTable.packFilePaths)
+		self._packFilePathToPrecedence: Dict[str, int] = {packFilePath: precedence for precedence, packFilePath in enumerate(packFilePathsByPrecedence)}
+		self._filenameToWinningRowIndex: Dict[str, int] = {}
+		# Only filenames that exist more than once are stored here, with the row indexes of the shadowed entries, highest precedence first
+		self._filenameToShadowedRowIndexes: Dict[str, List[int]] = {}
+		self.addRows(range(len(fileEntryTable)))
+
+	@staticmethod
+	def sortPackFilePathsByPrecedence(packFilePaths: Iterable[str]) -> List[str]:
+		"""
+		Sort the provided ggpacks from lowest to highest precedence, the order in which the game loads them, so later ggpacks override earlier ones
+		The ggpacks are sorted by filename, with numbers sorted by their value, so for instance 'Weird.ggpack10a' comes after 'Weird.ggpack2b'
+		"""
+		def getSortKey(packFilePath: str):
+			return [(0, int(namePart), '') if namePart.isdigit() else (1, 0, namePart) for namePart in re.split(r'(\d+)', os.path.basename(packFilePath).lower())]
+		return sorted(packFilePaths, key=getSortKey)
+
+	def addRows(self, rowIndexes: Iterable[int]):
+		"""
+		Add rows of the table to this overlay, for instance the rows returned by 'FileEntryTable.addFileIndex' when a ggpack gets loaded after this overlay was created
+		Rows from ggpacks that weren't in the provided precedence order get a higher precedence than all the ggpacks that were
+		"""
+		for rowIndex in rowIndexes:
+			filename = self._fileEntryTable.getFilename(rowIndex)
+			winningRowIndex = self._filenameToWinningRowIndex.get(filename, None)
+			if winningRowIndex is None:
+				self._filenameToWinningRowIndex[filename] = rowIndex
+				continue
+			shadowedRowIndexes = self._filenameToShadowedRowIndexes.setdefault(filename, [])
+			if self._getRowPrecedence(rowIndex) >= self._getRowPrecedence(winningRowIndex):
+				# Within a single ggpack, the entry that's listed last wins, since that's the one that ends up in the game's file table
+				self._filenameToWinningRowIndex[filename] = rowIndex
+				shadowedRowIndexes.append(winningRowIndex)
+			else:
+				shadowedRowIndexes.append(rowIndex)
+			shadowedRowIndexes.sort(key=lambda shadowedRowIndex: (self._getRowPrecedence(shadowedRowIndex), shadowedRowIndex), reverse=True)
+
+	def _getRowPrecedence(self, rowIndex: int) -> int:
+		packFilePath = self._fileEntryTable.getPackFilePath(rowIndex)
+		precedence = self._packFilePathToPrecedence.get(packFilePath, None)
+		if precedence is None:
+			precedence = len(self._packFilePathToPrecedence)
+			self._packFilePathToPrecedence[packFilePath] = precedence
+		return precedence
+
+	def __len__(self) -> int:
+		"""The number of different filenames, so shadowed entries aren't counted"""
+		return len(self._filenameToWinningRowIndex)
+
+	def __contains__(self, filename: str) -> bool:
+		return filename in self._filenameToWinningRowIndex
+
+	@property
+	def filenames(self) -> List[str]:
+		return list(self._filenameToWinningRowIndex)
+
+	def resolve(self, filename: str) -> Union[None, FileEntry]:
+		"""Get the entry that the game uses for the provided filename, or None if no loaded ggpack has a file with that name"""
+		rowIndex = self._filenameToWinningRowIndex.get(filename, None)
+		return None if rowIndex is None else self._fileEntryTable[rowIndex]
+
+	def getShadowedFileEntries(self, filename: str) -> List[FileEntry]:
+		"""Get the entries with the provided filename that are overridden by the entry that 'resolve' returns, from highest to lowest precedence"""
+		return [self._fileEntryTable[rowIndex] for rowIndex in self._filenameToShadowedRowIndexes.get(filename, ())]
+
+	def getAllVersions(self, filename: str) -> List[FileEntry]:
+		"""Get all the entries with the provided filename, from highest to lowest precedence, so the first one is the one the game uses"""
+		winningFileEntry = self.resolve(filename)
+		return [] if winningFileEntry is None else [winningFileEntry] + self.getShadowedFileEntries(filename)
+
+	def getEffectiveFileEntries(self) -> List[FileEntry]:
+		"""Get the entries that the game uses, one for each filename, without any of the shadowed entries"""
+		return [self._fileEntryTable[rowIndex] for rowIndex in sorted(self._filenameToWinningRowIndex.values())]
+
+	def getShadowedFilenames(self) -> List[str]:
+		"""Get the filenames that exist in more than one place, so they have shadowed entries"""
+		return list(self._filenameToShadowedRowIndexes)
+
+	def isShadowed(self, fileEntry: FileEntry) -> bool:
+		"""Check whether the provided entry is overridden by another entry with the same name"""
+		winningFileEntry = self.resolve(fileEntry.filename)
+		return winningFileEntry is not None and (winningFileEntry.packFilePath, winningFileEntry.offset, winningFileEntry.size) != (fileEntry.packFilePath, fileEntry.offset, fileEntry.size)
+
+	def removeShadowedDuplicates(self, fileEntries: Iterable[FileEntry]) -> List[FileEntry]:
+		"""
+		Remove entries that share a filename with a higher precedence entry in the provided entries, for instance so an export doesn't save every version of a file to the same path
+		An entry that's shadowed in the game but is the only entry with its filename in the provided entries is kept
+		:return: The remaining entries, in their original order
+		"""
+		fileEntries = list(fileEntries)
+		filenameToBestFileEntryIndex: Dict[str, int] = {}
+		for fileEntryIndex, fileEntry in enumerate(fileEntries):
+			bestFileEntryIndex = filenameToBestFileEntryIndex.get(fileEntry.filename, None)
+			if bestFileEntryIndex is None or self._getFileEntrySortKey(fileEntry) >= self._getFileEntrySortKey(fileEntries[bestFileEntryIndex]):
+				filenameToBestFileEntryIndex[fileEntry.filename] = fileEntryIndex
+		return [fileEntries[fileEntryIndex] for fileEntryIndex in sorted(filenameToBestFileEntryIndex.values())]
+
+	def _getFileEntrySortKey(self, fileEntry: FileEntry):
+		return not self.isShadowed(fileEntry), self._packFilePathToPrecedence.get(fileEntry.packFilePath, -1)
+
+	def __str__(self):
+		return f"Pack overlay of {len(self._packFilePathToPrecedence):,} ggpacks with {len(self._filenameToWinningRowIndex):,} files, {len(self._filenameToShadowedRowIndexes):,} of which are overridden"
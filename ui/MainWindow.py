@@ -8,10 +8,11 @@ from PIL import ImageQt
 from PIL.Image import Image
 from PySide6 import QtCore, QtGui, QtWidgets
 
-from enums.Game import Game
 from fileparsers import GGPackParser
 from fileparsers.dinkhelpers.DinkScript import DinkScript
-from models.FileEntry import FileEntry
+from models.FileEntry import FileEntry, FileEntryTable
+from models.FileEntryIndex import FileEntryIndex
+from models.PackOverlay import PackOverlay
 from ui import WidgetHelpers
 from ui.dialogs.SaveProgressDialog import SaveProgressDialog
 from ui.widgets.BaseFileEntryDisplayWidget import BaseFileEntryDisplayWidget
@@ -37,6 +38,10 @@ class MainWindow(QtWidgets.QMainWindow):
 		self.setAcceptDrops(True)
 
 		self.gamePath: str = ''
+		# Resolves filenames to the entries the game actually uses, when mods override files from other ggpacks
+		self.packOverlay: Union[None, PackOverlay] = None
+		# Looks up entries by name, extension, or pattern, for filtering without going through every entry
+		self.fileEntryIndex: Union[None, FileEntryIndex] = None
 		# Store the opened subwindows in here, so we can't open one file multiple times (Don't use filenames for this, with mods there can be duplicates)
 		self._displayedFileEntries: WeakValueDictionary[FileEntry, QtWidgets.QMdiSubWindow] = WeakValueDictionary()
 
@@ -120,24 +125,27 @@ class MainWindow(QtWidgets.QMainWindow):
 			self.setGamePath(path)
 
 	def setGamePath(self, gamePath: str):
-		packedFileEntries: List[FileEntry] = []
-		packedFilePaths = self._getPackFilesInFolder(gamePath)
+		# Store all the entries in one compact table, and only create the light views of each row for the file browser
+		fileEntryTable = FileEntryTable()
+		# Sort the ggpacks in the order the game loads them, so later ggpacks override files from earlier ones
+		packedFilePaths = PackOverlay.sortPackFilePathsByPrecedence(self._getPackFilesInFolder(gamePath))
 		if len(packedFilePaths) == 0:
 			WidgetHelpers.showErrorMessage("No files found", f"The folder\n{gamePath}\ndoes not contain any supported game files")
 			return
-		for packFilePath in packedFilePaths:
+		# Load the file indexes of all the ggpacks at the same time, that's quicker than loading them one by one
+		for packFilePath, fileIndex in GGPackParser.getFileIndexes(packedFilePaths, True).items():
 			try:
-				fileIndex = GGPackParser.getFileIndex(packFilePath)
-				game = Game.ggpackPathToGameName(packFilePath)
-				for fileEntryData in fileIndex['files']:
-					fileEntry = FileEntry(fileEntryData['filename'], fileEntryData['offset'], fileEntryData['size'], packFilePath, game)
-					packedFileEntries.append(fileEntry)
+				if isinstance(fileIndex, BaseException):
+					raise fileIndex
+				fileEntryTable.addFileIndex(packFilePath, fileIndex)
 			except Exception as e:
 				traceback.print_exc()
 				WidgetHelpers.showErrorMessage("Error Opening GGPack", f"An error occurred while trying to load '{packFilePath}':\n\n{e}")
 		self.gamePath = gamePath
+		self.packOverlay = PackOverlay(fileEntryTable, packedFilePaths)
+		self.fileEntryIndex = FileEntryIndex(fileEntryTable)
 		self.updateWindowTitle(gamePath)
-		self.packedFileBrowser.showFilesInFileBrowser(packedFileEntries)
+		self.packedFileBrowser.showFilesInFileBrowser(self.fileEntryIndex, self.packOverlay)
 
 	def _getPackFilesInFolder(self, pathToCheck: str) -> List[str]:
 		if not os.path.exists(pathToCheck):
@@ -190,7 +198,7 @@ class MainWindow(QtWidgets.QMainWindow):
 			widgetToShow = ImageDisplayWidget(fileEntryToShow, ImageQt.toqpixmap(dataToShow))
 		elif isinstance(dataToShow, List) and isinstance(dataToShow[0], List) and isinstance(dataToShow[0][0], str):
 			widgetToShow = TableDisplayWidget(fileEntryToShow, dataToShow)
-		elif isinstance(dataToShow, bytes):
+		elif isinstance(dataToShow, (bytes, bytearray)):
 			# These need a bit more parsing, depending on file extension
 			if fileEntryToShow.fileExtension in ('.otf', '.ttf'):
 				widgetToShow = FontDisplayWidget(fileEntryToShow, dataToShow)
@@ -219,7 +227,10 @@ class MainWindow(QtWidgets.QMainWindow):
 		if not fileEntries or fileEntries[0] is None:
 			WidgetHelpers.showErrorMessage("Nothing To Save", "There are no file entries to save")
 			return
-		elif len(fileEntries) > 100:
+		if self.packOverlay:
+			# Overridden versions of a file would be saved to the same path as the version the game uses, so only save the version the game uses
+			fileEntries = self.packOverlay.removeShadowedDuplicates(fileEntries)
+		if len(fileEntries) > 100:
 			if not WidgetHelpers.askConfirmation("Many Files To Save", f"This would save {len(fileEntries):,} files, which might take a while,\nand might use a lot of memory and/or CPU power.", "Are you sure you want to continue?"):
 				return
 		savePath = QtWidgets.QFileDialog.getExistingDirectory(self, saveDialogTitle, dir=self.gamePath)
@@ -4,7 +4,8 @@ from typing import Dict, List
 from PySide6 import QtCore, QtGui, QtWidgets
 
 from fileparsers import GGPackParser
-from models.FileEntry import FileEntry
+from fileparsers.ggpackhelpers.GGPack import GGPack
+from models.FileEntry import FileEntry, FileEntryTable
 
 
 class SaveProgressDialog(QtWidgets.QDialog):
@@ -81,6 +82,8 @@ class SaveProgressDialog(QtWidgets.QDialog):
 class _Runner(QtCore.QRunnable, QtCore.QObject):
 	fileEntrySavedSignal = QtCore.Signal(FileEntry, BaseException)
 	finishedSignal = QtCore.Signal()
+	# How many entries to send to a worker process at once. Small enough to spread the work over the workers, large enough that sending them is cheap
+	_CONVERT_BATCH_SIZE: int = 32
 
 	def __init__(self, fileEntriesToSave: List[FileEntry], savePath: str, shouldConvertData: bool):
 		QtCore.QRunnable.__init__(self)
@@ -92,11 +95,36 @@ class _Runner(QtCore.QRunnable, QtCore.QObject):
 
 	@QtCore.Slot()
 	def run(self):
+		# Entries that get saved as they are can be read in large batches per ggpack, only entries that need converting are sent to the worker processes
+		packFilePathToUnconvertedFileEntries: Dict[str, List[FileEntry]] = {}
+		fileEntriesToConvert: List[FileEntry] = []
 		with concurrent.futures.ProcessPoolExecutor(8) as pool:
-			futureToFileEntry: Dict[concurrent.futures.Future, FileEntry] = {}
+			futureToFileEntries: Dict[concurrent.futures.Future, List[FileEntry]] = {}
 			for fileEntry in self._fileEntriesToSave:
-				future = pool.submit(GGPackParser.savePackedFile, fileEntry, self._savePath, self._shouldConvertData)
-				futureToFileEntry[future] = fileEntry
-			for completedFuture in concurrent.futures.as_completed(futureToFileEntry):
-				self.fileEntrySavedSignal.emit(futureToFileEntry[completedFuture], completedFuture.exception())
+				if GGPackParser.shouldSaveUnconverted(fileEntry, self._shouldConvertData):
+					packFilePathToUnconvertedFileEntries.setdefault(fileEntry.packFilePath, []).append(fileEntry)
+				elif fileEntry.convertedData:
+					# Send entries that are already converted on their own, so the converted data gets sent along
+					futureToFileEntries[pool.submit(GGPackParser.savePackedFiles, [fileEntry], self._savePath, self._shouldConvertData)] = [fileEntry]
+				else:
+					fileEntriesToConvert.append(fileEntry)
+			# Send the other entries to convert in batches, as compact tables, since sending each entry separately is slow
+			for batchStartIndex in range(0, len(fileEntriesToConvert), self._CONVERT_BATCH_SIZE):
+				fileEntriesBatch = fileEntriesToConvert[batchStartIndex:batchStartIndex + self._CONVERT_BATCH_SIZE]
+				futureToFileEntries[pool.submit(GGPackParser.savePackedFiles, FileEntryTable.fromFileEntries(fileEntriesBatch), self._savePath, self._shouldConvertData)] = fileEntriesBatch
+			# The worker processes convert in the background while the unconverted entries get saved here
+			for packFilePath, unconvertedFileEntries in packFilePathToUnconvertedFileEntries.items():
+				try:
+					with GGPack(packFilePath) as ggpack:
+						for fileEntry, saveError in ggpack.extractMany(unconvertedFileEntries, self._savePath):
+							self.fileEntrySavedSignal.emit(fileEntry, saveError)
+				except Exception as e:
+					# Opening the ggpack failed, so none of its entries could be saved
+					for fileEntry in unconvertedFileEntries:
+						self.fileEntrySavedSignal.emit(fileEntry, e)
+			for completedFuture in concurrent.futures.as_completed(futureToFileEntries):
+				fileEntriesBatch = futureToFileEntries[completedFuture]
+				saveErrors = [completedFuture.exception()] * len(fileEntriesBatch) if completedFuture.exception() else completedFuture.result()
+				for fileEntry, saveError in zip(fileEntriesBatch, saveErrors):
+					self.fileEntrySavedSignal.emit(fileEntry, saveError)
 		self.finishedSignal.emit()
@@ -1,21 +1,27 @@
 import os
-from fnmatch import fnmatch
-from typing import List
+from typing import List, Union
 
-from PySide6 import QtCore, QtWidgets
+from PySide6 import QtCore, QtGui, QtWidgets
 
 from models.FileEntry import FileEntry
+from models.FileEntryIndex import FileEntryIndex
+from models.PackOverlay import PackOverlay
 from ui import WidgetHelpers
 
 
 class PackedFilesBrowserWidget(QtWidgets.QWidget):
 	loadFileSignal = QtCore.Signal(FileEntry)
 	_COLUMN_DATA_USER_ROLE: int = int(QtCore.Qt.ItemDataRole.UserRole)
-	_LOWERCASE_NAME_COLUMN_INDEX: int = 0
 	_FILE_ENTRY_COLUMN_INDEX: int = 1
 
 	def __init__(self):
 		super().__init__()
+		# Filtering looks up the matching rows in this index, instead of checking the name of every tree item
+		self._fileEntryIndex: Union[None, FileEntryIndex] = None
+		# The tree items by row index of the indexed table, so rows found in the index can be shown without searching the tree
+		self._treeItems: List[QtWidgets.QTreeWidgetItem] = []
+		# The row indexes that match the current filter, or None if the file browser isn't filtered
+		self._filteredRowIndexes: Union[None, List[int]] = None
 
 		layout = QtWidgets.QVBoxLayout(self)
 		layout.setContentsMargins(0, 0, 0, 0)
@@ -51,22 +57,29 @@ class PackedFilesBrowserWidget(QtWidgets.QWidget):
 		WidgetHelpers.createButton('X', self._clearFileBrowserFilter, filterContainerLayout)
 		layout.addWidget(filterContainer)
 
-	def showFilesInFileBrowser(self, packedFileEntries: List[FileEntry]):
+	def showFilesInFileBrowser(self, fileEntryIndex: FileEntryIndex, packOverlay: Union[None, PackOverlay] = None):
 		self._fileBrowser.clear()
-		if packedFileEntries:
+		self._fileEntryIndex = fileEntryIndex
+		self._treeItems = []
+		if len(fileEntryIndex) > 0:
+			shadowedEntryBrush = QtGui.QBrush(QtCore.Qt.GlobalColor.gray)
 			# Disable sorting while adding new entries, for performance
 			self._fileBrowser.setSortingEnabled(False)
 			# Add all the entries
-			for packedFileEntry in packedFileEntries:
+			for packedFileEntry in fileEntryIndex.fileEntryTable:
 				treeItem = QtWidgets.QTreeWidgetItem(self._fileBrowser)
 				treeItem.setText(0, packedFileEntry.filename)
 				treeItem.setText(1, os.path.basename(packedFileEntry.packFilePath))
 				treeItem.setText(2, f"{packedFileEntry.size:,}")
-				# Put a lowercase name hidden in a column, for case-insensitive filtering
-				treeItem.setData(self._LOWERCASE_NAME_COLUMN_INDEX, self._COLUMN_DATA_USER_ROLE, packedFileEntry.filename.lower())
 				# Put the actual file entry hidden a column, so we can retrieve it when an treeItem is clicked
 				treeItem.setData(self._FILE_ENTRY_COLUMN_INDEX, self._COLUMN_DATA_USER_ROLE, packedFileEntry)
+				# Show entries that are overridden by a mod in gray, so it's clear the game doesn't use them
+				if packOverlay and packOverlay.isShadowed(packedFileEntry):
+					for columnIndex in range(self._fileBrowser.columnCount()):
+						treeItem.setForeground(columnIndex, shadowedEntryBrush)
+					treeItem.setToolTip(0, f"Overridden by the version in {os.path.basename(packOverlay.resolve(packedFileEntry.filename).packFilePath)}")
 				self._fileBrowser.addTopLevelItem(treeItem)
+				self._treeItems.append(treeItem)
 			# Update the column widths
 			for i in range(0, self._fileBrowser.columnCount()):
 				self._fileBrowser.resizeColumnToContents(i)
@@ -78,15 +91,9 @@ class PackedFilesBrowserWidget(QtWidgets.QWidget):
 		filterText = self._filterTextInput.text().strip()
 		if self._fileBrowser.topLevelItemCount() == 0:
 			labelText = "No files loaded"
-		elif filterText:
-			# Count how many file items are visible
-			visibleItemCount = 0
-			for treeItemIndex in range(self._fileBrowser.topLevelItemCount()):
-				treeItem = self._fileBrowser.topLevelItem(treeItemIndex)
-				if not treeItem.isHidden():
-					visibleItemCount += 1
+		elif filterText and self._filteredRowIndexes is not None:
 			# The file browser is filtered, show how many files are visible
-			labelText = f"Showing {visibleItemCount:,} of {self._fileBrowser.topLevelItemCount():,} files for '{filterText}'"
+			labelText = f"Showing {len(self._filteredRowIndexes):,} of {self._fileBrowser.topLevelItemCount():,} files for '{filterText}'"
 		else:
 			# Files aren't filtered, show how many files there are in total
 			labelText = f"{self._fileBrowser.topLevelItemCount():,} files found"
@@ -107,34 +114,36 @@ class PackedFilesBrowserWidget(QtWidgets.QWidget):
 		if not filterText:
 			self._clearFileBrowserFilter()
 			return
-		filterText = filterText.lower()
+		if not self._fileEntryIndex:
+			self._filteredRowIndexes = None
+			self._updateFileCountLabel()
+			return
 		# Make sure we always get partial matches ('.?tf' should get all .otf and .ttf files, instead of having to add * to the front and back every time)
-		filterText = f"*{filterText}*"
-		for treeItemIndex in range(self._fileBrowser.topLevelItemCount()):
-			treeItem = self._fileBrowser.topLevelItem(treeItemIndex)
-			treeItem.setHidden(not fnmatch(treeItem.data(self._LOWERCASE_NAME_COLUMN_INDEX, self._COLUMN_DATA_USER_ROLE), filterText))
+		self._filteredRowIndexes = self._fileEntryIndex.findRowIndexesByPattern(f"*{filterText}*")
+		filteredRowIndexes = set(self._filteredRowIndexes)
+		for rowIndex, treeItem in enumerate(self._treeItems):
+			shouldHide = rowIndex not in filteredRowIndexes
+			# Only touch the items whose visibility changes, updating a tree item is a lot slower than checking it
+			if treeItem.isHidden() != shouldHide:
+				treeItem.setHidden(shouldHide)
 		# Update the status text
 		self._updateFileCountLabel()
 
 	@QtCore.Slot(bool)
 	def _clearFileBrowserFilter(self, *args):
 		self._filterTextInput.clear()
-		for treeItemIndex in range(self._fileBrowser.topLevelItemCount()):
-			self._fileBrowser.topLevelItem(treeItemIndex).setHidden(False)
+		if self._filteredRowIndexes is not None:
+			for treeItem in self._treeItems:
+				if treeItem.isHidden():
+					treeItem.setHidden(False)
+		self._filteredRowIndexes = None
 		self._updateFileCountLabel()
 
 	def getFilteredFileEntries(self) -> List[FileEntry]:
-		fileEntries: List[FileEntry] = []
-		for treeItemIndex in range(self._fileBrowser.topLevelItemCount()):
-			treeItem = self._fileBrowser.topLevelItem(treeItemIndex)
-			if not treeItem.isHidden():
-				fileEntries.append(treeItem.data(self._FILE_ENTRY_COLUMN_INDEX, self._COLUMN_DATA_USER_ROLE))
-		return fileEntries
+		if self._filteredRowIndexes is None:
+			return self.getAllFileEntries()
+		return [self._treeItems[rowIndex].data(self._FILE_ENTRY_COLUMN_INDEX, self._COLUMN_DATA_USER_ROLE) for rowIndex in self._filteredRowIndexes]
 
 	def getAllFileEntries(self) -> List[FileEntry]:
-		fileEntries: List[FileEntry] = []
-		for treeItemIndex in range(self._fileBrowser.topLevelItemCount()):
-			treeItem = self._fileBrowser.topLevelItem(treeItemIndex)
-			fileEntries.append(treeItem.data(self._FILE_ENTRY_COLUMN_INDEX, self._COLUMN_DATA_USER_ROLE))
-		return fileEntries
+		return [treeItem.data(self._FILE_ENTRY_COLUMN_INDEX, self._COLUMN_DATA_USER_ROLE) for treeItem in self._treeItems]
 